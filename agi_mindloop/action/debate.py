@@ -1,10 +1,12 @@
 # Action evaluation: Neutral A veto; Persona B decides + scoring.
 
 from __future__ import annotations
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from dataclasses import dataclass
-from typing import Optional, List
-from agi_mindloop.llm.engine import CompletionRequest, GenOptions, Engine
-from agi_mindloop.debate import parse_eval
+from typing import Dict, Optional, List, Set, Tuple
+from agi_mindloop.llm.engine import CompletionRequest, GenOptions, Engine, serialized
+from agi_mindloop.debate import parse_eval, parse_eval_batch
+from agi_mindloop.action.eval_cache import EvalCache
 
 @dataclass
 class ActionDecision:
@@ -26,6 +28,29 @@ def _eval(engine: Engine, system_text: str, eval_sys: str, eval_user: str, actio
     return parse_eval(raw)
 
 
+def _expected(d: ActionDecision) -> float:
+    b = d.utility_b * (1.0 - d.risk_b)
+    a = d.utility_a * (1.0 - d.risk_a)
+    return 0.7*b + 0.3*a
+
+def _term(ev: dict) -> float:
+    return float(ev.get("utility", 0.0)) * (1.0 - float(ev.get("risk", 0.0)))
+
+# parse_eval clamps utility and risk to [0, 1], so one side's term is at most 1.0
+_MAX_TERM = 1.0
+
+def _eval_batch(
+    engine: Engine, system_text: str, batch_sys: str, batch_user: str, actions: List[str], context: str, gen: GenOptions
+) -> List[Optional[dict]]:
+    listing = "\n".join(f"{i}. {a}" for i, a in enumerate(actions, 1))
+    req = CompletionRequest(
+        system=(system_text + "\n" + batch_sys).strip(),
+        user=batch_user.format(actions=listing, context=context, n=len(actions)),
+    )
+    raw = engine.complete(req, gen)
+    return parse_eval_batch(raw, len(actions))
+
+
 def decide_actions(
     candidates: List[str],
     context: str,
@@ -37,43 +62,159 @@ def decide_actions(
     engine_b: Engine,
     gen: GenOptions,
     veto_risk: float,
+    max_concurrency: int = 4,
+    stats: Optional[Dict[str, int]] = None,
+    batch_sys: Optional[str] = None,
+    batch_user: Optional[str] = None,
+    cache: Optional[EvalCache] = None,
 ) -> Optional[ActionDecision]:
     """
     Evaluate each action with Neutral A and Persona B.
     - A vetoes if risk >= veto_risk.
     - Among non-vetoed ACCEPTs by B, pick max expected value: 0.7*B + 0.3*A.
+
+    With `batch_sys`/`batch_user` (the evaluate_batch prompt) and more than one candidate to score,
+    each persona first scores all of them in a single request. Entries missing from its JSON array
+    fall back to per-candidate calls, so a full answer costs 2 calls instead of 2*N.
+
+    Per-candidate evaluations are submitted at once to a pool of `max_concurrency` threads (A calls
+    first, so vetoes land early). A candidate is dropped, and its other call cancelled if it has
+    not started (its result is ignored if it has), as soon as:
+    - A vetoes it, or B does not ACCEPT it;
+    - the best expected value it could still reach is below the best fully evaluated candidate.
+    Ties go to the earlier candidate, as in a sequential scan. Calls already running for dropped
+    candidates are waited for (their results ignored), so none is still in flight on return.
+    Engines that are not `reentrant` take one call at a time (llm.engine.serialized), so only
+    reentrant adapters see more than one call at once. `stats`, if given, receives counts of completed calls, skipped
+    (cancelled before starting) calls, batch entries that needed a fallback, and vetoed / rejected /
+    pruned candidates.
+
+    With a `cache`, evaluations already known for the same engine, persona, prompts, action and
+    context are reused instead of asked for again (counted as `cached`), and new ones with an
+    ACCEPT or REJECT label are stored.
     """
-    best: Optional[ActionDecision] = None
-    for act in candidates:
-        eb = _eval(engine_b, persona_sys, eval_sys, eval_user, act, context, gen)
-        ea = _eval(engine_a, neutral_sys, eval_sys, eval_user, act, context, gen)
-
-        if ea.get("risk") is not None and float(ea["risk"]) >= float(veto_risk):
-            accept = False
-        else:
-            accept = eb.get("label", "") == "ACCEPT"
-
-        dec = ActionDecision(
-            action=act,
-            accept=accept,
-            reason_b=eb.get("reason",""),
-            reason_a=ea.get("reason",""),
-            utility_b=float(eb.get("utility",0.0)),
-            risk_b=float(eb.get("risk",0.0)),
-            utility_a=float(ea.get("utility",0.0)),
-            risk_a=float(ea.get("risk",0.0)),
-        )
-
-        if not accept:
-            continue
-
-        def expected(d: ActionDecision) -> float:
-            b = d.utility_b * (1.0 - d.risk_b)
-            a = d.utility_a * (1.0 - d.risk_a)
-            return 0.7*b + 0.3*a
-
-        if best is None or expected(dec) > expected(best):
-            best = dec
-
-    return best
+    n = len(candidates)
+    counts = {"calls": 0, "cached": 0, "skipped": 0, "fallbacks": 0, "vetoed": 0, "rejected": 0, "pruned": 0}
+    evals: Dict[str, Dict[int, dict]] = {"a": {}, "b": {}}
+    decisions: Dict[int, ActionDecision] = {}
+    dropped: Set[int] = set()
+    best = float("-inf")
+    engines = {"a": (serialized(engine_a), neutral_sys), "b": (serialized(engine_b), persona_sys)}
+
+    pool = ThreadPoolExecutor(max_workers=max(1, max_concurrency), thread_name_prefix="decide")
+    try:
+        futures: Dict[Tuple[str, int], Future] = {}
+        pending: Set[Future] = set()
+
+        def drop(i: int, reason: str) -> None:
+            dropped.add(i)
+            counts[reason] += 1
+            for side in ("a", "b"):
+                f = futures.get((side, i))
+                if f in pending:
+                    pending.discard(f)
+                    if f.cancel():
+                        counts["skipped"] += 1
+
+        def bound(i: int) -> float:
+            a, b = evals["a"].get(i), evals["b"].get(i)
+            return 0.7*(_term(b) if b else _MAX_TERM) + 0.3*(_term(a) if a else _MAX_TERM)
+
+        def consider(side: str, i: int, ev: dict) -> None:
+            nonlocal best
+            evals[side][i] = ev
+            if side == "a" and ev.get("risk") is not None and float(ev["risk"]) >= float(veto_risk):
+                drop(i, "vetoed")
+            elif side == "b" and ev.get("label", "") != "ACCEPT":
+                drop(i, "rejected")
+            elif i in evals["a"] and i in evals["b"]:
+                ea, eb = evals["a"][i], evals["b"][i]
+                dec = ActionDecision(
+                    action=candidates[i],
+                    accept=True,
+                    reason_b=eb.get("reason",""),
+                    reason_a=ea.get("reason",""),
+                    utility_b=float(eb.get("utility",0.0)),
+                    risk_b=float(eb.get("risk",0.0)),
+                    utility_a=float(ea.get("utility",0.0)),
+                    risk_a=float(ea.get("risk",0.0)),
+                )
+                decisions[i] = dec
+                best = max(best, _expected(dec))
+
+        def prune() -> None:
+            # stop evaluating candidates that can no longer win
+            for j in range(n):
+                if j not in dropped and j not in decisions and bound(j) < best:
+                    drop(j, "pruned")
+
+        batched = batch_sys is not None and batch_user is not None
+        keys: Dict[Tuple[str, int], tuple] = {}
+        if cache is not None:
+            # batch and single prompts together are the prompt version: both can fill an entry
+            prompt_sys = eval_sys + "\n" + (batch_sys or "") if batched else eval_sys
+            prompt_user = eval_user + "\n" + (batch_user or "") if batched else eval_user
+            for side, (engine, system_text) in engines.items():
+                for i, act in enumerate(candidates):
+                    keys[(side, i)] = key = cache.key(engine, system_text, prompt_sys, prompt_user, act, context, gen)
+                    if i in dropped:
+                        continue
+                    ev = cache.get(key)
+                    if ev is not None:
+                        counts["cached"] += 1
+                        consider(side, i, ev)
+            prune()
+
+        def store(side: str, i: int, ev: dict) -> None:
+            # an unparseable answer is not a verdict: the next decision should ask again
+            if cache is not None and ev.get("label") in ("ACCEPT", "REJECT"):
+                cache.put(keys[(side, i)], ev)
+
+        if batched:
+            batches = {}
+            for side, (engine, system_text) in engines.items():
+                todo = [i for i in range(n) if i not in dropped and i not in evals[side]]
+                if len(todo) > 1:
+                    acts = [candidates[i] for i in todo]
+                    f = pool.submit(_eval_batch, engine, system_text, batch_sys, batch_user, acts, context, gen)
+                    batches[side] = (todo, f)
+            for side, (todo, f) in batches.items():
+                counts["calls"] += 1
+                for i, ev in zip(todo, f.result()):
+                    if ev is None:
+                        counts["fallbacks"] += 1
+                        continue
+                    store(side, i, ev)
+                    if i not in dropped:
+                        consider(side, i, ev)
+            prune()
+
+        owner: Dict[Future, Tuple[str, int]] = {}
+        for side, (engine, system_text) in engines.items():
+            for i, act in enumerate(candidates):
+                if i in dropped or i in evals[side]:
+                    continue
+                f = pool.submit(_eval, engine, system_text, eval_sys, eval_user, act, context, gen)
+                owner[f], futures[(side, i)] = (side, i), f
+                pending.add(f)
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for f in done:
+                side, i = owner[f]
+                ev = f.result()
+                counts["calls"] += 1
+                store(side, i, ev)
+                if i not in dropped:
+                    consider(side, i, ev)
+            prune()
+    finally:
+        # queued calls whose answer no longer matters are cancelled; running ones must finish
+        # before the engines are handed back to the caller
+        pool.shutdown(wait=True, cancel_futures=True)
 
+    if stats is not None:
+        stats.update(counts)
+    if not decisions:
+        return None
+    return max(sorted(decisions.items()), key=lambda kv: _expected(kv[1]))[1]
@@ -7,6 +7,7 @@ from agi_mindloop.llm.engine import GenOptions
 from agi_mindloop.llm import EngineBundle
 from agi_mindloop.prompts import PromptLoader
 from agi_mindloop.action.debate import decide_actions, ActionDecision
+from agi_mindloop.action.eval_cache import EvalCache
 
 def decide(*args, **kwargs):
     return choose_action(*args, **kwargs)
@@ -20,8 +21,12 @@ def choose_action(
     gen: GenOptions,
     prompts: PromptLoader,
     veto_risk: float,
+    max_concurrency: int = 4,
+    batch_eval: bool = False,
+    cache: Optional[EvalCache] = None,
 ) -> Optional[ActionDecision]:
     P = prompts.load("evaluate")  # prompts/evaluate.md
+    B = prompts.load("evaluate_batch") if batch_eval else None  # prompts/evaluate_batch.md
     return decide_actions(
         candidates=candidates,
         context=context,
@@ -33,6 +38,10 @@ def choose_action(
         engine_b=engines.mooded_b,
         gen=gen,
         veto_risk=veto_risk,
+        max_concurrency=max_concurrency,
+        batch_sys=B.system if B else None,
+        batch_user=B.user if B else None,
+        cache=cache,
     )
 
 
@@ -0,0 +1,96 @@
+# LRU + TTL cache of action evaluations, so repeated candidates are not re-scored every cycle.
+
+from __future__ import annotations
+import hashlib, threading, time
+from collections import OrderedDict
+from dataclasses import astuple
+from typing import Dict, Optional, Tuple
+from agi_mindloop.llm.engine import Engine, GenOptions, SerializedEngine
+
+Key = Tuple[str, str, str, str, str]
+
+def _digest(*parts: str) -> str:
+    h = hashlib.sha1()
+    for p in parts:
+        h.update(p.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()[:16]
+
+def engine_identity(engine: Engine) -> str:
+    # model name when the adapter has one; otherwise the instance itself
+    if isinstance(engine, SerializedEngine):
+        engine = engine.engine
+    ident = getattr(engine, "model", None) or getattr(engine, "name", None) or f"@{id(engine):x}"
+    return f"{type(engine).__name__}:{ident}"
+
+def normalize_action(action: str) -> str:
+    return " ".join(action.split())
+
+class EvalCache:
+    """
+    Parsed `_eval` results keyed by (engine, persona, prompt version, normalized action, context hash).
+
+    The persona and prompt parts are hashes of the texts actually sent, so editing a persona or
+    prompt file changes the key and old entries are never served again; they age out through TTL
+    and LRU eviction. Generation options are part of the prompt version. `invalidate()` drops
+    everything, e.g. when switching personas.
+    """
+
+    def __init__(self, capacity: int = 1024, ttl_s: float = 3600.0):
+        self.capacity = capacity
+        self.ttl_s = ttl_s
+        self._items: "OrderedDict[Key, Tuple[float, dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "expired": 0, "evicted": 0}
+
+    def key(
+        self, engine: Engine, system_text: str, prompt_sys: str, prompt_user: str,
+        action: str, context: str, gen: GenOptions,
+    ) -> Key:
+        return (
+            engine_identity(engine),
+            _digest(system_text),
+            _digest(prompt_sys, prompt_user, repr(astuple(gen))),
+            normalize_action(action),
+            _digest(context),
+        )
+
+    def get(self, key: Key) -> Optional[dict]:
+        now = time.monotonic()
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None and now - item[0] > self.ttl_s:
+                del self._items[key]
+                self._stats["expired"] += 1
+                item = None
+            if item is None:
+                self._stats["misses"] += 1
+                return None
+            self._items.move_to_end(key)
+            self._stats["hits"] += 1
+            return dict(item[1])
+
+    def put(self, key: Key, ev: dict) -> None:
+        if self.capacity <= 0:
+            return
+        with self._lock:
+            self._items[key] = (time.monotonic(), dict(ev))
+            self._items.move_to_end(key)
+            while len(self._items) > self.capacity:
+                self._items.popitem(last=False)
+                self._stats["evicted"] += 1
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            st = dict(self._stats)
+            st["size"] = len(self._items)
+        lookups = st["hits"] + st["misses"]
+        st["hit_rate"] = st["hits"] / lookups if lookups else 0.0
+        return st
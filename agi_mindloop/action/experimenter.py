@@ -1,16 +1,30 @@
 # experimenter.py
 # Minimal sandbox. Allowlist binaries only. CPU/mem caps. Dry-run if disallowed.
+# Runs are asyncio subprocesses: output is streamed line by line and only a bounded tail is kept.
 
 from __future__ import annotations
-import os, shlex, shutil, subprocess, sys
-from dataclasses import dataclass
-from typing import List, Dict, Any, Optional
+import asyncio, os, shlex, shutil, signal, stat, subprocess, sys, threading, time, weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Callable, List, Dict, Any, Optional, Sequence
+
+from agi_mindloop.action.python_pool import PythonWorkerPool
 
 try:
     import resource  # Linux
 except Exception:
     resource = None
 
+LineSink = Callable[[str, str], None]  # (stream name, line without newline)
+_CHUNK = 65536
+_DIR_ENTRIES = 1024  # larger directories are fingerprinted by their own stat only
+_PSEUDO_FS = ("/proc", "/sys", "/dev")  # contents change without touching mtime or size
+_RECURSIVE_TOOLS = ("find", "du", "tree")  # read whole trees; a fingerprint only covers the top level
+_OOM_MARKERS = ("MemoryError", "Cannot allocate memory", "std::bad_alloc", "out of memory")
+_CPU_TICK_SLACK_S = 0.05
+
 def parse_action(text: str) -> Dict[str, Any]:
     """
     Conventions:
@@ -32,6 +46,18 @@ class Sandbox:
     mem_mb: int = 512
     cwd: Optional[str] = None
     env: Optional[Dict[str, str]] = None
+    python_pool: Optional[PythonWorkerPool] = None  # runs allowlisted `python3 script.py` in warm workers
+    output_cap: int = 8000  # bytes of stdout/stderr kept per run (the tail)
+    max_concurrent: int = 4  # runs in flight at once per event loop
+    on_line: Optional[LineSink] = None  # default receiver of streamed output lines
+    on_usage: Optional[Callable[[List[str], Dict[str, Any]], None]] = None  # called with each run's usage
+    pure_tools: Sequence[str] = ()  # read-only binaries whose successful results may be reused
+    result_cache_size: int = 256
+    _sems: "weakref.WeakKeyDictionary" = field(default_factory=weakref.WeakKeyDictionary, init=False, repr=False)
+    _usage: Dict[str, Dict[str, Any]] = field(default_factory=dict, init=False, repr=False)
+    _usage_lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+    _results: "OrderedDict[tuple, Dict[str, Any]]" = field(default_factory=OrderedDict, init=False, repr=False)
+    _cache_stats: Dict[str, int] = field(default_factory=lambda: {"hits": 0, "misses": 0}, init=False, repr=False)
 
     def _set_limits(self):
         if resource is None:
@@ -51,7 +77,50 @@ class Sandbox:
         head = os.path.basename(argv[0])
         return head in set(self.allowlist)
 
-    def run(self, action_text: str, timeout_sec: int = 10) -> Dict[str, Any]:
+    def _poolable(self, argv: List[str]) -> bool:
+        # plain `python3 script.py [args]` only; interpreter flags need a real interpreter
+        head = os.path.basename(argv[0])
+        return (
+            self.python_pool is not None
+            and (head.startswith("python") or head == os.path.basename(sys.executable))
+            and len(argv) >= 2
+            and argv[1].endswith(".py")
+        )
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        # one per event loop: a semaphore cannot be shared across loops
+        loop = asyncio.get_running_loop()
+        sem = self._sems.get(loop)
+        if sem is None:
+            sem = self._sems[loop] = asyncio.Semaphore(max(1, self.max_concurrent))
+        return sem
+
+    def run(self, action_text: str, timeout_sec: int = 10, on_line: Optional[LineSink] = None) -> Dict[str, Any]:
+        """Blocking wrapper around run_async (usable from inside a running event loop too)."""
+        coro = self.run_async(action_text, timeout_sec=timeout_sec, on_line=on_line)
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(coro)
+        with ThreadPoolExecutor(max_workers=1) as ex:
+            return ex.submit(asyncio.run, coro).result()
+
+    async def run_many(
+        self, actions: Sequence[str], timeout_sec: int = 10, on_line: Optional[LineSink] = None
+    ) -> List[Dict[str, Any]]:
+        """Run several actions concurrently, at most `max_concurrent` at a time; results in input order."""
+        return list(await asyncio.gather(*(self.run_async(a, timeout_sec, on_line) for a in actions)))
+
+    async def run_async(
+        self, action_text: str, timeout_sec: int = 10, on_line: Optional[LineSink] = None
+    ) -> Dict[str, Any]:
+        """
+        Run one action without blocking the event loop. stdout/stderr are read as they arrive into
+        ring buffers of `output_cap` bytes (only the tail is kept), and each complete line goes to
+        `on_line(stream, line)` (default: the sandbox's `on_line`). The child leads its own process
+        group, so a timeout kills everything it started. Pooled Python runs stream the same way, from
+        the files their worker writes (see PythonWorkerPool.run).
+        """
         spec = parse_action(action_text)
         if spec["type"] != "sh":
             return {"ok": True, "type": spec["type"], "detail": spec}
@@ -60,29 +129,296 @@ class Sandbox:
         if not self._allowed(argv) or not shutil.which(argv[0]):
             return {"ok": False, "type": "dry_run", "reason": "disallowed or missing binary", "argv": argv}
 
+        key = self._cache_key(argv) if os.path.basename(argv[0]) in self.pure_tools else None
+        if key is not None:
+            hit = self._cached(key)
+            if hit is not None:
+                return hit
+
+        sink = on_line or self.on_line
+        async with self._semaphore():
+            if self._poolable(argv):
+                loop = asyncio.get_running_loop()
+                # the pool reads output on an executor thread; lines are handed to the sink on the loop
+                relay = partial(loop.call_soon_threadsafe, sink) if sink is not None else None
+                res = await loop.run_in_executor(None, partial(
+                    self.python_pool.run, argv[1], argv[2:], cwd=self.cwd or os.getcwd(), env=self.env,
+                    cpu_seconds=self.cpu_seconds, timeout_sec=timeout_sec, on_line=relay,
+                ))
+                res["argv"] = argv
+                u = res.pop("rusage")
+                res["usage"] = self._usage_of(u["user_s"], u["sys_s"], u["max_rss_kb"], res["elapsed_ms"] / 1000.0,
+                                              u["stdout_bytes"], u["stderr_bytes"], res.get("code"), res.get("stderr", ""))
+            else:
+                try:
+                    res = await self._exec(argv, timeout_sec, sink)
+                except Exception as e:
+                    return {"ok": False, "error": repr(e), "argv": argv}
+        res["usage"]["timeout"] = res.get("error") == "timeout"
+        self._record_usage(argv, res["usage"])
+        if key is not None and res["ok"] and "truncated" not in res:
+            self._store(key, res)
+        return res
+
+    def _cache_key(self, argv: List[str]) -> Optional[tuple]:
+        """
+        argv, cwd and the state of every path the arguments name (the cwd stands in when none do).
+        None when a result must not be reused: recursive commands, and named inputs that are not
+        regular files or directories or that live on /proc, /sys or /dev.
+        """
+        if _recursive(argv):
+            return None
+        cwd = self.cwd or os.getcwd()
+        paths = [a for a in argv[1:] if not a.startswith("-")]
+        if not all(_stable_input(os.path.join(cwd, a)) for a in paths or [cwd]):
+            return None
+        files = tuple((a, _fingerprint(os.path.join(cwd, a))) for a in paths)
+        env = tuple(sorted(self.env.items())) if self.env else None
+        return (tuple(argv), cwd, _fingerprint(cwd) if not paths else None, files, env)
+
+    def _cached(self, key: tuple) -> Optional[Dict[str, Any]]:
+        with self._usage_lock:
+            res = self._results.get(key)
+            if res is None:
+                self._cache_stats["misses"] += 1
+                return None
+            self._results.move_to_end(key)
+            self._cache_stats["hits"] += 1
+        return dict(res, cached=True)
+
+    def _store(self, key: tuple, res: Dict[str, Any]) -> None:
+        with self._usage_lock:
+            self._results[key] = res
+            while len(self._results) > self.result_cache_size:
+                self._results.popitem(last=False)
+
+    def cache_stats(self) -> Dict[str, Any]:
+        with self._usage_lock:
+            st = dict(self._cache_stats, size=len(self._results))
+        lookups = st["hits"] + st["misses"]
+        st["hit_rate"] = st["hits"] / lookups if lookups else 0.0
+        return st
+
+    async def _exec(self, argv: List[str], timeout_sec: float, sink: Optional[LineSink]) -> Dict[str, Any]:
+        # Popen rather than asyncio's subprocess: the child is reaped with wait4 to get its rusage,
+        # which asyncio's child watcher would otherwise race for
+        loop = asyncio.get_running_loop()
+        floor_kb = _rss_kb()
+        t0 = time.perf_counter()
+        proc = subprocess.Popen(
+            argv,  # no shell=True
+            cwd=self.cwd or os.getcwd(),
+            env=self.env or os.environ.copy(),
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            preexec_fn=self._set_limits if resource is not None else None,
+            start_new_session=True,
+        )
+        out, err = RingBuffer(self.output_cap), RingBuffer(self.output_cap)
+        transports = []
+        pumps = []
+        for pipe, ring, name in ((proc.stdout, out, "stdout"), (proc.stderr, err, "stderr")):
+            reader = asyncio.StreamReader(limit=_CHUNK)
+            transport, _ = await loop.connect_read_pipe(lambda r=reader: asyncio.StreamReaderProtocol(r), pipe)
+            transports.append(transport)
+            pumps.append(asyncio.ensure_future(_pump(reader, ring, name, sink)))
+        waiter = loop.run_in_executor(None, os.wait4, proc.pid, 0)
+        try:
+            done, _ = await asyncio.wait([waiter, *pumps], timeout=timeout_sec)
+            timed_out = len(done) < 1 + len(pumps)
+            if timed_out:
+                try:
+                    os.killpg(proc.pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+                # pipes may stay open in a grandchild that escaped the group; don't wait on them
+                await asyncio.wait(pumps, timeout=1.0)
+            _, status, ru = await waiter
+        finally:
+            for p in pumps:
+                p.cancel()
+            for t in transports:
+                t.close()
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        wall_s = time.perf_counter() - t0
+
+        res = {
+            "ok": not timed_out and proc.returncode == 0,
+            "code": proc.returncode,
+            "stdout": out.text(),
+            "stderr": err.text(),
+            "argv": argv,
+        }
+        if out.dropped or err.dropped:
+            res["truncated"] = {"stdout": out.dropped, "stderr": err.dropped}
+        if timed_out:
+            res["error"] = "timeout"
+        # ru_maxrss is in kilobytes on Linux
+        res["usage"] = self._usage_of(ru.ru_utime, ru.ru_stime, int(ru.ru_maxrss), wall_s, out.total, err.total,
+                                      proc.returncode, res["stderr"], floor_kb)
+        return res
+
+    def _usage_of(
+        self, user_s: float, sys_s: float, max_rss_kb: int, wall_s: float,
+        out_bytes: int, err_bytes: int, code: Optional[int], stderr: str, floor_kb: int = 0,
+    ) -> Dict[str, Any]:
+        """
+        `floor_kb`: a forked child's peak RSS starts at the parent's resident size (Linux carries it
+        across exec), so a peak at or below it says nothing about the command itself.
+        """
+        cpu_s = user_s + sys_s
+        return {
+            "wall_s": round(wall_s, 4),
+            "user_s": round(user_s, 4),
+            "sys_s": round(sys_s, 4),
+            "max_rss_kb": max_rss_kb,
+            "rss_floor_kb": floor_kb,
+            "stdout_bytes": out_bytes,
+            "stderr_bytes": err_bytes,
+            # SIGXCPU is the soft-limit signal; SIGKILL at the hard limit only counts if the CPU was used
+            # (rusage is tick-granular and can come in a tick or two under the limit)
+            "cpu_limit_hit": code == -signal.SIGXCPU
+                             or (code == -signal.SIGKILL and cpu_s >= self.cpu_seconds - _CPU_TICK_SLACK_S),
+            # RLIMIT_AS has no signal of its own: failed allocations surface as errors in the child
+            "mem_limit_hit": (max_rss_kb > floor_kb and max_rss_kb >= 0.9 * self.mem_mb * 1024)
+                             or any(m in stderr for m in _OOM_MARKERS),
+        }
+
+    def _record_usage(self, argv: List[str], usage: Dict[str, Any]) -> None:
+        key = _command_key(argv)
+        with self._usage_lock:
+            agg = self._usage.setdefault(key, {
+                "runs": 0, "wall_s": 0.0, "user_s": 0.0, "sys_s": 0.0, "max_rss_kb": 0,
+                "output_bytes": 0, "cpu_limit_hits": 0, "mem_limit_hits": 0, "timeouts": 0,
+            })
+            agg["runs"] += 1
+            agg["wall_s"] += usage["wall_s"]
+            agg["user_s"] += usage["user_s"]
+            agg["sys_s"] += usage["sys_s"]
+            agg["max_rss_kb"] = max(agg["max_rss_kb"], usage["max_rss_kb"])
+            agg["output_bytes"] += usage["stdout_bytes"] + usage["stderr_bytes"]
+            agg["cpu_limit_hits"] += int(usage["cpu_limit_hit"])
+            agg["mem_limit_hits"] += int(usage["mem_limit_hit"])
+            agg["timeouts"] += int(usage.get("timeout", False))
+        if self.on_usage is not None:
+            self.on_usage(argv, usage)
+
+    def usage_report(self) -> Dict[str, Dict[str, Any]]:
+        """Per command (binary, or `python3 script.py`): run count, totals, peak RSS and limit hits, costliest first."""
+        with self._usage_lock:
+            rows = {k: dict(v) for k, v in self._usage.items()}
+        for row in rows.values():
+            row["mean_wall_s"] = row["wall_s"] / row["runs"]
+            row["mean_cpu_s"] = (row["user_s"] + row["sys_s"]) / row["runs"]
+        return dict(sorted(rows.items(), key=lambda kv: -(kv[1]["user_s"] + kv[1]["sys_s"])))
+
+
+def _recursive(argv: List[str]) -> bool:
+    if os.path.basename(argv[0]) in _RECURSIVE_TOOLS:
+        return True
+    for a in argv[1:]:
+        if a == "--":
+            break
+        if a.startswith("--"):
+            if "recursive" in a:
+                return True
+        elif a.startswith("-") and ("r" in a[1:] or "R" in a[1:]):
+            # -r is recursive for grep/cp/rm but reverse for ls/sort; either way it is not cached
+            return True
+    return False
+
+
+def _stable_input(path: str) -> bool:
+    # a fingerprint tracks content only for regular files and directories on a real file system
+    real = os.path.realpath(path)
+    if any(real == fs or real.startswith(fs + os.sep) for fs in _PSEUDO_FS):
+        return False
+    try:
+        st = os.stat(path)
+    except OSError:
+        return True  # missing: fingerprinted as None, so creating it changes the key
+    return stat.S_ISREG(st.st_mode) or stat.S_ISDIR(st.st_mode)
+
+
+def _fingerprint(path: str) -> Optional[tuple]:
+    # None for a missing path, so creating it changes the key too
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    fp = (st.st_mtime_ns, st.st_ctime_ns, st.st_size, st.st_ino)
+    if stat.S_ISDIR(st.st_mode):
+        # a listing also shows entry sizes and times, which the directory's own mtime does not track
         try:
-            # no shell=True
-            proc = subprocess.Popen(
-                argv,
-                cwd=self.cwd or os.getcwd(),
-                env=self.env or os.environ.copy(),
-                stdin=subprocess.DEVNULL,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                preexec_fn=self._set_limits if resource is not None else None,
-            )
-            out, err = proc.communicate(timeout=timeout_sec)
-            return {
-                "ok": proc.returncode == 0,
-                "code": proc.returncode,
-                "stdout": out[-8000:],  # cap
-                "stderr": err[-8000:],
-                "argv": argv,
-            }
-        except subprocess.TimeoutExpired:
-            proc.kill()
-            return {"ok": False, "error": "timeout", "argv": argv}
-        except Exception as e:
-            return {"ok": False, "error": repr(e), "argv": argv}
+            with os.scandir(path) as it:
+                entries = [e for _, e in zip(range(_DIR_ENTRIES + 1), it)]
+        except OSError:
+            return fp
+        if len(entries) <= _DIR_ENTRIES:
+            stats = [(e.name, e.stat(follow_symlinks=False)) for e in entries]
+            fp += tuple(sorted((name, es.st_mtime_ns, es.st_size) for name, es in stats))
+    return fp
+
+
+def _rss_kb() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * (os.sysconf("SC_PAGE_SIZE") // 1024)
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def _command_key(argv: List[str]) -> str:
+    head = os.path.basename(argv[0])
+    if head.startswith("python") and len(argv) >= 2 and argv[1].endswith(".py"):
+        return f"{head} {argv[1]}"
+    return head
+
+
+class RingBuffer:
+    """The last `capacity` bytes written, plus how many earlier bytes were dropped."""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._buf = bytearray()
+        self.total = 0
+
+    @property
+    def dropped(self) -> int:
+        return self.total - len(self._buf)
+
+    def write(self, data: bytes) -> None:
+        self.total += len(data)
+        self._buf += data[-self.capacity:]
+        if len(self._buf) > self.capacity:
+            del self._buf[: len(self._buf) - self.capacity]
+
+    def text(self) -> str:
+        data = bytes(self._buf)
+        if self.dropped:
+            # the cut may land inside a UTF-8 sequence
+            data = data.lstrip(bytes(range(0x80, 0xC0)))
+        return data.decode("utf-8", errors="replace")
+
 
+async def _pump(stream: asyncio.StreamReader, ring: RingBuffer, name: str, sink: Optional[LineSink]) -> None:
+    pending = bytearray()
+    while True:
+        chunk = await stream.read(_CHUNK)
+        if not chunk:
+            break
+        ring.write(chunk)
+        if sink is None:
+            continue
+        pending += chunk
+        *lines, rest = pending.split(b"\n")
+        for line in lines:
+            sink(name, line.decode("utf-8", errors="replace"))
+        if len(rest) > ring.capacity:
+            # a line longer than the buffer is passed on in pieces
+            sink(name, rest.decode("utf-8", errors="replace"))
+            rest = bytearray()
+        pending = rest
+    if sink is not None and pending:
+        sink(name, pending.decode("utf-8", errors="replace"))
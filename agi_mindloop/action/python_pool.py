@@ -0,0 +1,347 @@
+# Pre-forked Python workers for sandboxed experiments: no interpreter start-up or re-imports per run.
+
+from __future__ import annotations
+import math, multiprocessing, os, queue, runpy, signal, subprocess, sys, tempfile, threading, time, traceback
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+try:
+    import resource  # Linux
+except Exception:
+    resource = None
+
+DEFAULT_PRELOAD = ("json", "math", "random", "re", "statistics", "collections", "itertools", "numpy")
+_CAP = 8000  # chars of stdout/stderr kept, as in Sandbox.run
+_POLL_S = 0.05  # how often a streaming run's output files are read
+
+LineSink = Callable[[str, str], None]  # (stream name, line without newline)
+
+def _tail(f) -> str:
+    # only the end is kept, so only the end is read (a UTF-8 char is at most 4 bytes)
+    size = os.fstat(f.fileno()).st_size
+    f.seek(max(0, size - 4 * _CAP))
+    return f.read().decode("utf-8", errors="replace")[-_CAP:]
+
+class _Output:
+    """A run's stdout or stderr file: the worker writes it, the parent reads it as it grows."""
+
+    def __init__(self, name: str):
+        fd, self.path = tempfile.mkstemp(prefix=f"pool-{name}-")
+        self.name = name
+        self.f = os.fdopen(fd, "rb")
+        self.pending = bytearray()
+
+    def pump(self, sink: LineSink) -> None:
+        chunk = self.f.read()
+        if not chunk:
+            return
+        self.pending += chunk
+        *lines, rest = self.pending.split(b"\n")
+        for line in lines:
+            sink(self.name, line.decode("utf-8", errors="replace"))
+        if len(rest) > _CAP:
+            # a line longer than the kept tail is passed on in pieces, as in Sandbox
+            sink(self.name, rest.decode("utf-8", errors="replace"))
+            rest = bytearray()
+        self.pending = rest
+
+    def finish(self, sink: LineSink) -> None:
+        self.pump(sink)
+        if self.pending:
+            sink(self.name, self.pending.decode("utf-8", errors="replace"))
+            self.pending = bytearray()
+
+    def close(self) -> None:
+        self.f.close()
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+
+def _limit_cpu(cpu_seconds: int) -> None:
+    # RLIMIT_CPU counts the worker's whole life, so the cap is set relative to what it already used
+    if resource is None:
+        return
+    ru = resource.getrusage(resource.RUSAGE_SELF)
+    soft = int(math.ceil(ru.ru_utime + ru.ru_stime)) + int(cpu_seconds)
+    hard = resource.getrlimit(resource.RLIMIT_CPU)[1]
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+def _run_job(job: Dict[str, Any], baseline: set) -> Dict[str, Any]:
+    script, cwd, env = job["script"], job["cwd"], job["env"]
+    out_f, err_f = open(job["stdout"], "wb"), open(job["stderr"], "wb")
+    sys.stdout.flush(); sys.stderr.flush()
+    saved_fds = os.dup(1), os.dup(2)
+    saved = os.getcwd(), dict(os.environ), sys.argv, list(sys.path)
+    os.dup2(out_f.fileno(), 1); os.dup2(err_f.fileno(), 2)
+    code = 0
+    ru0 = resource.getrusage(resource.RUSAGE_SELF) if resource is not None else None
+    t0 = time.perf_counter()
+    try:
+        _limit_cpu(job["cpu_seconds"])
+        os.chdir(cwd)
+        if env is not None:
+            os.environ.clear(); os.environ.update(env)
+        sys.argv = [script, *job["args"]]
+        sys.path.insert(0, os.path.dirname(os.path.abspath(script)))
+        runpy.run_path(script, run_name="__main__")
+    except SystemExit as e:
+        if isinstance(e.code, int) or e.code is None:
+            code = e.code or 0
+        else:
+            print(e.code, file=sys.stderr)
+            code = 1
+    except BaseException:
+        traceback.print_exc()
+        code = 1
+    finally:
+        body_ms = (time.perf_counter() - t0) * 1000.0
+        sys.stdout.flush(); sys.stderr.flush()
+        os.dup2(saved_fds[0], 1); os.dup2(saved_fds[1], 2)
+        os.close(saved_fds[0]); os.close(saved_fds[1])
+        os.chdir(saved[0])
+        os.environ.clear(); os.environ.update(saved[1])
+        sys.argv, sys.path[:] = saved[2], saved[3]
+        # modules the experiment imported would leak into the next run
+        for name in set(sys.modules) - baseline:
+            del sys.modules[name]
+    rusage = {"user_s": 0.0, "sys_s": 0.0, "max_rss_kb": 0,
+              "stdout_bytes": os.fstat(out_f.fileno()).st_size, "stderr_bytes": os.fstat(err_f.fileno()).st_size}
+    out_f.close(); err_f.close()
+    if ru0 is not None:
+        ru = resource.getrusage(resource.RUSAGE_SELF)
+        # the worker's peak, which includes the zygote's preloaded modules
+        rusage.update(user_s=ru.ru_utime - ru0.ru_utime, sys_s=ru.ru_stime - ru0.ru_stime, max_rss_kb=int(ru.ru_maxrss))
+    return {"code": code, "body_ms": body_ms, "rusage": rusage}
+
+def _worker_main(conn, mem_mb: int) -> None:
+    # own session and process group, so retiring the worker also kills whatever its runs spawned
+    os.setsid()
+    if resource is not None and mem_mb:
+        bytes_lim = int(mem_mb) * 1024 * 1024
+        try:
+            resource.setrlimit(resource.RLIMIT_AS, (bytes_lim, bytes_lim))
+        except ValueError:
+            pass
+    baseline = set(sys.modules)
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            return
+        if job is None:
+            return
+        conn.send(_run_job(job, baseline))
+
+class _Worker:
+    def __init__(self, proc, conn):
+        self.proc = proc
+        self.conn = conn
+        self.runs = 0
+
+class PythonWorkerPool:
+    """
+    `workers` warm Python processes that run experiment scripts with runpy instead of a fresh
+    `python3 script.py`. Workers are forked from a forkserver zygote that has `preload` imported,
+    so neither interpreter start-up nor those imports are paid per run.
+
+    Limits match Sandbox: RLIMIT_AS of `mem_mb` per worker, and a per-run RLIMIT_CPU of
+    `cpu_seconds` (counted from the worker's CPU use so far). A run past `timeout_sec` kills its
+    worker. Each worker leads its own process group, and retiring it kills the whole group, so
+    processes an experiment started do not outlive it (as Sandbox does for its subprocesses). A worker is replaced after `max_runs` runs or after any failure (non-zero exit, uncaught
+    exception, rlimit kill, timeout), so state left behind by a broken experiment does not leak.
+
+    Each result carries `elapsed_ms` and `saved_ms`: interpreter start-up (`python -c pass`, timed
+    once when the pool starts) plus the script's own run time, minus the pooled wall time. Imports
+    the script gets from the zygote are not counted, so `saved_ms` is a lower bound. `stats()`
+    aggregates both per script.
+    """
+
+    def __init__(
+        self,
+        workers: int = 2,
+        max_runs: int = 20,
+        mem_mb: int = 512,
+        preload: Sequence[str] = DEFAULT_PRELOAD,
+        start_method: str = "forkserver",
+    ):
+        self.max_runs = max_runs
+        self.mem_mb = mem_mb
+        self.preload = list(preload)
+        self._ctx = multiprocessing.get_context(start_method)
+        if start_method == "forkserver":
+            # missing modules are skipped by the forkserver
+            self._ctx.set_forkserver_preload([__name__, *self.preload])
+        self._idle: "queue.Queue[Optional[_Worker]]" = queue.Queue()  # None: closed, wakes waiters
+        self._lock = threading.Lock()
+        self._closed = False
+        self._stats = {"runs": 0, "failures": 0, "timeouts": 0, "recycled": 0, "saved_ms": 0.0}
+        self._scripts: Dict[str, Dict[str, float]] = {}
+        for _ in range(workers):
+            self._idle.put(self._spawn())
+        self.cold_start_ms = self._measure_cold_start()
+
+    def _spawn(self) -> _Worker:
+        parent, child = self._ctx.Pipe()
+        proc = self._ctx.Process(target=_worker_main, args=(child, self.mem_mb), daemon=True,
+                                 name="sandbox-python")
+        proc.start()
+        child.close()
+        return _Worker(proc, parent)
+
+    def _retire(self, w: _Worker) -> None:
+        w.conn.close()
+        try:
+            os.killpg(w.proc.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass  # the group is gone, or the worker had not called setsid yet
+        if w.proc.is_alive():
+            w.proc.kill()
+        w.proc.join(timeout=5)
+
+    def _measure_cold_start(self, repeat: int = 3) -> float:
+        # best of a few: the first start-up also pays for a cold page cache
+        best = float("inf")
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            try:
+                subprocess.run([sys.executable, "-c", "pass"], stdin=subprocess.DEVNULL,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=30)
+            except Exception:
+                return 0.0
+            best = min(best, (time.perf_counter() - t0) * 1000.0)
+        return best
+
+    def run(
+        self,
+        script: str,
+        args: Sequence[str] = (),
+        cwd: Optional[str] = None,
+        env: Optional[Dict[str, str]] = None,
+        cpu_seconds: int = 5,
+        timeout_sec: float = 10,
+        on_line: Optional[LineSink] = None,
+    ) -> Dict[str, Any]:
+        """
+        Run `script` in a warm worker. Same result keys as Sandbox.run, plus `pooled`, `elapsed_ms`,
+        `saved_ms` and `rusage` (CPU used by the run, worker peak RSS, output bytes; zeros if the
+        worker died). The worker writes stdout/stderr to files that are read every `_POLL_S` while
+        the run lasts, so `on_line(stream, line)` gets lines as they are flushed, and a run that
+        times out or dies still returns the tail of what it wrote.
+        """
+        if self._closed:
+            raise RuntimeError("PythonWorkerPool is closed")
+        w = self._idle.get()
+        if w is None or self._closed:
+            # close() ran while we waited: its sentinel (passed on to the next waiter) or a late worker
+            if w is not None:
+                self._retire(w)
+            self._idle.put(None)
+            raise RuntimeError("PythonWorkerPool was closed while waiting for a worker")
+        outs = (_Output("stdout"), _Output("stderr"))
+        job = {"script": script, "args": list(args), "cwd": cwd or os.getcwd(), "env": env,
+               "cpu_seconds": cpu_seconds, "stdout": outs[0].path, "stderr": outs[1].path}
+        t0 = time.perf_counter()
+        failed = True
+        reply: Optional[Dict[str, Any]] = None
+        try:
+            step = _POLL_S if on_line is not None else timeout_sec
+            deadline = time.monotonic() + timeout_sec
+            timed_out = False
+            try:
+                w.conn.send(job)
+                while not w.conn.poll(max(0.0, min(step, deadline - time.monotonic()))):
+                    if on_line is not None:
+                        for o in outs:
+                            o.pump(on_line)
+                    if time.monotonic() >= deadline:
+                        timed_out = True
+                        break
+                if not timed_out:
+                    reply = w.conn.recv()
+            except (EOFError, OSError):
+                pass
+            if on_line is not None:
+                for o in outs:
+                    o.finish(on_line)
+            tails = {o.name: _tail(o.f) for o in outs}
+            if timed_out:
+                res: Dict[str, Any] = {"ok": False, "error": "timeout", **tails}
+            elif reply is None:
+                # killed by an rlimit (SIGXCPU, or SIGKILL/abort on memory) or crashed
+                w.proc.join(timeout=5)
+                code = w.proc.exitcode
+                error = "cpu limit" if code == -signal.SIGXCPU else "worker died"
+                res = {"ok": False, "code": code, "error": error, **tails}
+            else:
+                failed = reply["code"] != 0
+                res = {"ok": not failed, "code": reply["code"], **tails, "rusage": reply["rusage"]}
+        finally:
+            for o in outs:
+                o.close()
+            # replacing a worker happens after the measurement: it is not on the run's critical path
+            elapsed_ms = (time.perf_counter() - t0) * 1000.0
+            w.runs += 1
+            recycle = failed or w.runs >= self.max_runs or self._closed
+            if recycle:
+                self._retire(w)
+                if not self._closed:
+                    w = self._spawn()
+            if not self._closed:
+                self._idle.put(w)
+        saved_ms = max(0.0, self.cold_start_ms + reply["body_ms"] - elapsed_ms) if reply is not None else 0.0
+        self._record(script, elapsed_ms, saved_ms, failed, recycle, res.get("error") == "timeout")
+        res.setdefault("rusage", {"user_s": 0.0, "sys_s": 0.0, "max_rss_kb": 0, "stdout_bytes": 0, "stderr_bytes": 0})
+        res.update(pooled=True, elapsed_ms=round(elapsed_ms, 3), saved_ms=round(saved_ms, 3))
+        return res
+
+    def _record(self, script: str, elapsed_ms: float, saved_ms: float, failed: bool, recycled: bool,
+                timeout: bool) -> None:
+        with self._lock:
+            st = self._stats
+            st["runs"] += 1
+            st["failures"] += int(failed)
+            st["timeouts"] += int(timeout)
+            st["recycled"] += int(recycled)
+            st["saved_ms"] += saved_ms
+            per = self._scripts.setdefault(script, {"runs": 0, "total_ms": 0.0, "saved_ms": 0.0})
+            per["runs"] += 1
+            per["total_ms"] += elapsed_ms
+            per["saved_ms"] += saved_ms
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            st = dict(self._stats)
+            st["cold_start_ms"] = self.cold_start_ms
+            st["scripts"] = {
+                s: {"runs": p["runs"], "mean_ms": p["total_ms"] / p["runs"], "saved_ms": p["saved_ms"],
+                    "mean_saved_ms": p["saved_ms"] / p["runs"]}
+                for s, p in self._scripts.items()
+            }
+        return st
+
+    def close(self) -> None:
+        self._closed = True
+        workers: List[_Worker] = []
+        while True:
+            try:
+                w = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if w is not None:
+                workers.append(w)
+        self._idle.put(None)  # callers blocked in run() waiting for a worker
+        for w in workers:
+            try:
+                w.conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+            w.proc.join(timeout=1)
+            self._retire(w)
+
+    def __enter__(self) -> "PythonWorkerPool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -50,11 +50,59 @@ class MemoryCfg:
     sqlite_path: str = "./data/meta.sqlite3"
     recall_k: int = 8
     alpha: float = 0.7
+    index_storage: str = "flat"     # flat | fp16 | sq8 (VectorStore)
+    embedding_codec: str = "f32"    # f32 | f16 | i8 (MetaStore embedding BLOBs)
+    hot_capacity: int = 0           # >0 enables the exact hot tier in front of the HNSW index
+    hot_threshold: float = 0.6      # k-th hot-tier cosine needed to skip the cold index
+    shard_by: str = ""              # "" (single index) | month | kind; faiss_path is then a directory
+    novelty_threshold: float = 0.92 # nearest-memory cosine at which a candidate skips the judges as a duplicate (>1 disables)
+    minhash_threshold: float = 0.0  # estimated Jaccard vs recent candidates that counts as a duplicate (0 disables)
+
+@dataclass
+class MemoryLoopCfg:
+    enabled: bool = False
+    db_path: str = "data/memory.db"
+    index_path: str = "data/faiss.index"
+    log_path: str = "logs/memory.jsonl"
+    rounds: int = 3
+    engine: str = "legacy"  # legacy (own MiniLM db/index) | unified (memory.MemoryEngine on memory.* paths)
 
 @dataclass
 class SafetyCfg:
     allowlist_tools: list = None
     veto_risk: float = 0.6
+    pure_tools: list = None         # read-only sandbox binaries whose results are cached (keyed on argv, cwd, file stats)
+
+@dataclass
+class SandboxCfg:
+    cpu_seconds: int = 5
+    mem_mb: int = 512
+    python_workers: int = 0         # >0 runs `python3 script.py` actions in pre-forked warm workers
+    worker_max_runs: int = 20       # a worker is replaced after this many runs (and after any failure)
+    preload: list = None            # modules imported once in the worker zygote (None = python_pool default)
+    output_cap: int = 8000          # bytes of stdout/stderr kept per run (ring buffer tail)
+    max_concurrent: int = 4         # sandbox runs in flight at once
+    stream_output: bool = True      # send output lines to the interface as they arrive
+    result_cache_size: int = 256    # cached results of safety.pure_tools commands
+
+@dataclass
+class ActionCfg:
+    max_concurrency: int = 4        # evaluation calls in flight at once in decide_actions
+    batch_eval: bool = False        # score all candidates in one call per persona (evaluate_batch prompt)
+    cache_size: int = 1024          # cached evaluations across cycles (0 disables the cache)
+    cache_ttl_s: float = 3600.0     # seconds a cached evaluation stays valid
+
+@dataclass
+class JobsCfg:
+    enabled: bool = False           # run memory gating, curation and the memoryloop debate as background jobs
+    db_path: str = "data/jobs.sqlite3"
+    workers: int = 2                # job worker threads
+    max_attempts: int = 5           # a job is marked dead after this many failed attempts
+    backoff_s: float = 2.0          # first retry delay; doubles per attempt
+    max_backoff_s: float = 300.0
+    lease_s: float = 300.0          # a running job whose worker vanished is retried after this long
+    drain_s: float = 10.0           # on shutdown, wait this long for due jobs before leaving them queued
+    retention_s: float = 86400.0    # finished jobs, and their idempotency keys, are kept this long
 
 @dataclass
 class RuntimeCfg:
@@ -72,6 +120,10 @@ class Config:
     prompts: PromptsCfg
     memory: MemoryCfg
     safety: SafetyCfg
+    memoryloop: MemoryLoopCfg = field(default_factory=MemoryLoopCfg)
+    action: ActionCfg = field(default_factory=ActionCfg)
+    sandbox: SandboxCfg = field(default_factory=SandboxCfg)
+    jobs: JobsCfg = field(default_factory=JobsCfg)
 
 def load_config(path: str) -> Config:
     data = yaml.safe_load(Path(path).read_text())
@@ -83,5 +135,9 @@ def load_config(path: str) -> Config:
         prompts=PromptsCfg(**data.get("prompts", {})),
         memory=MemoryCfg(**data.get("memory", {})),
         safety=SafetyCfg(**data.get("safety", {})),
+        memoryloop=MemoryLoopCfg(**data.get("memoryloop", {})),
+        action=ActionCfg(**data.get("action", {})),
+        sandbox=SandboxCfg(**data.get("sandbox", {})),
+        jobs=JobsCfg(**data.get("jobs", {})),
     )
 
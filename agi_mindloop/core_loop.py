@@ -1,5 +1,7 @@
+import hashlib
+import threading
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Dict, List, Optional
 
 from agi_mindloop.config import load_config, GenDefaults
 from agi_mindloop.io_mod.interface import Interface
@@ -9,6 +11,7 @@ from agi_mindloop.llm.engine import (
     Gpt4AllAPIEngine,
     StubEngine,
     GenOptions,
+    serialized,
 )
 from agi_mindloop.llm import EngineBundle
 from agi_mindloop.personas.persona import PersonaRegistry
@@ -18,21 +21,47 @@ from agi_mindloop.cognition.self_critic import critique
 from agi_mindloop.cognition.explainer import explain
 from agi_mindloop.action.decider import choose_action
 from agi_mindloop.action.experimenter import Sandbox
+from agi_mindloop.action.python_pool import PythonWorkerPool
 from agi_mindloop.action.debate import ActionDecision
+from agi_mindloop.action.eval_cache import EvalCache
 from agi_mindloop.memory.debate_gate import should_store
 from agi_mindloop.training.curate_debate import curate_if_needed
+from agi_mindloop.jobs import JobQueue, JobWorkers
+from agi_mindloop.jobs.worker import Handler
 
 # Optional long-term memory / debate modules
 try:
     from agi_mindloop.memory_loop.memory import Memory  # type: ignore
     from agi_mindloop.memory_loop.memory_logger import MemoryLogger  # type: ignore
+    from agi_mindloop.memory_loop.engine_memory import EngineMemory  # type: ignore
+except Exception:
+    Memory = MemoryLogger = EngineMemory = None  # type: ignore
+try:
+    from agi_mindloop.memory.novelty import NoveltyGate  # type: ignore
+except Exception:
+    NoveltyGate = None  # type: ignore
+try:
     from agi_mindloop.memory_loop.debate_core import Agent, DebateEngine, Candidate  # type: ignore
 except Exception:
     try:
-        from agi_mindloop.memoryloop import Memory, MemoryLogger  # type: ignore
         from agi_mindloop.memoryloop.debate_core import Agent, DebateEngine, Candidate  # type: ignore
     except Exception:
-        Memory = MemoryLogger = Agent = DebateEngine = Candidate = None  # type: ignore
+        Agent = DebateEngine = Candidate = None  # type: ignore
+
+
+def _open_memory(cfg):
+    """memoryloop.engine=unified stores into the shared memory.* database and index instead of a second stack."""
+    if getattr(cfg.memoryloop, "engine", "legacy") == "unified":
+        return EngineMemory(
+            db_path=cfg.memory.sqlite_path,
+            index_path=cfg.memory.faiss_path,
+            storage=cfg.memory.index_storage,
+            embedding_codec=cfg.memory.embedding_codec,
+            hot_capacity=cfg.memory.hot_capacity,
+            hot_threshold=cfg.memory.hot_threshold,
+            shard_by=cfg.memory.shard_by or None,
+        )
+    return Memory(cfg.memoryloop.db_path, cfg.memoryloop.index_path)
 
 
 def cli():
@@ -70,6 +99,8 @@ def _execute_action_decision(action: ActionDecision, sandbox: Sandbox):
             print(f"[Experimenter] Running experiment task: {task}")
             cmd = f"sh: python3 experiments/{task.split('experiment',1)[1].strip()}.py"
             result = sandbox.run(cmd)
+            if result.get("pooled"):
+                log("sandbox.python_pool", task=task, elapsed_ms=result["elapsed_ms"], saved_ms=result["saved_ms"])
             return {
                 "detail": f"Experiment executed: {task}",
                 "result": result,
@@ -90,6 +121,60 @@ def _execute_action_decision(action: ActionDecision, sandbox: Sandbox):
     return {"detail": f"No execution path for: {text}"}
 
 
+class CurationPool:
+    """
+    Explanations the memory gate accepted, waiting for curation. Entries are keyed by the gate's
+    content key, so a retried or re-delivered job adds nothing twice. Shared by the loop and the
+    job workers, hence the lock.
+    """
+
+    def __init__(self):
+        self.items: List[str] = []
+        self._keys: set = set()
+        self._lock = threading.Lock()
+
+    def add(self, key: str, expl: str) -> bool:
+        with self._lock:
+            if key in self._keys:
+                return False
+            self._keys.add(key)
+            self.items.append(expl)
+            return True
+
+    def curate(self) -> None:
+        with self._lock:
+            curate_if_needed(self.items)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self.items)
+
+
+def _memory_job_handlers(
+    gate: Callable[[str], bool], pool: CurationPool, queue: JobQueue, notify: Callable[[], None]
+) -> Dict[str, Handler]:
+    """
+    `memory_gate` and `curate` handlers. Everything a job needs is in its payload: the gate passes
+    the explanation on in the curate job instead of appending it to the in-memory pool, so a curate
+    job recovered after a restart still has it, and a retried gate job changes nothing but the
+    (idempotent) curate enqueue.
+    """
+
+    def gate_job(payload):
+        stored = gate(payload["candidate"])
+        if stored:
+            queue.enqueue("curate", {"key": payload["key"], "expl": payload["expl"]}, key=f"curate:{payload['key']}")
+            notify()
+        return {"stored": stored}
+
+    def curate_job(payload):
+        if "expl" in payload:  # curate jobs queued by older versions carried no payload
+            pool.add(payload["key"], payload["expl"])
+        pool.curate()
+        return {"pooled": len(pool)}
+
+    return {"memory_gate": gate_job, "curate": curate_job}
+
 
 def main(config_path: str):
     cfg = load_config(config_path)
@@ -141,6 +226,8 @@ def main(config_path: str):
             print(f"[Engine] Using Ollama model: {model_name}")
 
             class OllamaEngine:
+                reentrant = True  # HTTP client; the server queues requests
+
                 def complete(self, req, gen):
                     resp = ollama.chat(
                         model=model_name,
@@ -162,10 +249,11 @@ def main(config_path: str):
     # ------------------------------------------------------------------
     # Engines (now dynamic)
     # ------------------------------------------------------------------
-    engine_a = _make_engine("neutral_a", cfg)
-    engine_b = _make_engine("mooded_b", cfg)
-    engine_summarizer = _make_engine("summarizer", cfg)
-    engine_coder = _make_engine("coder", cfg)
+    # non-reentrant adapters take one call at a time across the action pool, background jobs and this loop
+    engine_a = serialized(_make_engine("neutral_a", cfg))
+    engine_b = serialized(_make_engine("mooded_b", cfg))
+    engine_summarizer = serialized(_make_engine("summarizer", cfg))
+    engine_coder = serialized(_make_engine("coder", cfg))
 
     engines = EngineBundle(
         neutral_a=engine_a,
@@ -187,9 +275,35 @@ def main(config_path: str):
     P_judge = pl.load("judge")
 
     gen = GenOptions(**cfg.gen.__dict__)
-    pool = []
-
-    sandbox = Sandbox(allowlist=["ls", "echo", "cat", "python3", "pip", "mkdir", "touch"])
+    pool = CurationPool()
+
+    # Evaluations are keyed by persona/prompt text, so edited files never hit stale entries
+    action_cfg = getattr(cfg, "action", None)
+    cache_size = getattr(action_cfg, "cache_size", 1024)
+    eval_cache = EvalCache(cache_size, getattr(action_cfg, "cache_ttl_s", 3600.0)) if cache_size > 0 else None
+
+    sandbox_cfg = getattr(cfg, "sandbox", None)
+    python_pool = None
+    if getattr(sandbox_cfg, "python_workers", 0) > 0:
+        python_pool = PythonWorkerPool(
+            workers=sandbox_cfg.python_workers,
+            max_runs=sandbox_cfg.worker_max_runs,
+            mem_mb=sandbox_cfg.mem_mb,
+            **({"preload": sandbox_cfg.preload} if sandbox_cfg.preload else {}),
+        )
+    sandbox = Sandbox(
+        allowlist=["ls", "echo", "cat", "python3", "pip", "mkdir", "touch"],
+        cpu_seconds=getattr(sandbox_cfg, "cpu_seconds", 5),
+        mem_mb=getattr(sandbox_cfg, "mem_mb", 512),
+        python_pool=python_pool,
+        output_cap=getattr(sandbox_cfg, "output_cap", 8000),
+        max_concurrent=getattr(sandbox_cfg, "max_concurrent", 4),
+        pure_tools=tuple(getattr(cfg.safety, "pure_tools", None) or ()),
+        result_cache_size=getattr(sandbox_cfg, "result_cache_size", 256),
+    )
+    sandbox.on_usage = lambda argv, usage: log("sandbox.usage", argv=argv[:2], **usage)
+    if getattr(sandbox_cfg, "stream_output", True):  # same default as SandboxCfg
+        sandbox.on_line = lambda stream, line: iface.send_output(f"[sandbox {stream}] {line}")
 
     # --------- Optional Persistent Memory + Debate ----------
     memory = None
@@ -198,7 +312,7 @@ def main(config_path: str):
 
     if Memory and getattr(cfg, "memoryloop", None) and getattr(cfg.memoryloop, "enabled", False):
         try:
-            memory = Memory(cfg.memoryloop.db_path, cfg.memoryloop.index_path)
+            memory = _open_memory(cfg)
             logger = MemoryLogger(cfg.memoryloop.log_path)
             model_fn = None
             try:
@@ -221,10 +335,70 @@ def main(config_path: str):
         except Exception:
             memory = logger = debate_engine = None
 
+    # Duplicate candidates are rejected locally instead of costing two judge calls
+    novelty = None
+    memory_cfg = getattr(cfg, "memory", None)
+    if NoveltyGate is not None and memory_cfg is not None:
+        novelty = NoveltyGate(
+            similarity=getattr(memory, "max_similarity", None),
+            threshold=getattr(memory_cfg, "novelty_threshold", 0.92),
+            minhash_threshold=getattr(memory_cfg, "minhash_threshold", 0.0),
+        )
+
+    # Memory gating, curation and the memoryloop debate never change a cycle's output, so with
+    # jobs.enabled they run in background workers from a durable queue instead of inline.
+    # Idempotency keys are content hashes: a candidate seen again within jobs.retention_s (or
+    # re-enqueued after a restart) is not gated or debated twice. Handlers share engine_a/engine_b
+    # with this loop; those are serialized() above, so non-reentrant adapters see one call at a time.
+    jobs_cfg = getattr(cfg, "jobs", None)
+    job_queue = job_workers = None
+
+    def _key(kind: str, text: str) -> str:
+        return f"{kind}:{hashlib.sha1(text.encode('utf-8')).hexdigest()}"
+
+    def _gate(candidate: str) -> bool:
+        return should_store(
+            candidate,
+            neutral.system_prompt,
+            persona.system_prompt,
+            P_judge.system,
+            P_judge.user,
+            engine_a,
+            engine_b,
+            gen,
+            cfg.safety.veto_risk,
+            novelty=novelty,
+        )
+
+    def _debate(cand_id: str, summary: str) -> str:
+        candidate = Candidate(cand_id, summary)
+        status = debate_engine.debate(candidate)
+        logger.log("debate_result", {"id": candidate.id, "status": status}, "memoryloop")
+        if status == "ACCEPTED":
+            memory.add_memory(summary, {"type": "reflection"})
+        return status
+
+    if getattr(jobs_cfg, "enabled", False):
+        job_queue = JobQueue(
+            jobs_cfg.db_path,
+            lease_s=jobs_cfg.lease_s,
+            backoff_s=jobs_cfg.backoff_s,
+            max_backoff_s=jobs_cfg.max_backoff_s,
+            max_attempts=jobs_cfg.max_attempts,
+            retention_s=getattr(jobs_cfg, "retention_s", 86400.0),
+        )
+        # no worker of this queue is alive yet: whatever is still `running` was interrupted
+        log("jobs.recovered", count=job_queue.recover(stale_after_s=0), **job_queue.stats())
+        handlers = _memory_job_handlers(_gate, pool, job_queue, lambda: job_workers.notify())
+        if debate_engine and logger and memory:
+            handlers["memory_debate"] = lambda payload: _debate(payload["id"], payload["summary"])
+        job_workers = JobWorkers(job_queue, handlers, workers=jobs_cfg.workers, on_event=log).start()
+
     # -----------------------------------------------------------------------
     try:
         for cycle in range(cfg.runtime.cycles):
             log("cycle.start", id=cycle)
+            persona = preg.load(cfg.persona.current)  # picks up edits to the persona file
             inp = iface.get_input()
 
             # Recall
@@ -254,7 +428,12 @@ def main(config_path: str):
                 gen=gen,
                 prompts=pl,
                 veto_risk=cfg.safety.veto_risk,
+                max_concurrency=getattr(action_cfg, "max_concurrency", 4),
+                batch_eval=getattr(action_cfg, "batch_eval", False),
+                cache=eval_cache,
             )
+            if eval_cache is not None:
+                log("eval_cache.stats", **eval_cache.stats())
 
             result = None
             if isinstance(action, ActionDecision):
@@ -270,21 +449,15 @@ def main(config_path: str):
 
             expl = explain(inp, plan, crit, neutral.system_prompt, P_explain, engine_a, gen)
 
-            stored = should_store(
-                f"{inp}\n{plan}\n{crit}\n{result}",
-                neutral.system_prompt,
-                persona.system_prompt,
-                P_judge.system,
-                P_judge.user,
-                engine_a,
-                engine_b,
-                gen,
-                cfg.safety.veto_risk,
-            )
-            if stored:
-                pool.append(expl)
-
-            curate_if_needed(pool)
+            candidate_text = f"{inp}\n{plan}\n{crit}\n{result}"
+            key = _key("gate", candidate_text)
+            if job_queue is not None:
+                job_queue.enqueue("memory_gate", {"candidate": candidate_text, "expl": expl, "key": key}, key=key)
+                job_workers.notify()
+            else:
+                if _gate(candidate_text):
+                    pool.add(key, expl)
+                pool.curate()
 
             result_summary = None
             if isinstance(result, dict):
@@ -325,6 +498,7 @@ def main(config_path: str):
                         gen=gen,
                         prompts=pl,
                         veto_risk=cfg.safety.veto_risk,
+                        cache=eval_cache,
                     )
                     iface.send_output(f"[follow-up action] {follow_action}")
 
@@ -342,6 +516,7 @@ def main(config_path: str):
                         gen=gen,
                         prompts=pl,
                         veto_risk=cfg.safety.veto_risk,
+                        cache=eval_cache,
                     )
                     retry_result = None
                     if isinstance(retry_action, ActionDecision):
@@ -355,14 +530,16 @@ def main(config_path: str):
 
             # --- Optional: debate+persistent storage ---
             if debate_engine and logger and memory and result_summary is not None:
-                try:
-                    candidate = Candidate(str(cycle), str(result_summary))
-                    status = debate_engine.debate(candidate)
-                    logger.log("debate_result", {"id": candidate.id, "status": status}, "memoryloop")
-                    if status == "ACCEPTED":
-                        memory.add_memory(str(result_summary), {"type": "reflection"})
-                except Exception:
-                    pass
+                if job_queue is not None:
+                    summary = str(result_summary)
+                    job_queue.enqueue("memory_debate", {"id": str(cycle), "summary": summary},
+                                      key=_key("debate", summary))
+                    job_workers.notify()
+                else:
+                    try:
+                        _debate(str(cycle), str(result_summary))
+                    except Exception:
+                        pass
 
             # ---- Stability Drift Check ----
             try:
@@ -388,11 +565,27 @@ def main(config_path: str):
 
             log("cycle.end", id=cycle)
     finally:
+        stopped = True
+        if job_workers is not None:
+            # jobs not finished in time stay queued and resume on the next start
+            job_workers.wait_idle(jobs_cfg.drain_s)
+            stopped = job_workers.stop()
+            log("jobs.stats", stopped=stopped, **job_workers.stats())
+            if stopped:
+                job_queue.close()
         try:
-            if memory:
+            # a worker still inside a job may be using memory; its lease expires and the job reruns
+            if memory and stopped:
                 memory.close()
         except Exception:
             pass
+        if novelty is not None:
+            log("memory_gate.novelty", **novelty.stats())
+        log("sandbox.usage_report", commands=sandbox.usage_report())
+        log("sandbox.result_cache", **sandbox.cache_stats())
+        if python_pool is not None:
+            log("sandbox.python_pool.stats", **python_pool.stats())
+            python_pool.close()
 
 
 if __name__ == "__main__":
@@ -1,3 +1,3 @@
-from .json_schema import parse_judgment, parse_eval
-__all__ = ["parse_judgment", "parse_eval"]
+from .json_schema import parse_judgment, parse_eval, parse_eval_batch
+__all__ = ["parse_judgment", "parse_eval", "parse_eval_batch"]
 
@@ -3,9 +3,10 @@
 from __future__ import annotations
 import json
 import re
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional
 
 _OBJ = re.compile(r"\{.*\}", re.DOTALL)
+_ARR = re.compile(r"\[.*\]", re.DOTALL)
 
 def _first_json_obj(text: str) -> Dict[str, Any]:
     for m in _OBJ.finditer(text or ""):
@@ -34,11 +35,49 @@ def parse_eval(text: str) -> Dict[str, Any]:
     Expected:
       {"label":"ACCEPT|REJECT","reason":"...","utility":0.x,"risk":0.x}
     """
-    obj = _first_json_obj(text)
+    return _eval_fields(_first_json_obj(text))
+
+def _eval_fields(obj: Dict[str, Any]) -> Dict[str, Any]:
     label = str(obj.get("label", "")).upper()
     reason = str(obj.get("reason", "")).strip()[:200]
     utility = float(obj.get("utility", 0.0)) if isinstance(obj.get("utility", None), (int, float)) else 0.0
     risk = float(obj.get("risk", 0.0)) if isinstance(obj.get("risk", None), (int, float)) else 0.0
-    return {"label": label, "reason": reason, "utility": utility, "risk": risk}
+    # the prompt asks for [0, 1]; out-of-range answers would break the pruning bound in decide_actions
+    return {"label": label, "reason": reason, "utility": _unit(utility), "risk": _unit(risk)}
 
+def _unit(x: float) -> float:
+    return min(1.0, max(0.0, x)) if x == x else 0.0
 
+def parse_eval_batch(text: str, n: int) -> List[Optional[Dict[str, Any]]]:
+    """
+    Expected:
+      [{"index":1,"label":"ACCEPT|REJECT","reason":"...","utility":0.x,"risk":0.x}, ...]
+    One slot per candidate, in candidate order. `index` (1-based) places an entry when present;
+    array position is only trusted when the array has exactly n entries. Slots with no usable entry
+    (missing, out of range, no valid label) are None so the caller can re-ask for just those.
+    """
+    items: List[Any] = []
+    for m in _ARR.finditer(text or ""):
+        try:
+            parsed = json.loads(m.group(0).strip())
+        except Exception:
+            continue
+        if isinstance(parsed, list):
+            items = parsed
+            break
+    out: List[Optional[Dict[str, Any]]] = [None] * n
+    positional = len(items) == n
+    for pos, obj in enumerate(items):
+        if not isinstance(obj, dict):
+            continue
+        idx = obj.get("index")
+        if isinstance(idx, int) and not isinstance(idx, bool):
+            slot = idx - 1
+        elif positional:
+            slot = pos
+        else:
+            continue
+        ev = _eval_fields(obj)
+        if 0 <= slot < n and out[slot] is None and ev["label"] in ("ACCEPT", "REJECT"):
+            out[slot] = ev
+    return out
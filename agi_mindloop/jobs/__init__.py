@@ -0,0 +1,4 @@
+from .queue import Job, JobQueue
+from .worker import JobWorkers
+
+__all__ = ["Job", "JobQueue", "JobWorkers"]
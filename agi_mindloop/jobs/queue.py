@@ -0,0 +1,209 @@
+# Durable SQLite job queue: background work survives crashes and restarts, and is retried with backoff.
+
+from __future__ import annotations
+import json, random, sqlite3, threading, time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence
+
+INIT_SQL = """
+PRAGMA journal_mode=WAL;
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    idem_key TEXT UNIQUE,
+    status TEXT NOT NULL DEFAULT 'queued',  -- queued | running | done | dead
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 5,
+    run_after REAL NOT NULL,
+    locked_by TEXT,
+    locked_until REAL,
+    last_error TEXT,
+    result TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_ready ON jobs(status, run_after);
+"""
+
+@dataclass
+class Job:
+    id: int
+    kind: str
+    payload: Dict[str, Any]
+    key: Optional[str]
+    attempts: int      # including the current one
+    max_attempts: int
+
+class JobQueue:
+    """
+    Jobs in a SQLite table (WAL), so queued and in-flight work outlives the process.
+
+    - `enqueue(kind, payload, key=...)`: a job whose idempotency `key` already exists (in any
+      state) is not added again; the existing id is returned. Finished (done or dead) jobs are
+      kept for `retention_s`: after that their key no longer blocks a new job, and they are
+      deleted on start-up and at most every `retention_s / 24` from `enqueue`.
+    - `claim()` leases the oldest due job for `lease_s`. A worker that dies leaves the job
+      `running` until the lease expires; `recover()` (or the next `claim()` after expiry) puts it back.
+    - `fail()` reschedules with exponential backoff (`backoff_s * 2**(attempts-1)`, capped at
+      `max_backoff_s`, with jitter) until `max_attempts`, then marks the job `dead`.
+
+    Payloads and results must be JSON-serialisable. One connection is shared by all threads,
+    serialised by a lock; every state change is its own short transaction.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        lease_s: float = 300.0,
+        backoff_s: float = 2.0,
+        max_backoff_s: float = 300.0,
+        max_attempts: int = 5,
+        retention_s: float = 86400.0,
+    ):
+        self.path = Path(path)
+        if str(path) != ":memory:":
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.lease_s = lease_s
+        self.backoff_s = backoff_s
+        self.max_backoff_s = max_backoff_s
+        self.max_attempts = max_attempts
+        self.retention_s = retention_s
+        self.conn = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None, timeout=30)
+        self.conn.executescript(INIT_SQL)
+        self._lock = threading.Lock()
+        self._last_purge = 0.0
+        self.purge(retention_s)
+
+    def enqueue(
+        self,
+        kind: str,
+        payload: Dict[str, Any],
+        key: Optional[str] = None,
+        delay_s: float = 0.0,
+        max_attempts: Optional[int] = None,
+    ) -> int:
+        now = time.time()
+        body = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+        if now - self._last_purge >= self.retention_s / 24:
+            self.purge(self.retention_s)
+        with self._lock:
+            if key is not None:
+                # an expired key is free again
+                self.conn.execute(
+                    "DELETE FROM jobs WHERE idem_key=? AND status IN ('done','dead') AND updated_at<?",
+                    (key, now - self.retention_s),
+                )
+            cur = self.conn.execute(
+                "INSERT INTO jobs(kind, payload, idem_key, max_attempts, run_after, created_at, updated_at) "
+                "VALUES(?,?,?,?,?,?,?) ON CONFLICT(idem_key) DO NOTHING",
+                (kind, body, key, max_attempts or self.max_attempts, now + delay_s, now, now),
+            )
+            if cur.rowcount:
+                return int(cur.lastrowid)
+            return int(self.conn.execute("SELECT id FROM jobs WHERE idem_key=?", (key,)).fetchone()[0])
+
+    def claim(self, worker: str, kinds: Optional[Sequence[str]] = None) -> Optional[Job]:
+        now = time.time()
+        where = "((status='queued' AND run_after<=?) OR (status='running' AND locked_until<?))"
+        params: list = [now, now]
+        if kinds:
+            where += f" AND kind IN ({','.join('?' * len(kinds))})"
+            params.extend(kinds)
+        with self._lock:
+            row = self.conn.execute(
+                "UPDATE jobs SET status='running', attempts=attempts+1, locked_by=?, locked_until=?, updated_at=? "
+                f"WHERE id=(SELECT id FROM jobs WHERE {where} ORDER BY run_after, id LIMIT 1) "
+                "RETURNING id, kind, payload, idem_key, attempts, max_attempts",
+                (worker, now + self.lease_s, now, *params),
+            ).fetchone()
+        if row is None:
+            return None
+        return Job(int(row[0]), row[1], json.loads(row[2]), row[3], int(row[4]), int(row[5]))
+
+    def complete(self, job: Job, result: Any = None) -> None:
+        with self._lock:
+            self.conn.execute(
+                "UPDATE jobs SET status='done', result=?, locked_by=NULL, locked_until=NULL, updated_at=? WHERE id=?",
+                (json.dumps(result, default=str), time.time(), job.id),
+            )
+
+    def fail(self, job: Job, error: str) -> bool:
+        """Record a failed attempt. Returns True if the job will be retried, False if it is now dead."""
+        now = time.time()
+        retry = job.attempts < job.max_attempts
+        delay = min(self.max_backoff_s, self.backoff_s * 2 ** (job.attempts - 1)) * random.uniform(0.8, 1.2)
+        with self._lock:
+            self.conn.execute(
+                "UPDATE jobs SET status=?, run_after=?, last_error=?, locked_by=NULL, locked_until=NULL, updated_at=? "
+                "WHERE id=?",
+                ("queued" if retry else "dead", now + delay, error[-2000:], now, job.id),
+            )
+        return retry
+
+    def recover(self, stale_after_s: Optional[float] = None) -> int:
+        """
+        Requeue `running` jobs whose lease has expired, or that were last touched more than
+        `stale_after_s` ago (0 on start-up, when no worker of this queue can be alive). The
+        interrupted attempt still counts. Returns the number of jobs requeued.
+        """
+        now = time.time()
+        with self._lock:
+            if stale_after_s is None:
+                cur = self.conn.execute(
+                    "UPDATE jobs SET status='queued', locked_by=NULL, locked_until=NULL, updated_at=? "
+                    "WHERE status='running' AND locked_until<?", (now, now),
+                )
+            else:
+                cur = self.conn.execute(
+                    "UPDATE jobs SET status='queued', locked_by=NULL, locked_until=NULL, updated_at=? "
+                    "WHERE status='running' AND updated_at<=?", (now, now - stale_after_s),
+                )
+            return cur.rowcount
+
+    def get(self, job_id: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            cur = self.conn.execute("SELECT * FROM jobs WHERE id=?", (job_id,))
+            row = cur.fetchone()
+            cols = [d[0] for d in cur.description]
+        if row is None:
+            return None
+        job = dict(zip(cols, row))
+        job["payload"] = json.loads(job["payload"])
+        job["result"] = json.loads(job["result"]) if job["result"] is not None else None
+        return job
+
+    def purge(self, older_than_s: float = 7 * 86400.0) -> int:
+        """Delete finished jobs (done or dead) older than `older_than_s`; their keys can then be reused."""
+        with self._lock:
+            self._last_purge = time.time()
+            return self.conn.execute(
+                "DELETE FROM jobs WHERE status IN ('done','dead') AND updated_at<?", (self._last_purge - older_than_s,),
+            ).rowcount
+
+    def pending(self) -> int:
+        with self._lock:
+            return int(self.conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status IN ('queued','running')").fetchone()[0])
+
+    def due(self, kinds: Optional[Sequence[str]] = None) -> int:
+        """Jobs running or ready to run now (queued jobs waiting out a backoff are not counted)."""
+        sql = "SELECT COUNT(*) FROM jobs WHERE (status='running' OR (status='queued' AND run_after<=?))"
+        params: list = [time.time()]
+        if kinds:
+            sql += f" AND kind IN ({','.join('?' * len(kinds))})"
+            params.extend(kinds)
+        with self._lock:
+            return int(self.conn.execute(sql, params).fetchone()[0])
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self.conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        st = {"queued": 0, "running": 0, "done": 0, "dead": 0}
+        st.update({r[0]: int(r[1]) for r in rows})
+        return st
+
+    def close(self) -> None:
+        with self._lock:
+            self.conn.close()
@@ -0,0 +1,123 @@
+# Thread pool that runs JobQueue jobs through a handler per job kind.
+
+from __future__ import annotations
+import threading, time, traceback
+from typing import Any, Callable, Dict, List, Optional
+
+from .queue import Job, JobQueue
+
+Handler = Callable[[Dict[str, Any]], Any]
+
+class JobWorkers:
+    """
+    `workers` threads that claim jobs from `queue` and run `handlers[job.kind](payload)`.
+
+    A handler's return value is stored as the job result; an exception is a failed attempt
+    (retried with the queue's backoff). Jobs of kinds without a handler are left in the queue.
+    `on_event(name, **fields)` (e.g. telemetry.log) is told about failures and dead jobs.
+    `stop()` lets in-flight jobs finish; queued ones stay in the database for the next start.
+
+    Handlers run on the worker threads, concurrently with each other and with the caller, so
+    whatever they touch must be thread-safe (core_loop passes engines through llm.engine.serialized).
+    """
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        handlers: Dict[str, Handler],
+        workers: int = 2,
+        poll_s: float = 0.2,
+        on_event: Optional[Callable[..., None]] = None,
+    ):
+        self.queue = queue
+        self.handlers = dict(handlers)
+        self.workers = max(1, workers)
+        self.poll_s = poll_s
+        self.on_event = on_event
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._busy = 0
+        self._lock = threading.Lock()
+        self._stats = {"completed": 0, "failed": 0, "retried": 0, "dead": 0}
+
+    def start(self) -> "JobWorkers":
+        self._stop.clear()
+        for i in range(self.workers):
+            t = threading.Thread(target=self._loop, args=(f"jobs-{i}",), name=f"jobs-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        return self
+
+    def notify(self) -> None:
+        """Wake idle workers now instead of at the next poll (call after enqueue)."""
+        self._wake.set()
+
+    def _loop(self, name: str) -> None:
+        kinds = list(self.handlers)
+        while not self._stop.is_set():
+            job = self.queue.claim(name, kinds)
+            if job is None:
+                self._wake.wait(self.poll_s)
+                self._wake.clear()
+                continue
+            with self._lock:
+                self._busy += 1
+            try:
+                self._run(job)
+            finally:
+                with self._lock:
+                    self._busy -= 1
+
+    def _run(self, job: Job) -> None:
+        try:
+            result = self.handlers[job.kind](job.payload)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}\n{traceback.format_exc(limit=5)}"
+            retry = self.queue.fail(job, error)
+            with self._lock:
+                self._stats["failed"] += 1
+                self._stats["retried" if retry else "dead"] += 1
+            if self.on_event is not None:
+                self.on_event("jobs.retry" if retry else "jobs.dead", id=job.id, kind=job.kind,
+                              attempts=job.attempts, error=f"{type(e).__name__}: {e}")
+            return
+        self.queue.complete(job, result)
+        with self._lock:
+            self._stats["completed"] += 1
+
+    def wait_idle(self, timeout: float = 10.0) -> bool:
+        """
+        Block until no job this pool handles is due or running. Returns False on timeout.
+        Jobs waiting out a retry backoff count as idle.
+        """
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if not self.queue.due(list(self.handlers)):
+                return True
+            self.notify()
+            time.sleep(min(0.05, self.poll_s))
+        return False
+
+    def stop(self, timeout: float = 10.0) -> bool:
+        """Stop the workers. Returns False if a job was still running after `timeout` (its lease then expires)."""
+        self._stop.set()
+        self._wake.set()
+        deadline = time.monotonic() + timeout
+        for t in self._threads:
+            t.join(max(0.0, deadline - time.monotonic()))
+        self._threads = [t for t in self._threads if t.is_alive()]
+        return not self._threads
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            st = dict(self._stats)
+            st["busy"] = self._busy
+        st.update({f"queue_{k}": v for k, v in self.queue.stats().items()})
+        return st
+
+    def __enter__(self) -> "JobWorkers":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
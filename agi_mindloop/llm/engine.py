@@ -2,6 +2,8 @@
 
 import json
 import os
+import threading
+import weakref
 from dataclasses import dataclass
 from typing import Optional, Sequence, Protocol
 from urllib import request as _request
@@ -34,11 +36,52 @@ class Engine(Protocol):
     def complete(self, req: CompletionRequest, gen: GenOptions) -> str: ...
 
 
+# ---------------------------------------------------------------------
+# Serialized access
+# ---------------------------------------------------------------------
+# Adapters that may be called from several threads at once set `reentrant = True` (HTTP clients).
+# Anything else (an in-process GPT4All model, one llama-cli process per call) gets one lock per
+# engine instance, shared by every caller: decide_actions' pool, background jobs and the main loop.
+_engine_locks: "weakref.WeakKeyDictionary[object, threading.Lock]" = weakref.WeakKeyDictionary()
+_engine_locks_guard = threading.Lock()
+
+
+def engine_lock(engine: Engine) -> threading.Lock:
+    with _engine_locks_guard:
+        lock = _engine_locks.get(engine)
+        if lock is None:
+            lock = _engine_locks[engine] = threading.Lock()
+        return lock
+
+
+class SerializedEngine:
+    """Runs `engine.complete` under the engine's shared lock; other attributes pass through."""
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self._lock = engine_lock(engine)
+
+    def complete(self, req: CompletionRequest, gen: GenOptions) -> str:
+        with self._lock:
+            return self.engine.complete(req, gen)
+
+    def __getattr__(self, name):
+        return getattr(self.engine, name)
+
+
+def serialized(engine: Engine) -> Engine:
+    """`engine` itself if it is reentrant (or already wrapped), else a SerializedEngine around it."""
+    if isinstance(engine, SerializedEngine) or getattr(engine, "reentrant", False):
+        return engine
+    return SerializedEngine(engine)
+
+
 # ---------------------------------------------------------------------
 # OpenAI API backend
 # ---------------------------------------------------------------------
 class OpenAIEngine:
     """Wrapper for OpenAI's chat completion API."""
+    reentrant = True
+
     def __init__(self, model: str = "gpt-4-turbo", api_key: Optional[str] = None):
         self.model = model
         self.client = OpenAI(api_key=api_key or os.getenv("OPENAI_API_KEY"))
@@ -64,6 +107,8 @@ class OpenAIEngine:
 # ---------------------------------------------------------------------
 class StubEngine:
     """Fake engine for quick testing."""
+    reentrant = True
+
     def __init__(self, name: str):
         self.name = name
 
@@ -73,6 +118,8 @@ class StubEngine:
 
 class Gpt4AllAPIEngine:
     """HTTP client for a locally running GPT4All REST server."""
+    reentrant = True
+
     def __init__(self, model: str, host: str = "127.0.0.1", port: int = 4891, timeout: float = 30.0):
         self.model = model
         self.base_url = f"http://{host}:{port}{GPT4ALL_API_PATH}"
@@ -1,7 +1,7 @@
 from importlib import import_module
 from typing import Any
 
-__all__ = ["VectorStore", "MetaStore", "Embedder", "hybrid_recall"]
+__all__ = ["VectorStore", "MetaStore", "Embedder", "hybrid_recall", "two_stage_recall", "EmbeddingService", "FtsMaintainer", "MemoryEngine", "TieredSearch", "ShardedVectorStore", "NoveltyGate"]
 
 def __getattr__(name: str) -> Any:
     if name == "VectorStore":
@@ -10,8 +10,22 @@ def __getattr__(name: str) -> Any:
         return _optional_import(".meta_store", "MetaStore")
     if name == "Embedder":
         return _optional_import(".embeddings", "Embedder")
+    if name == "EmbeddingService":
+        return _optional_import(".embed_service", "EmbeddingService")
+    if name == "FtsMaintainer":
+        return _optional_import(".fts_maintenance", "FtsMaintainer")
+    if name == "MemoryEngine":
+        return _optional_import(".engine", "MemoryEngine")
+    if name == "TieredSearch":
+        return _optional_import(".tiering", "TieredSearch")
+    if name == "ShardedVectorStore":
+        return _optional_import(".sharded", "ShardedVectorStore")
+    if name == "NoveltyGate":
+        return _optional_import(".novelty", "NoveltyGate")
     if name == "hybrid_recall":
         return _optional_import(".recall", "hybrid_recall")
+    if name == "two_stage_recall":
+        return _optional_import(".recall", "two_stage_recall")
     raise AttributeError(f"module {__name__} has no attribute {name}")
 
 
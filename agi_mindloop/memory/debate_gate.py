@@ -1,8 +1,13 @@
 # Memory gate: Neutral A vs Persona B. Prompt-only personas. Neutral veto on high risk.
 
 from __future__ import annotations
+from typing import TYPE_CHECKING, Optional
 from agi_mindloop.llm.engine import CompletionRequest, GenOptions, Engine
 from agi_mindloop.debate import parse_judgment
+from agi_mindloop.io_mod.telemetry import log
+
+if TYPE_CHECKING:
+    from agi_mindloop.memory.novelty import NoveltyGate
 
 def _ask(engine: Engine, system_text: str, judge_sys: str, judge_user: str, candidate_text: str, gen: GenOptions) -> dict:
     req = CompletionRequest(
@@ -22,13 +27,21 @@ def should_store(
     engine_b: Engine,
     gen: GenOptions,
     veto_risk: float,
+    novelty: Optional["NoveltyGate"] = None,
 ) -> bool:
     """
     Returns True if Persona B says ACCEPT and Neutral A does not veto on risk.
     - neutral_sys: baseline model system text (usually empty)
     - persona_sys: persona system text (prompt-only)
     - stage_sys/stage_user: judge prompt blocks
+    - novelty: optional memory.novelty.NoveltyGate; near-duplicates are rejected without asking the judges
     """
+    if novelty is not None:
+        verdict = novelty.check(candidate_text)
+        if not verdict.novel:
+            log("memory_gate.skip", reason=verdict.reason, similarity=verdict.similarity,
+                minhash=verdict.minhash_similarity, judge_calls_saved=2)
+            return False
     a = _ask(engine_a, neutral_sys, stage_sys, stage_user, candidate_text, gen)
     b = _ask(engine_b, persona_sys, stage_sys, stage_user, candidate_text, gen)
 
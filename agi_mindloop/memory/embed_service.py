@@ -0,0 +1,146 @@
+# Micro-batching front end for Embedder. Concurrent encode() calls are coalesced on one thread.
+
+from __future__ import annotations
+import threading, time
+from collections import Counter
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+import numpy as np
+
+@dataclass
+class _Request:
+    n: int
+    future: Future
+    rows: List[Optional[np.ndarray]] = field(default_factory=list)
+    filled: int = 0
+
+@dataclass
+class _Item:
+    text: str
+    req: _Request
+    pos: int
+    enqueued: float
+
+def _bucket(text: str) -> int:
+    # power-of-two length buckets: 0-1, 2-3, 4-7, 8-15, 16-31, ... chars
+    return max(len(text), 1).bit_length()
+
+class EmbeddingService:
+    """
+    Wraps any object with `encode(texts) -> np.ndarray` (e.g. Embedder) behind a background thread.
+    Texts are queued per length bucket; a bucket is flushed as one model call once it holds
+    `max_batch` texts or its oldest text has waited `max_wait_ms`. Bucketing keeps texts of similar
+    length together so batches carry little padding.
+    """
+
+    def __init__(self, embedder, max_batch: int = 32, max_wait_ms: float = 10.0):
+        if max_batch < 1:
+            raise ValueError("max_batch must be >= 1")
+        self.embedder = embedder
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self._cond = threading.Condition()
+        self._buckets: Dict[int, List[_Item]] = {}
+        self._pending = 0
+        self._closed = False
+        self._batch_sizes: Counter = Counter()
+        self._max_depth = 0
+        self._thread = threading.Thread(target=self._run, name="embedding-service", daemon=True)
+        self._thread.start()
+
+    @property
+    def dim(self) -> int: return self.embedder.dim
+
+    def submit(self, texts: List[str]) -> Future:
+        """Queue texts; the future resolves to an (n, dim) float32 array in input order."""
+        fut: Future = Future()
+        texts = list(texts)
+        if not texts:
+            fut.set_result(np.empty((0, self.dim), dtype=np.float32))
+            return fut
+        req = _Request(n=len(texts), future=fut, rows=[None] * len(texts))
+        now = time.monotonic()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("EmbeddingService is closed")
+            for pos, t in enumerate(texts):
+                self._buckets.setdefault(_bucket(t), []).append(_Item(t, req, pos, now))
+            self._pending += len(texts)
+            self._max_depth = max(self._max_depth, self._pending)
+            self._cond.notify()
+        return fut
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        return self.submit(texts).result()
+
+    def stats(self) -> Dict:
+        with self._cond:
+            return {
+                "queue_depth": self._pending,
+                "max_queue_depth": self._max_depth,
+                "batches": sum(self._batch_sizes.values()),
+                "texts": sum(size * n for size, n in self._batch_sizes.items()),
+                "batch_size_histogram": dict(sorted(self._batch_sizes.items())),
+            }
+
+    def close(self) -> None:
+        """Flush everything still queued, then stop the worker thread."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+
+    # internals
+    def _next_batch(self) -> Optional[List[_Item]]:
+        # called with self._cond held; blocks until a bucket is ready or the service is closed and drained
+        while True:
+            if self._pending == 0:
+                if self._closed:
+                    return None
+                self._cond.wait()
+                continue
+            now = time.monotonic()
+            full = [b for b, items in self._buckets.items() if len(items) >= self.max_batch]
+            if full:
+                key = full[0]
+            else:
+                key = min(self._buckets, key=lambda b: self._buckets[b][0].enqueued)
+                wait = self._buckets[key][0].enqueued + self.max_wait - now
+                if wait > 0 and not self._closed:
+                    self._cond.wait(wait)
+                    continue
+            items = self._buckets[key]
+            batch, rest = items[: self.max_batch], items[self.max_batch:]
+            if rest:
+                self._buckets[key] = rest
+            else:
+                del self._buckets[key]
+            self._pending -= len(batch)
+            self._batch_sizes[len(batch)] += 1
+            return batch
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                batch = self._next_batch()
+            if batch is None:
+                return
+            try:
+                vecs = np.asarray(self.embedder.encode([it.text for it in batch]), dtype=np.float32)
+                if vecs.ndim != 2 or len(vecs) != len(batch):
+                    # zip() would leave the unmatched callers waiting forever
+                    raise ValueError(f"embedder returned {vecs.shape} for a batch of {len(batch)} texts")
+            except BaseException as exc:
+                for it in batch:
+                    if not it.req.future.done():
+                        it.req.future.set_exception(exc)
+                continue
+            for it, vec in zip(batch, vecs):
+                req = it.req
+                if req.future.done():
+                    continue
+                req.rows[it.pos] = vec
+                req.filled += 1
+                if req.filled == req.n:
+                    req.future.set_result(np.stack(req.rows))
@@ -0,0 +1,286 @@
+# Single storage engine shared by memory_loop.Memory-style callers and the memory/ recall functions.
+
+from __future__ import annotations
+import json
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+import numpy as np
+import faiss
+
+from .meta_store import MetaStore
+from .recall import two_stage_recall
+from .sharded import ShardedVectorStore, partition_key
+from .tiering import TieredSearch
+from .vector_store import VectorStore
+
+ISO_FORMAT = "%Y-%m-%dT%H:%M:%S.%fZ"
+
+def utc_now_iso() -> str:
+    return datetime.now(timezone.utc).strftime(ISO_FORMAT)
+
+def stored_dim(path: str) -> Optional[int]:
+    """Dimension of an existing index file or shard directory, read without loading the embedder."""
+    p = Path(path)
+    if p.is_dir():
+        manifest = p / "shards.json"
+        if manifest.exists():
+            dim = json.loads(manifest.read_text()).get("dim")
+            if dim:
+                return int(dim)
+        shards = sorted(p.glob("shard-*.faiss"))
+        if not shards:
+            return None
+        p = shards[0]
+    elif not p.exists():
+        return None
+    return int(faiss.read_index(str(p), faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY).d)
+
+def as_iso(value: Union[str, datetime]) -> str:
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.astimezone(timezone.utc).strftime(ISO_FORMAT)
+    return str(value)
+
+class MemoryEngine:
+    """
+    One schema, one embedding pass, one index.
+
+    Memories live in the MetaStore `memories` table (content, kind, uid, meta JSON, stored embedding)
+    and in a single VectorStore keyed by `memories.id`. Every text is embedded once, with one model.
+    The artifacts table and its FTS index share the same database, so `recall` (two-stage hybrid
+    recall) and memory_loop.EngineMemory both run against this engine.
+
+    `embedder` is anything with `encode(texts) -> (n, dim) array` and a `dim` attribute (Embedder,
+    EmbeddingService). It defaults to the BGE-M3 Embedder, loaded on first use.
+
+    With `hot_capacity > 0`, `search` goes through a TieredSearch: the most-recalled memories are
+    searched exactly first, and the HNSW index only when the hot tier is not confident.
+
+    With `shard_by='month'|'kind'`, `faiss_path` is a directory of per-month or per-kind shards
+    (ShardedVectorStore); searches with a time or kind filter skip shards that cannot match.
+    """
+
+    def __init__(
+        self,
+        sqlite_path: str,
+        faiss_path: str,
+        embedder=None,
+        storage: str = "flat",
+        embedding_codec: str = "f32",
+        M: int = 32,
+        ef_search: int = 16,
+        autosave: bool = True,
+        store: Optional[MetaStore] = None,
+        hot_capacity: int = 0,
+        hot_threshold: float = 0.6,
+        shard_by: Optional[str] = None,
+    ):
+        self.sqlite_path = sqlite_path
+        self.faiss_path = faiss_path
+        self.store = store if store is not None else MetaStore(sqlite_path, embedding_codec=embedding_codec)
+        self._embedder = embedder
+        self._vectors: Optional[VectorStore] = None
+        self.storage = storage
+        self.M = M
+        self.ef_search = ef_search
+        self.autosave = autosave
+        self.hot_capacity = hot_capacity
+        self.hot_threshold = hot_threshold
+        self._tier: Optional[TieredSearch] = None
+        self.shard_by = shard_by or None
+
+    @property
+    def embedder(self):
+        if self._embedder is None:
+            from .embeddings import Embedder
+            self._embedder = Embedder()
+        return self._embedder
+
+    @property
+    def vectors(self) -> Union[VectorStore, ShardedVectorStore]:
+        if self._vectors is None:
+            self._vectors = self.open_vectors(self.faiss_path)
+        return self._vectors
+
+    def open_vectors(self, path: str, dim: Optional[int] = None) -> Union[VectorStore, ShardedVectorStore]:
+        if dim is None:
+            # an existing index carries its own dimension; only a new (or empty) one needs the embedder's
+            dim = stored_dim(path) or self.embedder.dim
+        if self.shard_by:
+            return ShardedVectorStore(path, dim=dim, partition=self.shard_by, M=self.M, storage=self.storage,
+                                      ef_search=self.ef_search)
+        return VectorStore(path, dim=dim, M=self.M, storage=self.storage, ef_search=self.ef_search)
+
+    def shard_keys(self, created_at: Sequence[str], kinds: Sequence[Optional[str]]) -> List[str]:
+        return [partition_key(self.shard_by, c, k) for c, k in zip(created_at, kinds)]
+
+    def index_vectors(self, vectors, ids: Sequence[int], vecs: np.ndarray,
+                      created_at: Sequence[str], kinds: Sequence[Optional[str]]) -> None:
+        """Add to `vectors` (this engine's or a fresh one from open_vectors), routing to shards when sharded."""
+        if self.shard_by:
+            vectors.add(ids, vecs, self.shard_keys(created_at, kinds))
+        else:
+            vectors.add(ids, vecs)
+
+    @property
+    def tier(self) -> Optional[TieredSearch]:
+        if self.hot_capacity <= 0:
+            return None
+        vs = self.vectors
+        if self._tier is None or self._tier.cold is not vs:
+            self._tier = TieredSearch(self.store, vs, capacity=self.hot_capacity, threshold=self.hot_threshold)
+        return self._tier
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        vecs = np.asarray(self.embedder.encode(list(texts)), dtype=np.float32).reshape(len(texts), -1)
+        return vecs / (np.linalg.norm(vecs, axis=1, keepdims=True) + 1e-12)
+
+    # writes
+    def add_many(
+        self,
+        contents: Sequence[str],
+        metas: Optional[Sequence[Dict]] = None,
+        *,
+        kinds: Optional[Sequence[str]] = None,
+        uids: Optional[Sequence[Optional[str]]] = None,
+        created_at: Optional[Sequence[str]] = None,
+        importance: float = 0.5,
+        uncertainty: float = 0.5,
+        provenance: str = "",
+        embeddings: Optional[np.ndarray] = None,
+    ) -> List[int]:
+        """Store memories and index them. Texts are embedded in one batch unless `embeddings` is given."""
+        contents = list(contents)
+        if not contents:
+            return []
+        n = len(contents)
+        metas = list(metas) if metas is not None else [{} for _ in contents]
+        kinds = list(kinds) if kinds is not None else [str(m.get("type", "observation")) for m in metas]
+        uids = list(uids) if uids is not None else [None] * n
+        stamps = list(created_at) if created_at is not None else [utc_now_iso()] * n
+        vecs = self.embed(contents) if embeddings is None else np.asarray(embeddings, dtype=np.float32)
+        ids = [
+            self.store.add_memory(
+                vecs[i], metas[i], importance, uncertainty, stamps[i], provenance,
+                content=contents[i], kind=kinds[i], uid=uids[i],
+            )
+            for i in range(n)
+        ]
+        self.index_vectors(self.vectors, ids, vecs, stamps, kinds)
+        if self.autosave:
+            self.vectors.save()
+        return ids
+
+    def add(
+        self,
+        content: str,
+        meta: Optional[Dict] = None,
+        *,
+        kind: Optional[str] = None,
+        uid: Optional[str] = None,
+        created_at: Optional[str] = None,
+        **kwargs,
+    ) -> int:
+        return self.add_many(
+            [content], [meta or {}],
+            kinds=None if kind is None else [kind],
+            uids=[uid],
+            created_at=None if created_at is None else [created_at],
+            **kwargs,
+        )[0]
+
+    def remove(self, ids: Iterable[int]) -> int:
+        ids = [int(i) for i in ids]
+        removed = self.store.delete_memories(ids)
+        if ids:
+            self.vectors.remove(ids)
+            if self._tier is not None:
+                self._tier.discard(ids)
+            if self.autosave:
+                self.vectors.save()
+        return removed
+
+    # reads
+    def filter_ids(
+        self,
+        kind: Optional[Union[str, Sequence[str]]] = None,
+        since: Optional[Union[str, datetime]] = None,
+        until: Optional[Union[str, datetime]] = None,
+        meta: Optional[Dict] = None,
+    ) -> Optional[np.ndarray]:
+        """Memory ids matching the filters, or None when no filter is set."""
+        if kind is None and since is None and until is None and not meta:
+            return None
+        kinds = None if kind is None else ([kind] if isinstance(kind, str) else list(kind))
+        return self.store.filter_memory_ids(
+            kinds,
+            None if since is None else as_iso(since),
+            None if until is None else as_iso(until),
+            meta,
+        )
+
+    def shards_for(
+        self,
+        kind: Optional[Union[str, Sequence[str]]] = None,
+        since: Optional[Union[str, datetime]] = None,
+        until: Optional[Union[str, datetime]] = None,
+    ) -> Optional[List[str]]:
+        """Shard keys that can hold memories matching the filters; None when unsharded or unfiltered."""
+        if not self.shard_by:
+            return None
+        kinds = None if kind is None else ([kind] if isinstance(kind, str) else list(kind))
+        return self.vectors.keys_for(
+            None if since is None else as_iso(since), None if until is None else as_iso(until), kinds
+        )
+
+    def search(
+        self,
+        queries: Union[Sequence[str], np.ndarray],
+        k: int = 5,
+        allow_ids: Optional[np.ndarray] = None,
+        shards: Optional[Sequence[str]] = None,
+        count: bool = True,
+    ) -> List[List[Tuple[int, float]]]:
+        """
+        Nearest memories per query (texts are embedded in one batch), as (memory id, cosine) lists.
+        `shards` limits a sharded index to those keys (see `shards_for`). `count=False` is for
+        probes (e.g. novelty checks): the hits are not counted as recalls by the hot tier.
+        """
+        if allow_ids is not None and len(allow_ids) == 0:
+            return [[] for _ in range(len(queries))]
+        if not Path(self.faiss_path).exists() and self._vectors is None:
+            return [[] for _ in range(len(queries))]
+        q = queries if isinstance(queries, np.ndarray) else self.embed(queries)
+        if shards is not None:
+            return self.vectors.search_many(q, k, allow_ids=allow_ids, keys=shards)
+        tier = self.tier
+        if tier is not None:
+            return tier.search_many(q, k, allow_ids=allow_ids, count=count)
+        return self.vectors.search_many(q, k, allow_ids=allow_ids)
+
+    def get(self, ids: Iterable[int]) -> Dict[int, Dict]:
+        rows = self.store.get_memories(ids)
+        for row in rows.values():
+            row["meta"] = json.loads(row["meta"]) if row["meta"] else {}
+        return rows
+
+    def recall(self, query_text: str, k: int = 8, alpha: float = 0.7) -> List[Dict]:
+        """Hybrid recall (memories + artifacts) with the engine's own embedder, store and index."""
+        q = self.embed([query_text])[0]
+        return two_stage_recall(None, self.vectors, q, query_text, k=k, alpha=alpha, store=self.store,
+                                tier=self.tier).items
+
+    def save(self) -> None:
+        self.store.flush()
+        if self._vectors is not None:
+            self._vectors.save()
+
+    def close(self) -> None:
+        if self._tier is not None:
+            self._tier.wait_for_rebalance()
+        self.save()
+        if isinstance(self._vectors, ShardedVectorStore):
+            self._vectors.close()
+        self.store.close()
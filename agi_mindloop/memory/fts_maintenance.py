@@ -0,0 +1,110 @@
+# Idle-time FTS5 maintenance for MetaStore.fts_artifacts, plus a segment/latency health history.
+
+from __future__ import annotations
+import threading, time
+from collections import deque
+from dataclasses import dataclass, asdict
+from typing import Deque, Dict, Optional
+
+from .meta_store import MetaStore
+
+@dataclass
+class FtsSample:
+    at: float            # time.time() of the sample
+    segments: int
+    probe_ms: float      # latency of one fts_candidates() probe query
+    action: str          # "none" | "merge" | "optimize" | "busy"
+
+class FtsMaintainer:
+    """
+    Background thread that keeps the artifact FTS index compact while the store is idle.
+
+    Every `interval_s` it checks MetaStore.last_write; once no write happened for `idle_s` it runs
+    incremental `merge` steps of `merge_pages` pages until FTS5 reports nothing left to merge (or
+    a write arrives). If `optimize_segments` is set and the index has at least that many segments,
+    a full `optimize` runs instead. Each check records an FtsSample; `health()` summarizes them.
+    """
+
+    def __init__(
+        self,
+        store: MetaStore,
+        interval_s: float = 30.0,
+        idle_s: float = 5.0,
+        merge_pages: int = 500,
+        optimize_segments: Optional[int] = None,
+        probe_query: str = "the",
+        history: int = 256,
+    ):
+        self.store = store
+        self.interval_s = interval_s
+        self.idle_s = idle_s
+        self.merge_pages = merge_pages
+        self.optimize_segments = optimize_segments
+        self.probe_query = probe_query
+        self.history: Deque[FtsSample] = deque(maxlen=history)
+        self.merge_steps = 0
+        self.optimizes = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "FtsMaintainer":
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="fts-maintainer", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _idle(self) -> bool:
+        return time.monotonic() - self.store.last_write >= self.idle_s
+
+    def run_once(self, force: bool = False) -> FtsSample:
+        """One maintenance pass. `force` ignores the idle check (tests, manual runs)."""
+        action = "busy"
+        if force or self._idle():
+            action = "none"
+            if self.optimize_segments and self.store.fts_segment_count() >= self.optimize_segments:
+                self.store.fts_optimize()
+                self.optimizes += 1
+                action = "optimize"
+            else:
+                while not self._stop.is_set() and (force or self._idle()) and self.store.fts_merge(self.merge_pages):
+                    self.merge_steps += 1
+                    action = "merge"
+        sample = self._sample(action)
+        self.history.append(sample)
+        return sample
+
+    def _sample(self, action: str) -> FtsSample:
+        t0 = time.perf_counter()
+        self.store.fts_candidates(self.probe_query, limit=10)
+        probe_ms = (time.perf_counter() - t0) * 1000.0
+        return FtsSample(time.time(), self.store.fts_segment_count(), probe_ms, action)
+
+    def health(self) -> Dict:
+        samples = list(self.history)
+        latest = samples[-1] if samples else self._sample("none")
+        probes = sorted(s.probe_ms for s in samples) or [latest.probe_ms]
+        return {
+            "segments": latest.segments,
+            "probe_ms": latest.probe_ms,
+            "probe_ms_p50": probes[len(probes) // 2],
+            "probe_ms_max": probes[-1],
+            "merge_steps": self.merge_steps,
+            "optimizes": self.optimizes,
+            "history": [asdict(s) for s in samples],
+        }
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_s):
+            try:
+                self.run_once()
+            except Exception:
+                # the store may be closing; maintenance is best-effort
+                if self.store._closed:
+                    return
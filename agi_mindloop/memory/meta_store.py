@@ -1,7 +1,10 @@
 from __future__ import annotations
-import json, sqlite3
+import inspect, json, queue, re, sqlite3, threading, time
+from collections import Counter
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Optional, Iterable, Tuple, List, Dict
+from typing import Callable, Optional, Iterable, Iterator, Tuple, List, Dict
+import numpy as np
 
 INIT_SQL = """
 PRAGMA journal_mode=WAL;
@@ -15,7 +18,7 @@ CREATE TABLE IF NOT EXISTS artifacts (
 CREATE TABLE IF NOT EXISTS memories (
   id INTEGER PRIMARY KEY, embedding BLOB, meta JSON,
   importance REAL, uncertainty REAL, recall_count INTEGER DEFAULT 0,
-  created_at TEXT, provenance TEXT
+  created_at TEXT, provenance TEXT, uid TEXT, content TEXT, kind TEXT
 );
 CREATE TABLE IF NOT EXISTS debates (
   id INTEGER PRIMARY KEY, cycle_id INTEGER, candidate_kind TEXT,
@@ -25,63 +28,582 @@ CREATE TABLE IF NOT EXISTS debates (
   FOREIGN KEY(cycle_id) REFERENCES cycles(id)
 );
 CREATE VIRTUAL TABLE IF NOT EXISTS fts_artifacts USING fts5(content, content='artifacts', content_rowid='id');
+CREATE TRIGGER IF NOT EXISTS artifacts_ai AFTER INSERT ON artifacts BEGIN
+  INSERT INTO fts_artifacts(rowid, content) VALUES (new.id, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS artifacts_ad AFTER DELETE ON artifacts BEGIN
+  INSERT INTO fts_artifacts(fts_artifacts, rowid, content) VALUES ('delete', old.id, old.content);
+END;
+CREATE TRIGGER IF NOT EXISTS artifacts_au AFTER UPDATE OF content ON artifacts BEGIN
+  INSERT INTO fts_artifacts(fts_artifacts, rowid, content) VALUES ('delete', old.id, old.content);
+  INSERT INTO fts_artifacts(rowid, content) VALUES (new.id, new.content);
+END;
 """
 
+# Columns added after the first release; older databases get them through ALTER TABLE.
+_MEMORY_COLUMNS = {"uid": "TEXT", "content": "TEXT", "kind": "TEXT"}
+_MEMORY_INDEXES = """
+CREATE UNIQUE INDEX IF NOT EXISTS idx_memories_uid ON memories(uid);
+CREATE INDEX IF NOT EXISTS idx_memories_kind_created ON memories(kind, created_at);
+CREATE INDEX IF NOT EXISTS idx_memories_created ON memories(created_at);
+CREATE INDEX IF NOT EXISTS idx_memories_recall ON memories(recall_count DESC, created_at DESC, id DESC);
+"""
+
+# str patterns match Unicode word characters, like FTS5's default unicode61 tokenizer
+_word = re.compile(r"\w+")
+
+# Embedding BLOB codecs. Plain float32 has no header (the original format); the compressed
+# encodings start with a 4-byte tag. int8 stores one float32 scale per vector (max |v| / 127).
+EMBEDDING_CODECS = ("f32", "f16", "i8")
+_F16_TAG = b"EF16"
+_I8_TAG = b"EQ8\x00"
+
+def encode_embedding(vec: np.ndarray, codec: str = "f32") -> bytes:
+    v = np.asarray(vec, dtype=np.float32).reshape(-1)
+    if codec == "f32":
+        return v.tobytes()
+    if codec == "f16":
+        return _F16_TAG + v.astype(np.float16).tobytes()
+    if codec == "i8":
+        scale = float(np.abs(v).max()) / 127.0 or 1.0
+        q = np.clip(np.rint(v / scale), -127, 127).astype(np.int8)
+        return _I8_TAG + np.float32(scale).tobytes() + q.tobytes()
+    raise ValueError(f"unknown embedding codec {codec!r}; expected one of {EMBEDDING_CODECS}")
+
+def decode_embedding(blob: bytes) -> np.ndarray:
+    tag = bytes(blob[:4])
+    if tag == _F16_TAG:
+        return np.frombuffer(blob, dtype=np.float16, offset=4).astype(np.float32)
+    if tag == _I8_TAG:
+        scale = np.frombuffer(blob, dtype=np.float32, count=1, offset=4)[0]
+        return np.frombuffer(blob, dtype=np.int8, offset=8).astype(np.float32) * scale
+    return np.frombuffer(blob, dtype=np.float32)
+
+_FTS_STRUCTURE_V2 = b"\xff\x00\x00\x01"
+
+def _varint(buf: bytes, pos: int) -> Tuple[int, int]:
+    # SQLite varint: big-endian 7-bit groups, high bit set on all but the last; the 9th byte carries 8 bits
+    value = 0
+    for i in range(8):
+        b = buf[pos + i]
+        value = (value << 7) | (b & 0x7F)
+        if not b & 0x80:
+            return value, pos + i + 1
+    return (value << 8) | buf[pos + 8], pos + 9
+
+def _fts_query(query: str) -> str:
+    # naive OR query to broaden coverage; terms are quoted so user text cannot inject FTS syntax
+    return " OR ".join(f'"{w.lower()}"' for w in _word.findall(query or ""))
+
+class WriteBehindError(RuntimeError):
+    """Queued writes that could not be committed. `failed` lists (kind, row id, exception)."""
+
+    def __init__(self, failed: List[Tuple[str, int, BaseException]]):
+        self.failed = failed
+        shown = "; ".join(f"{k} {i}: {e}" for k, i, e in failed[:5])
+        super().__init__(f"{len(failed)} queued write(s) failed: {shown}")
+
 class MetaStore:
-    def __init__(self, sqlite_path: str):
+    """
+    SQLite metadata store. One serialized writer connection (`conn`) plus a small pool of
+    read-only WAL reader connections, all with a large prepared-statement cache.
+    Use `MetaStore.shared(path)` to reuse one handle per database across the process.
+    `embedding_codec` ('f32' | 'f16' | 'i8') sets how ndarray embeddings passed to add_memory are stored.
+
+    With `write_behind=True`, add_artifact / add_memory / inc_recall only queue the write and a
+    writer thread commits queued rows in one transaction every `flush_ms` or `flush_rows` rows,
+    whichever comes first. Row ids are handed out in-process, so the store must be the only writer
+    of its database. Queued rows are not visible to readers until committed; call `flush()` when
+    they must be (tests, shutdown). `write_stats()` reports the achieved throughput. A batch that
+    fails is retried row by row, so only the offending rows are lost; each one is passed to
+    `on_write_error(kind, row_id, exc)` as it fails and raised as a WriteBehindError from the next
+    `flush()` or from `close()`.
+
+    `fts_artifacts` is kept in sync with `artifacts` by triggers (insert, delete, update).
+    `fts_automerge` / `fts_crisismerge` are stored in the FTS5 config table when given; see
+    FtsMaintainer for idle-time merging and the segment health report.
+    """
+
+    _shared: Dict[str, "MetaStore"] = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(
+        self,
+        sqlite_path: str,
+        readers: int = 4,
+        cached_statements: int = 256,
+        embedding_codec: str = "f32",
+        write_behind: bool = False,
+        flush_ms: float = 50.0,
+        flush_rows: int = 256,
+        fts_automerge: Optional[int] = None,
+        fts_crisismerge: Optional[int] = None,
+        on_write_error: Optional[Callable[[str, int, BaseException], None]] = None,
+    ):
+        if embedding_codec not in EMBEDDING_CODECS:
+            raise ValueError(f"unknown embedding codec {embedding_codec!r}; expected one of {EMBEDDING_CODECS}")
+        self.embedding_codec = embedding_codec
         self.path = Path(sqlite_path)
         self.path.parent.mkdir(parents=True, exist_ok=True)
-        self.conn = sqlite3.connect(str(self.path))
+        self._cached_statements = cached_statements
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False, cached_statements=cached_statements)
         self.conn.execute("PRAGMA foreign_keys=ON")
         self.conn.executescript(INIT_SQL)
+        self._migrate_schema()
+        for option, value in (("automerge", fts_automerge), ("crisismerge", fts_crisismerge)):
+            if value is not None:
+                self.conn.execute("INSERT INTO fts_artifacts(fts_artifacts, rank) VALUES(?, ?)", (option, int(value)))
+        self.conn.commit()
+        self._write_lock = threading.RLock()
+        self._max_readers = max(1, readers)
+        self._idle_readers: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._readers: List[sqlite3.Connection] = []
+        self._readers_lock = threading.Lock()
+        self._closed = False
+        self._stats = {"rows": 0, "transactions": 0, "busy_s": 0.0}
+        self.last_write = time.monotonic()
+        self.write_behind = write_behind
+        if write_behind:
+            self.flush_interval = flush_ms / 1000.0
+            self.flush_rows = max(1, flush_rows)
+            self._ops: "queue.Queue[tuple]" = queue.Queue()
+            self._id_lock = threading.Lock()
+            self._next_id = {
+                t: int(self.conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {t}").fetchone()[0]) + 1
+                for t in ("artifacts", "memories")
+            }
+            self.on_write_error = on_write_error
+            self._failed: List[Tuple[str, int, BaseException]] = []
+            self._failed_lock = threading.Lock()
+            self._writer = threading.Thread(target=self._write_loop, name="metastore-writer", daemon=True)
+            self._writer.start()
+
+    def _migrate_schema(self) -> None:
+        have = {r[1] for r in self.conn.execute("PRAGMA table_info(memories)")}
+        for name, decl in _MEMORY_COLUMNS.items():
+            if name not in have:
+                self.conn.execute(f"ALTER TABLE memories ADD COLUMN {name} {decl}")
+        self.conn.executescript(_MEMORY_INDEXES)
+
+    @classmethod
+    def shared(cls, sqlite_path: str, **kwargs) -> "MetaStore":
+        """
+        Process-wide store for `sqlite_path`; INIT_SQL runs only when the handle is first created.
+        Later calls get that same handle, so constructor options they pass must agree with the ones
+        it was created with (options left out are fine); a conflict raises ValueError.
+        """
+        key = str(Path(sqlite_path).resolve())
+        with cls._shared_lock:
+            store = cls._shared.get(key)
+            if store is None or store._closed:
+                store = cls._shared[key] = cls(sqlite_path, **kwargs)
+                defaults = inspect.signature(cls.__init__).parameters
+                store._shared_options = {n: p.default for n, p in defaults.items() if p.default is not p.empty}
+                store._shared_options.update(kwargs)
+                return store
+            opts = store._shared_options
+            conflicts = sorted(n for n, v in kwargs.items() if n not in opts or opts[n] != v)
+            if conflicts:
+                have = ", ".join(f"{n}={opts.get(n)!r}" for n in conflicts)
+                want = ", ".join(f"{n}={kwargs[n]!r}" for n in conflicts)
+                raise ValueError(f"MetaStore for {sqlite_path} is already open with {have}; got {want}")
+            return store
 
-    def close(self): self.conn.close()
+    def close(self):
+        with self._shared_lock:
+            for key, store in list(self._shared.items()):
+                if store is self:
+                    del self._shared[key]
+        if self._closed:
+            return
+        if self.write_behind:
+            self._ops.put(("stop", None))
+            self._writer.join()
+        self._closed = True
+        with self._readers_lock:
+            for c in self._readers:
+                c.close()
+            self._readers.clear()
+        with self._write_lock:
+            self.conn.close()
+        if self.write_behind:
+            self._raise_failed()
+
+    @contextmanager
+    def _reader(self) -> Iterator[sqlite3.Connection]:
+        try:
+            conn = self._idle_readers.get_nowait()
+        except queue.Empty:
+            conn = None
+            with self._readers_lock:
+                if len(self._readers) < self._max_readers:
+                    conn = sqlite3.connect(
+                        f"file:{self.path.resolve()}?mode=ro",
+                        uri=True,
+                        check_same_thread=False,
+                        cached_statements=self._cached_statements,
+                    )
+                    conn.execute("PRAGMA query_only=ON")
+                    self._readers.append(conn)
+            if conn is None:
+                conn = self._idle_readers.get()
+        try:
+            yield conn
+        finally:
+            self._idle_readers.put(conn)
 
     # Artifacts + FTS
     def add_artifact(self, cycle_id: int, kind: str, content: str, created_at: str) -> int:
-        cur = self.conn.cursor()
-        cur.execute(
-            "INSERT INTO artifacts(cycle_id,kind,content,created_at) VALUES(?,?,?,?)",
-            (cycle_id, kind, content, created_at),
-        )
-        rid = cur.lastrowid
-        cur.execute("INSERT INTO fts_artifacts(rowid, content) VALUES(?,?)", (rid, content))
-        self.conn.commit()
+        if self.write_behind:
+            rid = self._allocate_id("artifacts")
+            self._enqueue("artifact", (rid, cycle_id, kind, content, created_at))
+            return rid
+        t0 = time.perf_counter()
+        with self._write_lock:
+            cur = self.conn.cursor()
+            cur.execute(
+                "INSERT INTO artifacts(cycle_id,kind,content,created_at) VALUES(?,?,?,?)",
+                (cycle_id, kind, content, created_at),
+            )
+            rid = cur.lastrowid
+            self.conn.commit()
+            self._record_write(1, time.perf_counter() - t0)
         return int(rid)
 
     def get_artifacts_text(self, ids: Iterable[int]) -> Dict[int, str]:
-        ids_list = list(ids)
+        ids_list = [int(i) for i in ids]
         if not ids_list:
             return {}
-        placeholders = ",".join(["?"] * len(ids_list))
-        rows = self.conn.execute(
-            f"SELECT id, content FROM artifacts WHERE id IN ({placeholders})",
-            tuple(ids_list),
-        ).fetchall()
+        # json_each keeps the SQL text constant, so the prepared statement is reused.
+        with self._reader() as conn:
+            rows = conn.execute(
+                "SELECT id, content FROM artifacts WHERE id IN (SELECT value FROM json_each(?))",
+                (json.dumps(ids_list),),
+            ).fetchall()
         return {int(i): c for i, c in rows}
 
     # Memories
-    def add_memory(self, embedding: bytes, meta: dict, importance: float, uncertainty: float, created_at: str, provenance: str) -> int:
-        cur = self.conn.cursor()
-        cur.execute(
-            "INSERT INTO memories(embedding,meta,importance,uncertainty,created_at,provenance) VALUES(?,?,?,?,?,?)",
-            (embedding, json.dumps(meta), importance, uncertainty, created_at, provenance),
-        )
-        self.conn.commit()
+    def add_memory(
+        self,
+        embedding,
+        meta: dict,
+        importance: float,
+        uncertainty: float,
+        created_at: str,
+        provenance: str,
+        *,
+        content: Optional[str] = None,
+        kind: Optional[str] = None,
+        uid: Optional[str] = None,
+    ) -> int:
+        """`embedding` is either an already encoded BLOB or a vector, encoded with `embedding_codec`."""
+        if not isinstance(embedding, (bytes, bytearray, memoryview)) and embedding is not None:
+            embedding = encode_embedding(embedding, self.embedding_codec)
+        row = (embedding, json.dumps(meta), importance, uncertainty, created_at, provenance, uid, content, kind)
+        if self.write_behind:
+            mid = self._allocate_id("memories")
+            self._enqueue("memory", (mid,) + row)
+            return mid
+        t0 = time.perf_counter()
+        with self._write_lock:
+            cur = self.conn.cursor()
+            cur.execute(
+                "INSERT INTO memories(embedding,meta,importance,uncertainty,created_at,provenance,uid,content,kind) "
+                "VALUES(?,?,?,?,?,?,?,?,?)",
+                row,
+            )
+            self.conn.commit()
+            self._record_write(1, time.perf_counter() - t0)
         return int(cur.lastrowid)
 
+    def get_memories(self, ids: Iterable[int]) -> Dict[int, Dict]:
+        """Rows for `ids` as dicts (uid, content, kind, created_at, meta, importance, ...); missing ids are absent."""
+        ids_list = [int(i) for i in ids]
+        if not ids_list:
+            return {}
+        with self._reader() as conn:
+            rows = conn.execute(
+                "SELECT id, uid, content, kind, created_at, meta, importance, uncertainty, recall_count, provenance "
+                "FROM memories WHERE id IN (SELECT value FROM json_each(?))",
+                (json.dumps(ids_list),),
+            ).fetchall()
+        cols = ("uid", "content", "kind", "created_at", "meta", "importance", "uncertainty", "recall_count", "provenance")
+        return {int(r[0]): dict(zip(cols, r[1:])) for r in rows}
+
+    def memory_ids_for_uids(self, uids: Iterable[str]) -> Dict[str, int]:
+        uid_list = [str(u) for u in uids]
+        if not uid_list:
+            return {}
+        with self._reader() as conn:
+            rows = conn.execute(
+                "SELECT uid, id FROM memories WHERE uid IN (SELECT value FROM json_each(?))",
+                (json.dumps(uid_list),),
+            ).fetchall()
+        return {u: int(i) for u, i in rows}
+
+    def filter_memory_ids(
+        self,
+        kinds: Optional[List[str]] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        meta: Optional[Dict] = None,
+    ) -> np.ndarray:
+        """
+        Ids of memories matching every given filter: `kinds` membership, `since` <= created_at < `until`,
+        and exact values for top-level `meta` keys.
+        """
+        clauses: List[str] = []
+        params: List = []
+        if kinds is not None:
+            clauses.append("kind IN (SELECT value FROM json_each(?))")
+            params.append(json.dumps(list(kinds)))
+        if since is not None:
+            clauses.append("created_at >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("created_at < ?")
+            params.append(until)
+        for key, value in (meta or {}).items():
+            clauses.append("json_extract(meta, ?) = ?")
+            params.append('$."' + str(key).replace('"', '""') + '"')
+            params.append(value)
+        sql = "SELECT id FROM memories" + (" WHERE " + " AND ".join(clauses) if clauses else "")
+        with self._reader() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        return np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+
+    def delete_memories(self, ids: Iterable[int]) -> int:
+        """Delete memories by id, flushing queued writes first. Returns the number of rows removed."""
+        ids_list = [int(i) for i in ids]
+        if not ids_list:
+            return 0
+        self.flush()
+        with self._write_lock:
+            cur = self.conn.execute(
+                "DELETE FROM memories WHERE id IN (SELECT value FROM json_each(?))", (json.dumps(ids_list),)
+            )
+            self.conn.commit()
+        return cur.rowcount
+
+    def get_memory_embeddings(self, ids: Iterable[int]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Stored embeddings for `ids`, decoded to float32, as (found_ids, matrix), the matrix being one
+        contiguous (n, dim) array. Memories without an embedding, or whose dimension differs from the
+        first one found, are skipped.
+        """
+        ids_list = [int(i) for i in ids]
+        if not ids_list:
+            return np.empty(0, dtype=np.int64), np.empty((0, 0), dtype=np.float32)
+        with self._reader() as conn:
+            rows = conn.execute(
+                "SELECT id, embedding FROM memories WHERE id IN (SELECT value FROM json_each(?)) AND embedding IS NOT NULL",
+                (json.dumps(ids_list),),
+            ).fetchall()
+        vecs = [(i, decode_embedding(b)) for i, b in rows if b]
+        if not vecs:
+            return np.empty(0, dtype=np.int64), np.empty((0, 0), dtype=np.float32)
+        dim = vecs[0][1].shape[0]
+        vecs = [(i, v) for i, v in vecs if v.shape[0] == dim]
+        mat = np.empty((len(vecs), dim), dtype=np.float32)
+        for r, (_, v) in enumerate(vecs):
+            mat[r] = v
+        return np.fromiter((i for i, _ in vecs), dtype=np.int64, count=len(vecs)), mat
+
     def inc_recall(self, mem_id: int, by: int = 1) -> None:
-        self.conn.execute("UPDATE memories SET recall_count = recall_count + ? WHERE id = ?", (by, mem_id))
-        self.conn.commit()
+        if self.write_behind:
+            self._enqueue("recall", (int(mem_id), by))
+            return
+        t0 = time.perf_counter()
+        with self._write_lock:
+            self.conn.execute("UPDATE memories SET recall_count = recall_count + ? WHERE id = ?", (by, mem_id))
+            self.conn.commit()
+            self._record_write(1, time.perf_counter() - t0)
+
+    def inc_recall_many(self, mem_ids: Iterable[int], by: int = 1) -> None:
+        """inc_recall for several memories in one transaction (or one queue pass with write-behind)."""
+        counts = Counter(int(i) for i in mem_ids)
+        if not counts:
+            return
+        if self.write_behind:
+            for mid, n in counts.items():
+                self._enqueue("recall", (mid, by * n))
+            return
+        t0 = time.perf_counter()
+        with self._write_lock:
+            self.conn.executemany(
+                "UPDATE memories SET recall_count = recall_count + ? WHERE id = ?",
+                [(by * n, mid) for mid, n in counts.items()],
+            )
+            self.conn.commit()
+            self._record_write(len(counts), time.perf_counter() - t0)
+
+    # Write-behind queue
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """Block until every write queued so far is committed. Raises WriteBehindError for rows that failed."""
+        if not self.write_behind:
+            return
+        done = threading.Event()
+        self._enqueue("flush", done)
+        if not done.wait(timeout):
+            raise TimeoutError("MetaStore flush timed out")
+        self._raise_failed()
+
+    def _raise_failed(self) -> None:
+        with self._failed_lock:
+            failed, self._failed = self._failed, []
+        if failed:
+            raise WriteBehindError(failed)
 
-    # FTS search candidates (raw)
-    def fts_candidates(self, query: str, limit: int = 200) -> List[Tuple[int, str]]:
-        # naive OR query to broaden coverage
-        q = " OR ".join([t for t in query.split() if t.strip()])
-        if not q: return []
-        rows = self.conn.execute(
-            "SELECT rowid, content FROM fts_artifacts WHERE fts_artifacts MATCH ? LIMIT ?",
-            (q, limit)
-        ).fetchall()
-        return [(int(r[0]), r[1]) for r in rows]
+    def write_stats(self) -> Dict:
+        """Committed rows and transactions so far, and rows/sec over the time spent writing."""
+        with self._write_lock:
+            st = dict(self._stats)
+        st["rows_per_sec"] = st["rows"] / st["busy_s"] if st["busy_s"] else 0.0
+        st["rows_per_transaction"] = st["rows"] / st["transactions"] if st["transactions"] else 0.0
+        st["pending"] = self._ops.qsize() if self.write_behind else 0
+        return st
 
+    def _record_write(self, rows: int, seconds: float) -> None:
+        # called with self._write_lock held
+        self._stats["rows"] += rows
+        self._stats["transactions"] += 1
+        self._stats["busy_s"] += seconds
+        self.last_write = time.monotonic()
+
+    def _allocate_id(self, table: str) -> int:
+        with self._id_lock:
+            rid = self._next_id[table]
+            self._next_id[table] = rid + 1
+        return rid
+
+    def _enqueue(self, kind: str, payload) -> None:
+        if self._closed:
+            raise RuntimeError("MetaStore is closed")
+        self.last_write = time.monotonic()
+        self._ops.put((kind, payload))
+
+    def _write_loop(self) -> None:
+        stop = False
+        while not stop:
+            batch = [self._ops.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.flush_rows and batch[-1][0] not in ("flush", "stop"):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._ops.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            stop = batch[-1][0] == "stop"
+            try:
+                self._commit_batch(batch)
+            except Exception:
+                # the transaction was rolled back; commit what can be committed, one row at a time
+                for op in batch:
+                    if op[0] in ("artifact", "memory", "recall"):
+                        try:
+                            self._commit_batch([op])
+                        except Exception as exc:
+                            self._report_failure(op[0], int(op[1][0]), exc)
+            for kind, payload in batch:
+                if kind == "flush":
+                    payload.set()
+
+    def _report_failure(self, kind: str, row_id: int, exc: BaseException) -> None:
+        with self._failed_lock:
+            self._failed.append((kind, row_id, exc))
+        if self.on_write_error is not None:
+            try:
+                self.on_write_error(kind, row_id, exc)
+            except Exception:
+                pass
+
+    def _commit_batch(self, batch: List[tuple]) -> None:
+        artifacts = [p for k, p in batch if k == "artifact"]
+        memories = [p for k, p in batch if k == "memory"]
+        recalls: Counter = Counter()
+        for k, p in batch:
+            if k == "recall":
+                recalls[p[0]] += p[1]
+        rows = len(artifacts) + len(memories) + len(recalls)
+        if not rows:
+            return
+        t0 = time.perf_counter()
+        with self._write_lock:
+            with self.conn:
+                if artifacts:
+                    self.conn.executemany(
+                        "INSERT INTO artifacts(id,cycle_id,kind,content,created_at) VALUES(?,?,?,?,?)", artifacts
+                    )
+                if memories:
+                    self.conn.executemany(
+                        "INSERT INTO memories(id,embedding,meta,importance,uncertainty,created_at,provenance,uid,content,kind) "
+                        "VALUES(?,?,?,?,?,?,?,?,?,?)",
+                        memories,
+                    )
+                if recalls:
+                    # increments for the same memory are coalesced into one UPDATE
+                    self.conn.executemany(
+                        "UPDATE memories SET recall_count = recall_count + ? WHERE id = ?",
+                        [(by, mid) for mid, by in recalls.items()],
+                    )
+            self._record_write(rows, time.perf_counter() - t0)
+
+    # FTS index maintenance
+    def fts_segment_count(self) -> int:
+        """Number of b-tree segments in fts_artifacts, read from the FTS5 structure record."""
+        with self._reader() as conn:
+            row = conn.execute("SELECT block FROM fts_artifacts_data WHERE id = 10").fetchone()
+        if row is None:
+            return 0
+        blob = bytes(row[0])
+        pos = 8 if blob[4:8] == _FTS_STRUCTURE_V2 else 4  # 4-byte cookie, optional v2 marker
+        _, pos = _varint(blob, pos)  # nLevel
+        n_segment, _ = _varint(blob, pos)
+        return n_segment
+
+    def fts_merge(self, pages: int = 500) -> bool:
+        """One incremental merge step of about `pages` leaf pages. Returns False once there is nothing left to merge."""
+        with self._write_lock:
+            before = self.conn.total_changes
+            self.conn.execute("INSERT INTO fts_artifacts(fts_artifacts, rank) VALUES('merge', ?)", (int(pages),))
+            self.conn.commit()
+            # FTS5 reports no merge work as a change count below 2
+            return self.conn.total_changes - before >= 2
+
+    def fts_optimize(self) -> None:
+        """Merge every segment into one. Rewrites the whole index, so only run it when idle."""
+        with self._write_lock:
+            self.conn.execute("INSERT INTO fts_artifacts(fts_artifacts) VALUES('optimize')")
+            self.conn.commit()
+
+    # FTS search candidates, ranked inside SQLite
+    def fts_candidates(self, query: str, limit: int = 200) -> List[Tuple[int, float]]:
+        """
+        Top `limit` artifact ids matching any query term, best first, scored with FTS5's bm25()
+        (negated so that higher is better). Artifact text is not loaded here.
+        """
+        q = _fts_query(query)
+        if not q:
+            return []
+        with self._reader() as conn:
+            rows = conn.execute(
+                "SELECT rowid, -rank FROM fts_artifacts WHERE fts_artifacts MATCH ? ORDER BY rank LIMIT ?",
+                (q, limit)
+            ).fetchall()
+        return [(int(r[0]), float(r[1])) for r in rows]
+
+    def fts_snippets(self, query: str, ids: Iterable[int], tokens: int = 16) -> Dict[int, str]:
+        """Highlighted FTS5 snippets for a handful of already-ranked artifact ids."""
+        ids_list = [int(i) for i in ids]
+        q = _fts_query(query)
+        if not ids_list or not q:
+            return {}
+        with self._reader() as conn:
+            rows = conn.execute(
+                "SELECT rowid, snippet(fts_artifacts, 0, '[', ']', '…', ?) FROM fts_artifacts "
+                "WHERE fts_artifacts MATCH ? AND rowid IN (SELECT value FROM json_each(?))",
+                (tokens, q, json.dumps(ids_list)),
+            ).fetchall()
+        return {int(i): t for i, t in rows}
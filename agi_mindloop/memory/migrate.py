@@ -0,0 +1,131 @@
+"""
+Move existing memory files onto the unified MemoryEngine.
+
+    python -m agi_mindloop.memory.migrate [--config config/config.yaml] [--memory-db data/memory.db ...]
+                                          [--reindex] [--batch-size 256]
+
+- Rows of memory_loop.Memory databases (`--memory-db`, default: memoryloop.db_path from the config)
+  are re-embedded with the engine's model and stored in the engine's database and index. The old
+  UUID becomes the engine `uid`, so running the tool again skips rows already imported.
+- `--reindex` rebuilds the engine's HNSW index from the embeddings stored in SQLite, without
+  calling the model (use it when the index file is missing, was built with other parameters, or
+  when switching memory.shard_by).
+
+The old memory_loop files are only read, never modified.
+"""
+
+from __future__ import annotations
+import argparse, json, os, shutil, sqlite3
+from pathlib import Path
+from typing import List, Optional
+import numpy as np
+
+from .engine import MemoryEngine
+from .meta_store import decode_embedding
+from .sharded import ShardedVectorStore
+from .vector_store import _tombstone_path
+
+def import_memory_loop_db(engine: MemoryEngine, db_path: str, batch_size: int = 256) -> int:
+    """Copy a memory_loop.Memory database into `engine`. Returns the number of rows imported."""
+    src = sqlite3.connect(f"file:{os.path.abspath(db_path)}?mode=ro", uri=True)
+    autosave, engine.autosave = engine.autosave, False
+    imported = 0
+    try:
+        cur = src.execute("SELECT id, content, timestamp, type, metadata FROM memories ORDER BY timestamp, id")
+        while True:
+            rows = cur.fetchmany(batch_size)
+            if not rows:
+                break
+            known = engine.store.memory_ids_for_uids(r[0] for r in rows)
+            rows = [r for r in rows if r[0] not in known]
+            if not rows:
+                continue
+            engine.add_many(
+                [r[1] for r in rows],
+                [json.loads(r[4]) if r[4] else {} for r in rows],
+                kinds=[r[3] for r in rows],
+                uids=[r[0] for r in rows],
+                created_at=[r[2] for r in rows],
+                provenance="memory_loop",
+            )
+            imported += len(rows)
+    finally:
+        src.close()
+        engine.autosave = autosave
+    engine.save()
+    return imported
+
+def reindex_from_embeddings(engine: MemoryEngine, batch_size: int = 4096) -> int:
+    """Rebuild the engine's vector index (or shard directory) from stored embeddings. Returns the number indexed."""
+    engine.store.flush()
+    path = Path(engine.faiss_path)
+    tmp = path.with_name(path.name + ".reindex")
+    fresh = None
+    dim = 0
+    indexed = 0
+    with engine.store._reader() as conn:
+        cur = conn.execute(
+            "SELECT id, embedding, created_at, kind FROM memories WHERE embedding IS NOT NULL ORDER BY id"
+        )
+        while True:
+            rows = cur.fetchmany(batch_size)
+            if not rows:
+                break
+            rows = [(int(r[0]), decode_embedding(r[1]), r[2], r[3]) for r in rows if r[1]]
+            if fresh is None and rows:
+                dim = rows[0][1].shape[0]
+                fresh = engine.open_vectors(str(tmp), dim=dim)
+            rows = [r for r in rows if r[1].shape[0] == dim]
+            if rows:
+                engine.index_vectors(fresh, [r[0] for r in rows], np.stack([r[1] for r in rows]),
+                                     [r[2] for r in rows], [r[3] for r in rows])
+                indexed += len(rows)
+    if fresh is None:
+        return 0
+    fresh.save()
+    if isinstance(fresh, ShardedVectorStore):
+        fresh.close()
+    if isinstance(engine._vectors, ShardedVectorStore):
+        engine._vectors.close()
+    # the old layout may be a single file or a shard directory, whichever the engine used before
+    if path.is_dir():
+        shutil.rmtree(path)
+    elif tmp.is_dir() and path.exists():
+        path.unlink()
+    stale = _tombstone_path(path)
+    if stale.exists():
+        stale.unlink()
+    os.replace(tmp, path)
+    if not tmp.is_dir() and _tombstone_path(tmp).exists():
+        os.replace(_tombstone_path(tmp), stale)
+    engine._vectors = None
+    return indexed
+
+def main(argv: Optional[List[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--config", default=str(Path(__file__).resolve().parents[2] / "config" / "config.yaml"))
+    ap.add_argument("--memory-db", action="append", help="memory_loop database to import (repeatable)")
+    ap.add_argument("--reindex", action="store_true", help="rebuild the vector index from stored embeddings")
+    ap.add_argument("--batch-size", type=int, default=256)
+    args = ap.parse_args(argv)
+
+    from ..config import load_config
+    cfg = load_config(args.config)
+    engine = MemoryEngine(
+        cfg.memory.sqlite_path, cfg.memory.faiss_path,
+        storage=cfg.memory.index_storage, embedding_codec=cfg.memory.embedding_codec,
+        shard_by=cfg.memory.shard_by or None,
+    )
+    try:
+        sources = args.memory_db or [p for p in [cfg.memoryloop.db_path] if Path(p).exists()]
+        for db in sources:
+            n = import_memory_loop_db(engine, db, batch_size=args.batch_size)
+            print(f"{db}: imported {n} memories into {cfg.memory.sqlite_path}")
+        if args.reindex:
+            n = reindex_from_embeddings(engine)
+            print(f"{cfg.memory.faiss_path}: indexed {n} stored embeddings")
+    finally:
+        engine.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+# Novelty pre-gate: reject near-duplicate memory candidates before they reach the LLM judges.
+
+from __future__ import annotations
+import hashlib, re, threading
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+import numpy as np
+
+_WORD = re.compile(r"\w+")
+_MASK32 = np.uint64(0xFFFFFFFF)
+
+@dataclass
+class NoveltyVerdict:
+    novel: bool
+    similarity: Optional[float]          # best cosine against the memory index (None if not checked)
+    minhash_similarity: Optional[float]  # best estimated Jaccard against recent candidates
+    reason: str = ""
+
+class MinHasher:
+    """
+    MinHash signatures of word `shingle`-grams with `num_perm` multiply-shift hash functions
+    (fixed seed, so signatures are comparable across runs). Jaccard similarity of two texts is
+    estimated as the fraction of equal signature slots.
+    """
+
+    def __init__(self, num_perm: int = 64, shingle: int = 3, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.shingle = shingle
+        self._a = rng.integers(1, 2**63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+        self._b = rng.integers(0, 2**63, size=num_perm, dtype=np.uint64)
+
+    def _shingles(self, text: str) -> List[str]:
+        words = _WORD.findall(text.lower())
+        if len(words) <= self.shingle:
+            return [" ".join(words)]
+        return [" ".join(words[i:i + self.shingle]) for i in range(len(words) - self.shingle + 1)]
+
+    def signature(self, text: str) -> np.ndarray:
+        x = np.fromiter(
+            (int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "little")
+             for s in set(self._shingles(text))),
+            dtype=np.uint64,
+        )
+        # uint64 arithmetic wraps mod 2**64, which is what multiply-shift hashing needs
+        h = (self._a[:, None] * x[None, :] + self._b[:, None]) >> np.uint64(32)
+        return (h & _MASK32).min(axis=1)
+
+class NoveltyGate:
+    """
+    Local pre-gate for should_store, run before the two judge calls.
+
+    - `similarity(text) -> float`: best cosine of the text against stored memories (e.g.
+      Memory.max_similarity); a candidate at or above `threshold` is a duplicate.
+    - MinHash (`minhash_threshold > 0`): estimated Jaccard against the last `history` candidates
+      that passed the gate, which also catches repeats not yet in the index.
+
+    Only candidates that clear both checks go to the judges; `stats()` counts the skipped judge calls.
+    """
+
+    def __init__(
+        self,
+        similarity: Optional[Callable[[str], float]] = None,
+        threshold: float = 0.92,
+        minhash_threshold: float = 0.0,
+        history: int = 2048,
+        num_perm: int = 64,
+        shingle: int = 3,
+    ):
+        self.similarity = similarity
+        self.threshold = threshold
+        self.minhash_threshold = minhash_threshold
+        self.history = history
+        self._hasher = MinHasher(num_perm=num_perm, shingle=shingle) if minhash_threshold > 0 else None
+        self._sigs = np.zeros((0, num_perm), dtype=np.uint64)
+        self._lock = threading.Lock()
+        self._stats = {"checked": 0, "novel": 0, "duplicate_index": 0, "duplicate_minhash": 0, "errors": 0}
+
+    def check(self, text: str) -> NoveltyVerdict:
+        with self._lock:
+            self._stats["checked"] += 1
+        sim = None
+        if self.similarity is not None:
+            try:
+                sim = float(self.similarity(text))
+            except Exception:
+                # an unavailable index must not block storage; the judges still decide
+                with self._lock:
+                    self._stats["errors"] += 1
+            if sim is not None and sim >= self.threshold:
+                with self._lock:
+                    self._stats["duplicate_index"] += 1
+                return NoveltyVerdict(False, sim, None, f"similarity {sim:.3f} >= {self.threshold}")
+
+        jac = None
+        if self._hasher is not None:
+            sig = self._hasher.signature(text)
+            with self._lock:
+                if len(self._sigs):
+                    jac = float((self._sigs == sig).mean(axis=1).max())
+                if jac is not None and jac >= self.minhash_threshold:
+                    self._stats["duplicate_minhash"] += 1
+                    return NoveltyVerdict(False, sim, jac, f"minhash {jac:.3f} >= {self.minhash_threshold}")
+                self._sigs = np.vstack([self._sigs, sig[None, :]])[-self.history:]
+
+        with self._lock:
+            self._stats["novel"] += 1
+        return NoveltyVerdict(True, sim, jac)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            st = dict(self._stats)
+        st["skipped"] = st["duplicate_index"] + st["duplicate_minhash"]
+        st["judge_calls_saved"] = 2 * st["skipped"]
+        return st
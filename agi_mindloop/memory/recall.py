@@ -1,69 +1,113 @@
 from __future__ import annotations
-import math, re
-from typing import List, Dict, Tuple
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, List, Dict, Optional
 import numpy as np
 from .vector_store import VectorStore
 from .meta_store import MetaStore
 
-_word = re.compile(r"[A-Za-z0-9_]+")
+if TYPE_CHECKING:
+    from .tiering import TieredSearch
 
-def _tokenize(t: str) -> List[str]:
-    return [w.lower() for w in _word.findall(t or "")]
+@dataclass
+class RecallResult:
+    items: List[Dict]
+    timings: Dict[str, float] = field(default_factory=dict)  # milliseconds per stage
 
-def _bm25_scores(query: str, docs: List[Tuple[int, str]], k1: float = 1.2, b: float = 0.75) -> Dict[int, float]:
-    q_terms = _tokenize(query)
-    if not q_terms or not docs: return {}
-    # tokenize docs
-    toks = {doc_id: _tokenize(txt) for doc_id, txt in docs}
-    N = len(docs)
-    dl = {doc_id: len(ts) for doc_id, ts in toks.items()}
-    avgdl = (sum(dl.values()) / max(N, 1)) or 1.0
-    # document frequencies
-    df: Dict[str, int] = {}
-    for ts in toks.values():
-        for t in set(ts):
-            if t in q_terms:
-                df[t] = df.get(t, 0) + 1
-    # compute
-    scores: Dict[int, float] = {doc_id: 0.0 for doc_id, _ in docs}
-    for t in q_terms:
-        n_qi = df.get(t, 0)
-        if n_qi == 0: continue
-        idf = math.log((N - n_qi + 0.5) / (n_qi + 0.5) + 1.0)
-        for doc_id, ts in toks.items():
-            f_qi = ts.count(t)
-            denom = f_qi + k1 * (1 - b + b * (dl[doc_id] / avgdl))
-            scores[doc_id] += idf * ((f_qi * (k1 + 1)) / max(denom, 1e-9))
-    return scores
-
-def _norm_scores(d: Dict[int, float]) -> Dict[int, float]:
-    if not d: return {}
-    m = max(d.values()) or 1.0
-    return {k: (v / m) for k, v in d.items()}
-
-def hybrid_recall(sqlite_path: str, vs: VectorStore, q_emb: np.ndarray, query_text: str, k: int = 8, alpha: float = 0.7) -> List[Dict]:
+def two_stage_recall(
+    sqlite_path: Optional[str],
+    vs: VectorStore,
+    q_emb: np.ndarray,
+    query_text: str,
+    k: int = 8,
+    alpha: float = 0.7,
+    store: Optional[MetaStore] = None,
+    tier: Optional["TieredSearch"] = None,
+) -> RecallResult:
     """
-    Returns top-k mixed results from semantic (memories via FAISS) and keyword (artifacts via FTS).
-    Output: [{kind: 'memory'|'artifact', id, cosine, bm25, score}]
+    Stage 1 gathers candidates: memories from FAISS (through the hot tier when `tier` is given),
+    artifacts from FTS5 (bm25-ranked in SQLite).
+    Stage 2 loads the stored embeddings of the memory candidates as one float32 matrix, re-scores
+    them exactly with a single matmul, and fuses cosine and lexical features for every candidate
+    in one vectorized pass. Only the final top-k are turned into dicts.
+    Artifacts have no stored embedding, so their cosine feature is 0; memories whose embedding is
+    missing keep their ANN score.
     """
-    # semantic
-    sem_hits = vs.search(q_emb.reshape(1, -1), max(k * 3, k))
-    sem = {mem_id: max(0.0, min(1.0, (cos))) for mem_id, cos in sem_hits}  # inner product on normalized vec ≈ cosine
-    # keyword
-    ms = MetaStore(sqlite_path)
-    docs = ms.fts_candidates(query_text, limit=200)
-    bm25_raw = _bm25_scores(query_text, docs)
-    bm25 = _norm_scores(bm25_raw)
+    t0 = time.perf_counter()
+    ms = store if store is not None else MetaStore.shared(sqlite_path)
+    q = np.asarray(q_emb, dtype=np.float32).reshape(-1)
+
+    # stage 1: candidates
+    if tier is not None:
+        sem_hits = tier.search_many(q.reshape(1, -1), max(k * 3, k))[0]
+    else:
+        sem_hits = vs.search(q.reshape(1, -1), max(k * 3, k))
+    # only the best k artifacts can reach the fused top-k, so that is all FTS5 has to return
+    lex_hits = ms.fts_candidates(query_text, limit=k)
+    t1 = time.perf_counter()
 
-    # rank separately then fuse
-    items: List[Dict] = []
-    for mid, cos in sem.items():
-        items.append({"kind": "memory", "id": mid, "cosine": cos, "bm25": 0.0, "score": alpha * cos})
-    for aid, _txt in docs:
-        b = bm25.get(aid, 0.0)
-        items.append({"kind": "artifact", "id": aid, "cosine": 0.0, "bm25": b, "score": (1 - alpha) * b})
+    # stage 2: vectorized re-scoring
+    n_sem, n_lex = len(sem_hits), len(lex_hits)
+    kinds = np.concatenate([np.zeros(n_sem, dtype=np.int8), np.ones(n_lex, dtype=np.int8)])
+    ids = np.fromiter([i for i, _ in sem_hits] + [i for i, _ in lex_hits], dtype=np.int64, count=n_sem + n_lex)
+    cos = np.zeros(n_sem + n_lex, dtype=np.float32)
+    bm25 = np.zeros(n_sem + n_lex, dtype=np.float32)
+    if n_sem:
+        cos[:n_sem] = [c for _, c in sem_hits]
+        found, emb = ms.get_memory_embeddings(ids[:n_sem])
+        if found.size and emb.shape[1] == q.shape[0]:
+            exact = (emb @ q) / ((np.linalg.norm(emb, axis=1) * np.linalg.norm(q)) + 1e-12)
+            pos = {int(m): r for r, m in enumerate(ids[:n_sem].tolist())}
+            cos[[pos[int(m)] for m in found.tolist()]] = exact
+    if n_lex:
+        raw = np.fromiter((sc for _, sc in lex_hits), dtype=np.float32, count=n_lex)
+        bm25[n_sem:] = raw / (raw.max() or 1.0)
+    np.clip(cos, 0.0, 1.0, out=cos)
+    score = alpha * cos + (1 - alpha) * bm25
+    take = min(k, score.size)
+    top = np.argpartition(-score, take - 1)[:take] if take else np.empty(0, dtype=np.int64)
+    top = top[np.argsort(-score[top], kind="stable")]
+    t2 = time.perf_counter()
 
-    # take top-k by score
-    items.sort(key=lambda x: x["score"], reverse=True)
-    return items[:k]
+    items: List[Dict] = [
+        {
+            "kind": "memory" if kinds[i] == 0 else "artifact",
+            "id": int(ids[i]),
+            "cosine": float(cos[i]),
+            "bm25": float(bm25[i]),
+            "score": float(score[i]),
+        }
+        for i in top.tolist()
+    ]
+    snippets = ms.fts_snippets(query_text, [it["id"] for it in items if it["kind"] == "artifact"])
+    for it in items:
+        if it["kind"] == "artifact":
+            it["snippet"] = snippets.get(it["id"], "")
+    t3 = time.perf_counter()
 
+    return RecallResult(
+        items=items,
+        timings={
+            "candidates_ms": (t1 - t0) * 1000.0,
+            "rescore_ms": (t2 - t1) * 1000.0,
+            "materialize_ms": (t3 - t2) * 1000.0,
+            "total_ms": (t3 - t0) * 1000.0,
+        },
+    )
+
+def hybrid_recall(
+    sqlite_path: Optional[str],
+    vs: VectorStore,
+    q_emb: np.ndarray,
+    query_text: str,
+    k: int = 8,
+    alpha: float = 0.7,
+    store: Optional[MetaStore] = None,
+) -> List[Dict]:
+    """
+    Returns top-k mixed results from semantic (memories via FAISS) and keyword (artifacts via FTS).
+    Pass an open `store` to reuse it; otherwise the process-wide MetaStore for `sqlite_path` is used.
+    See `two_stage_recall` for scoring and per-stage timings.
+    Output: [{kind: 'memory'|'artifact', id, cosine, bm25, score}], artifacts also carry 'snippet'.
+    """
+    return two_stage_recall(sqlite_path, vs, q_emb, query_text, k=k, alpha=alpha, store=store).items
@@ -0,0 +1,205 @@
+# Partitioned vector index: one VectorStore file per month or memory type, searched in parallel.
+
+from __future__ import annotations
+import heapq, json, re, threading
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+
+from .vector_store import VectorStore
+
+PARTITIONS = ("month", "kind")
+_SAFE = re.compile(r"[^A-Za-z0-9_.-]+")
+_MONTH = re.compile(r"\d{4}-\d{2}")
+
+def _clean(key: str) -> str:
+    # keys become file names
+    return _SAFE.sub("_", key) or "unknown"
+
+def partition_key(partition: str, created_at: Optional[str] = None, kind: Optional[str] = None) -> str:
+    """Shard key for a memory: 'YYYY-MM' of its ISO timestamp, or its kind."""
+    if partition == "month":
+        return _clean((created_at or "")[:7])
+    if partition == "kind":
+        return _clean(kind or "")
+    raise ValueError(f"unknown partition {partition!r}; expected one of {PARTITIONS}")
+
+class ShardedVectorStore:
+    """
+    Drop-in for VectorStore (add / remove / search / search_many / save / rebuild) over a directory
+    of shards, `shard-<key>.faiss`, each a VectorStore with its own tombstone sidecar. Rebuilds,
+    saves and snapshots only touch the shards that changed.
+
+    - `add(ids, vectors, keys)` routes each vector to the shard of its key (see `partition_key`).
+    - `search_many` fans out to the selected shards in a thread pool (FAISS releases the GIL) and
+      merges the per-shard top-k lists with a heap. `keys=` restricts the search to some shards;
+      `keys_for(since, until, kinds)` computes that set from a time or type filter.
+    - Sealed shards are memory-mapped read-only. With month partitioning, `save()` seals every
+      shard older than the newest month when `auto_seal` is on; keys that are not a month, such
+      as "unknown" for memories without a timestamp, are left alone. `seal(key)` seals one explicitly.
+      Adding to a sealed shard reopens it writable.
+    The seal state is recorded in `shards.json` so sealed shards reopen memory-mapped.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        dim: int = 1024,
+        partition: str = "month",
+        M: int = 32,
+        storage: str = "flat",
+        ef_search: int = 16,
+        max_workers: int = 4,
+        auto_seal: bool = True,
+    ):
+        if partition not in PARTITIONS:
+            raise ValueError(f"unknown partition {partition!r}; expected one of {PARTITIONS}")
+        self.dir = Path(directory)
+        self.partition = partition
+        self.M = M
+        self.storage = storage
+        self.ef_search = ef_search
+        self.auto_seal = auto_seal and partition == "month"
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="shard-search")
+        self._lock = threading.RLock()
+        self._dirty: set = set()
+        manifest = self.dir / "shards.json"
+        meta = json.loads(manifest.read_text()) if manifest.exists() else {}
+        self.dim = int(meta.get("dim", dim))
+        sealed = set(meta.get("sealed", []))
+        self.shards: Dict[str, VectorStore] = {}
+        for path in sorted(self.dir.glob("shard-*.faiss")):
+            key = path.name[len("shard-"):-len(".faiss")]
+            self.shards[key] = VectorStore(str(path), dim=self.dim, M=M, storage=storage, ef_search=ef_search,
+                                           mmap=key in sealed)
+
+    def _path(self, key: str) -> Path:
+        return self.dir / f"shard-{key}.faiss"
+
+    def _shard(self, key: str) -> VectorStore:
+        vs = self.shards.get(key)
+        if vs is None:
+            vs = self.shards[key] = VectorStore(str(self._path(key)), dim=self.dim, M=self.M,
+                                                storage=self.storage, ef_search=self.ef_search)
+        elif vs.read_only:
+            # late write into a sealed shard: reopen it writable
+            vs = self.shards[key] = VectorStore(str(vs.path), dim=self.dim, M=self.M, storage=self.storage,
+                                                ef_search=self.ef_search)
+        return vs
+
+    @property
+    def tombstones(self) -> set:
+        return set(chain.from_iterable(vs.tombstones for vs in self.shards.values()))
+
+    @property
+    def sealed(self) -> List[str]:
+        return sorted(k for k, vs in self.shards.items() if vs.read_only)
+
+    # writes
+    def add(self, ids: Iterable[int], vectors: np.ndarray, keys: Sequence[str]) -> None:
+        ids = np.fromiter(ids, dtype=np.int64)
+        vectors = np.asarray(vectors, dtype=np.float32)
+        keys = [_clean(k) for k in keys]
+        if len(keys) != ids.size:
+            raise ValueError("one shard key per vector is required")
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                rows = [r for r, k in enumerate(keys) if k == key]
+                self._shard(key).add(ids[rows], vectors[rows])
+                self._dirty.add(key)
+
+    def remove(self, ids: Iterable[int]) -> None:
+        ids = np.fromiter(ids, dtype=np.int64)
+        with self._lock:
+            for key, vs in self.shards.items():
+                hit = ids[np.isin(ids, vs.ids())]
+                if hit.size:
+                    vs.remove(hit.tolist())
+                    self._dirty.add(key)
+
+    def rebuild(self) -> int:
+        """Rebuild shards that carry tombstones (sealed ones are re-sealed). Returns the live count."""
+        live = 0
+        with self._lock:
+            for key, vs in list(self.shards.items()):
+                if vs.tombstones:
+                    was_sealed = vs.read_only
+                    live += vs.rebuild()
+                    self._dirty.add(key)
+                    if was_sealed:
+                        self.seal(key)
+                else:
+                    live += int(vs.ids().size)
+        return live
+
+    def seal(self, key: str) -> None:
+        with self._lock:
+            vs = self.shards[key]
+            if vs.read_only:
+                return
+            vs.save()
+            self._dirty.discard(key)
+            self.shards[key] = VectorStore(str(vs.path), dim=self.dim, M=self.M, storage=self.storage,
+                                           ef_search=self.ef_search, mmap=True)
+            self._write_manifest()
+
+    def save(self) -> None:
+        with self._lock:
+            self.dir.mkdir(parents=True, exist_ok=True)
+            for key in sorted(self._dirty):
+                self.shards[key].save()
+            self._dirty.clear()
+            # only month keys take part: "unknown" (no timestamp) sorts after every date
+            months = [k for k in self.shards if _MONTH.fullmatch(k)]
+            if self.auto_seal and months:
+                newest = max(months)
+                for key in [k for k in months if k < newest and not self.shards[k].read_only]:
+                    self.seal(key)
+            self._write_manifest()
+
+    def _write_manifest(self) -> None:
+        self.dir.mkdir(parents=True, exist_ok=True)
+        tmp = self.dir / "shards.json.tmp"
+        tmp.write_text(json.dumps({"partition": self.partition, "dim": self.dim, "sealed": self.sealed}))
+        tmp.replace(self.dir / "shards.json")
+
+    # reads
+    def keys_for(
+        self, since: Optional[str] = None, until: Optional[str] = None, kinds: Optional[Sequence[str]] = None
+    ) -> Optional[List[str]]:
+        """Shards that can hold matches for a time range (ISO strings) or kinds; None means all."""
+        if self.partition == "month" and (since is not None or until is not None):
+            lo, hi = (since or "")[:7], (until or "")[:7]
+            return [k for k in self.shards if (not lo or k >= lo) and (not hi or k <= hi)]
+        if self.partition == "kind" and kinds is not None:
+            wanted = {_clean(k) for k in kinds}
+            return [k for k in self.shards if k in wanted]
+        return None
+
+    def search_many(
+        self,
+        queries: np.ndarray,
+        k: int,
+        ef_search: Optional[int] = None,
+        allow_ids: Optional[Iterable[int]] = None,
+        keys: Optional[Sequence[str]] = None,
+    ) -> List[List[Tuple[int, float]]]:
+        q = np.asarray(queries, dtype=np.float32).reshape(-1, self.dim)
+        allow = None if allow_ids is None else np.fromiter(allow_ids, dtype=np.int64)
+        with self._lock:
+            shards = [vs for key, vs in self.shards.items() if keys is None or key in keys]
+        if not shards:
+            return [[] for _ in range(q.shape[0])]
+        per_shard = list(self._pool.map(lambda vs: vs.search_many(q, k, ef_search=ef_search, allow_ids=allow), shards))
+        return [
+            heapq.nlargest(k, chain.from_iterable(res[r] for res in per_shard), key=lambda hit: hit[1])
+            for r in range(q.shape[0])
+        ]
+
+    def search(self, query: np.ndarray, k: int, ef_search: Optional[int] = None) -> List[Tuple[int, float]]:
+        return self.search_many(np.asarray(query).reshape(-1, self.dim)[:1], k, ef_search=ef_search)[0]
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=True)
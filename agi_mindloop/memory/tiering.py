@@ -0,0 +1,161 @@
+# Hot/cold tiering: a small exact in-RAM index of frequently recalled memories in front of the HNSW index.
+
+from __future__ import annotations
+import threading, time
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+import faiss
+
+from .meta_store import MetaStore, decode_embedding
+from .vector_store import VectorStore, _norm
+
+class TieredSearch:
+    """
+    Hot tier: exact inner-product search (IndexFlatIP) over the `capacity` memories with the highest
+    recall_count, newest first among equals. A query is answered from the hot tier alone when it
+    returns k hits and the k-th score is at least `threshold`; otherwise the cold VectorStore is
+    searched. Every returned memory gets its recall_count bumped (cheap with a write-behind
+    MetaStore) unless the search passes `count=False` (probes that are not recalls), and every `rebalance_every` queries the hot set is re-selected from those counts,
+    which promotes newly popular memories and evicts cooled-off ones. That re-selection runs on a
+    background thread; queries keep using the previous hot set (or the cold index, before the
+    first one) until it is swapped in.
+
+    `stats()` reports the hot hit rate and an estimate of the latency saved, using a running
+    average of cold-search latency.
+    """
+
+    def __init__(
+        self,
+        store: MetaStore,
+        cold: VectorStore,
+        capacity: int = 2048,
+        threshold: float = 0.6,
+        rebalance_every: int = 256,
+        count_recalls: bool = True,
+    ):
+        self.store = store
+        self.cold = cold
+        self.capacity = capacity
+        self.threshold = threshold
+        self.rebalance_every = rebalance_every
+        self.count_recalls = count_recalls
+        self._hot: Optional[faiss.Index] = None
+        self._hot_ids: set = set()
+        self._lock = threading.Lock()
+        self._since_rebalance = 0
+        self._stats = {"queries": 0, "hot_hits": 0, "hot_ms": 0.0, "cold_ms": 0.0, "cold_queries": 0,
+                       "saved_ms": 0.0, "promoted": 0, "evicted": 0, "rebalances": 0}
+        self._cold_ms_avg: Optional[float] = None
+        self._rebalancer: Optional[threading.Thread] = None
+
+    @property
+    def hot_size(self) -> int:
+        return len(self._hot_ids)
+
+    def rebalance(self) -> Dict[str, int]:
+        """Re-select the hot set from recall counts. Returns how many memories were promoted and evicted."""
+        self.store.flush()
+        dead = self.cold.tombstones
+        with self.store._reader() as conn:
+            rows = conn.execute(
+                "SELECT id, embedding FROM memories WHERE embedding IS NOT NULL "
+                "ORDER BY recall_count DESC, created_at DESC, id DESC LIMIT ?",
+                (self.capacity + len(dead),),
+            ).fetchall()
+        picked = [(int(i), decode_embedding(b)) for i, b in rows if b and int(i) not in dead]
+        picked = [(i, v) for i, v in picked if v.shape[0] == self.cold.dim][: self.capacity]
+        index = faiss.IndexIDMap2(faiss.IndexFlatIP(self.cold.dim))
+        if picked:
+            index.add_with_ids(_norm(np.stack([v for _, v in picked])), np.fromiter((i for i, _ in picked), dtype=np.int64))
+        new_ids = {i for i, _ in picked}
+        with self._lock:
+            moved = {"promoted": len(new_ids - self._hot_ids), "evicted": len(self._hot_ids - new_ids)}
+            self._hot, self._hot_ids = index, new_ids
+            self._since_rebalance = 0
+            self._stats["promoted"] += moved["promoted"]
+            self._stats["evicted"] += moved["evicted"]
+            self._stats["rebalances"] += 1
+        return moved
+
+    def _maybe_rebalance(self) -> None:
+        with self._lock:
+            due = self._hot is None or self._since_rebalance >= self.rebalance_every
+            if not due or (self._rebalancer is not None and self._rebalancer.is_alive()):
+                return
+            self._rebalancer = threading.Thread(target=self._rebalance_in_background, name="tier-rebalance",
+                                                daemon=True)
+            self._rebalancer.start()
+
+    def _rebalance_in_background(self) -> None:
+        try:
+            self.rebalance()
+        except Exception:
+            # e.g. the store closed under us; the next due query tries again
+            with self._lock:
+                self._stats["rebalance_errors"] = self._stats.get("rebalance_errors", 0) + 1
+
+    def wait_for_rebalance(self, timeout: Optional[float] = None) -> None:
+        t = self._rebalancer
+        if t is not None:
+            t.join(timeout)
+
+    def discard(self, ids: Iterable[int]) -> None:
+        """Drop removed memories from the hot tier right away instead of at the next rebalance."""
+        ids = np.fromiter(ids, dtype=np.int64)
+        with self._lock:
+            if self._hot is not None and ids.size:
+                self._hot.remove_ids(faiss.IDSelectorBatch(ids))
+                self._hot_ids.difference_update(ids.tolist())
+
+    def search_many(
+        self, queries: np.ndarray, k: int, allow_ids: Optional[np.ndarray] = None, count: bool = True
+    ) -> List[List[Tuple[int, float]]]:
+        """Filtered queries (`allow_ids`) always go to the cold index, which handles selective filters itself."""
+        self._maybe_rebalance()
+        q = _norm(np.asarray(queries).reshape(-1, self.cold.dim))
+        results: List[Optional[List[Tuple[int, float]]]] = [None] * q.shape[0]
+
+        t0 = time.perf_counter()
+        with self._lock:
+            hot = self._hot
+            enough = allow_ids is None and hot is not None and len(self._hot_ids) >= k
+        if enough:
+            D, I = hot.search(q, k)
+            for r in range(q.shape[0]):
+                if I[r, k - 1] != -1 and D[r, k - 1] >= self.threshold:
+                    results[r] = [(int(i), float(s)) for i, s in zip(I[r], D[r])]
+        hot_ms = (time.perf_counter() - t0) * 1000.0
+        hits = sum(r is not None for r in results)
+
+        cold_rows = [r for r, res in enumerate(results) if res is None]
+        cold_ms = 0.0
+        if cold_rows:
+            t1 = time.perf_counter()
+            for r, res in zip(cold_rows, self.cold.search_many(q[cold_rows], k, allow_ids=allow_ids)):
+                results[r] = res
+            cold_ms = (time.perf_counter() - t1) * 1000.0
+
+        with self._lock:
+            st = self._stats
+            st["queries"] += q.shape[0]
+            st["hot_hits"] += hits
+            st["hot_ms"] += hot_ms
+            st["cold_ms"] += cold_ms
+            st["cold_queries"] += len(cold_rows)
+            if cold_rows:
+                per_query = cold_ms / len(cold_rows)
+                self._cold_ms_avg = per_query if self._cold_ms_avg is None else 0.9 * self._cold_ms_avg + 0.1 * per_query
+            if hits and self._cold_ms_avg is not None:
+                st["saved_ms"] += max(0.0, hits * self._cold_ms_avg - hot_ms * hits / q.shape[0])
+            self._since_rebalance += q.shape[0]
+
+        if self.count_recalls and count:
+            self.store.inc_recall_many(i for res in results for i, _ in res)
+        return results  # type: ignore[return-value]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            st = dict(self._stats)
+            st["hot_size"] = len(self._hot_ids)
+        st["hit_rate"] = st["hot_hits"] / st["queries"] if st["queries"] else 0.0
+        return st
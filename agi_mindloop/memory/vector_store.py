@@ -2,7 +2,7 @@
 
 from __future__ import annotations
 from pathlib import Path
-from typing import Iterable, List, Tuple
+from typing import Iterable, List, Optional, Tuple
 import numpy as np
 import faiss
 
@@ -11,36 +11,208 @@ def _norm(v: np.ndarray) -> np.ndarray:
     n = np.linalg.norm(v, axis=1, keepdims=True) + 1e-12
     return v / n
 
+# storage -> scalar quantizer type (None = full float32 vectors)
+STORAGE_TYPES = {"flat": None, "fp16": "QT_fp16", "sq8": "QT_8bit"}
+
+def _hnsw(dim: int, M: int, storage: str) -> "faiss.Index":
+    if storage not in STORAGE_TYPES:
+        raise ValueError(f"unknown storage {storage!r}; expected one of {sorted(STORAGE_TYPES)}")
+    qt = STORAGE_TYPES[storage]
+    if qt is None:
+        return faiss.IndexHNSWFlat(dim, M, faiss.METRIC_INNER_PRODUCT)
+    return faiss.IndexHNSWSQ(dim, getattr(faiss.ScalarQuantizer, qt), M, faiss.METRIC_INNER_PRODUCT)
+
+def _tombstone_path(path: Path) -> Path:
+    return path.with_name(path.name + ".tombstones.npy")
+
 class VectorStore:
-    def __init__(self, faiss_path: str, dim: int = 1024, M: int = 32):
+    """
+    HNSW index over L2-normalized vectors behind an IDMap2.
+    storage: 'flat' keeps float32 vectors (4 bytes/dim), 'fp16' halves that, 'sq8' stores one byte
+    per dim. sq8 needs per-dimension ranges: call `train(sample)` with representative vectors, or the
+    first `add` trains on its batch when it has at least `min_train` rows and otherwise falls back to
+    the [-1, 1] bounds that hold for any normalized vector.
+
+    HNSW cannot delete in place, so `remove` either tombstones ids (filtered at search time with an
+    IDSelector, dropped by the next `rebuild`) or, with remove_strategy='rebuild', rebuilds at once.
+    Adding a tombstoned id again revives it (rebuilding first if its old vector is still stored);
+    `save` writes the index and the updated tombstones together.
+
+    With `mmap=True` an existing index file is memory-mapped read-only (sealed): it can be searched
+    and tombstoned, and `add` raises until the store is rebuilt or reopened writable.
+
+    `search_many(allow_ids=...)` restricts results to an id allow-list; lists of at most
+    `brute_force_max` ids are scored exactly instead of walking the graph.
+    """
+
+    min_train = 1000
+    brute_force_max = 256
+
+    def __init__(
+        self,
+        faiss_path: str,
+        dim: int = 1024,
+        M: int = 32,
+        storage: str = "flat",
+        ef_construction: int = 40,
+        ef_search: int = 16,
+        remove_strategy: str = "tombstone",
+        mmap: bool = False,
+    ):
+        if remove_strategy not in ("tombstone", "rebuild"):
+            raise ValueError("remove_strategy must be 'tombstone' or 'rebuild'")
         self.path = Path(faiss_path)
         self.dim = dim
+        self.M = M
+        self.storage = storage
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self.remove_strategy = remove_strategy
+        self.tombstones: set = set()
+        self.read_only = mmap and self.path.exists()
         if self.path.exists():
-            self.index = faiss.read_index(str(self.path))
+            flags = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY if self.read_only else 0
+            self.index = faiss.read_index(str(self.path), flags)
             # index may already be an IDMap
             self.idmap = self.index
+            self.dim = int(self.index.d)
+            self._adopt_loaded_params()
+            tpath = _tombstone_path(self.path)
+            if tpath.exists():
+                self.tombstones = {int(v) for v in np.load(tpath).tolist()}
         else:
-            base = faiss.IndexHNSWFlat(dim, M, faiss.METRIC_INNER_PRODUCT)
-            idmap = faiss.IndexIDMap2(base)
-            self.index = idmap
-            self.idmap = idmap
+            self.index = self.idmap = self._empty_index()
+
+    def _adopt_loaded_params(self) -> None:
+        # rebuild() must recreate the index as it was built, not as this constructor was called
+        base = faiss.downcast_index(self.idmap.index)
+        if not hasattr(base, "hnsw"):
+            return
+        self.M = int(base.hnsw.nb_neighbors(1))
+        self.ef_construction = int(base.hnsw.efConstruction)
+        storage = faiss.downcast_index(base.storage)
+        if hasattr(storage, "sq"):
+            by_qtype = {getattr(faiss.ScalarQuantizer, qt): name for name, qt in STORAGE_TYPES.items() if qt}
+            self.storage = by_qtype.get(storage.sq.qtype, self.storage)
+        else:
+            self.storage = "flat"
+
+    def _empty_index(self) -> "faiss.Index":
+        base = _hnsw(self.dim, self.M, self.storage)
+        base.hnsw.efConstruction = self.ef_construction
+        return faiss.IndexIDMap2(base)
+
+    def train(self, sample: np.ndarray) -> None:
+        vec = _norm(np.asarray(sample))
+        self.idmap.train(vec)
+
+    def ids(self) -> np.ndarray:
+        """Every id stored in the index, tombstoned ones included."""
+        return faiss.vector_to_array(self.idmap.id_map).astype(np.int64)
 
     def save(self) -> None:
-        self.path.parent.mkdir(parents=True, exist_ok=True)
-        faiss.write_index(self.index, str(self.path))
+        if not self.read_only:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            faiss.write_index(self.index, str(self.path))
+        self.save_tombstones()
+
+    def save_tombstones(self) -> None:
+        tpath = _tombstone_path(self.path)
+        if self.tombstones:
+            np.save(tpath, np.fromiter(sorted(self.tombstones), dtype=np.int64))
+        elif tpath.exists():
+            tpath.unlink()
 
     def add(self, ids: Iterable[int], vectors: np.ndarray) -> None:
+        if self.read_only:
+            raise RuntimeError(f"{self.path} is sealed (memory-mapped read-only)")
         ids = np.fromiter(ids, dtype=np.int64)
         vec = _norm(np.asarray(vectors))
         assert vec.shape[1] == self.dim, f"dim mismatch: {vec.shape[1]} != {self.dim}"
+        revived = self.tombstones.intersection(ids.tolist())
+        if revived:
+            # a re-added id must not stay filtered; its old vector is still in the graph, so drop it first
+            if np.isin(np.fromiter(revived, dtype=np.int64), self.ids()).any():
+                self.rebuild()
+            else:
+                self.tombstones -= revived
+        if not self.idmap.is_trained:
+            if vec.shape[0] >= self.min_train:
+                self.idmap.train(vec)
+            else:
+                bounds = np.vstack([np.full(self.dim, -1.0), np.full(self.dim, 1.0)]).astype(np.float32)
+                self.idmap.train(bounds)
         self.idmap.add_with_ids(vec, ids)
 
-    def search(self, query: np.ndarray, k: int) -> List[Tuple[int, float]]:
-        q = _norm(np.asarray(query))
-        D, I = self.index.search(q, k)
-        # return for first query only (batch size 1 expected)
-        scores = D[0].tolist()
-        ids = I[0].tolist()
-        out = [(int(i), float(s)) for i, s in zip(ids, scores) if i != -1]
-        return out
+    def remove(self, ids: Iterable[int]) -> None:
+        self.tombstones.update(int(i) for i in ids)
+        if self.remove_strategy == "rebuild":
+            self.rebuild()
+
+    def rebuild(self) -> int:
+        """Re-insert every live vector into a fresh index, dropping tombstones. Returns the live count."""
+        stored = self.ids()
+        live = stored[~np.isin(stored, np.fromiter(self.tombstones, dtype=np.int64, count=len(self.tombstones)))]
+        vecs = self.idmap.reconstruct_batch(live) if live.size else np.empty((0, self.dim), dtype=np.float32)
+        fresh = self._empty_index()
+        if not fresh.is_trained:
+            fresh.train(vecs if vecs.shape[0] >= self.min_train else
+                        np.vstack([np.full(self.dim, -1.0), np.full(self.dim, 1.0)]).astype(np.float32))
+        if live.size:
+            fresh.add_with_ids(vecs, live)
+        self.index = self.idmap = fresh
+        self.tombstones.clear()
+        self.read_only = False
+        return int(live.size)
+
+    def search_many(
+        self,
+        queries: np.ndarray,
+        k: int,
+        ef_search: Optional[int] = None,
+        allow_ids: Optional[Iterable[int]] = None,
+    ) -> List[List[Tuple[int, float]]]:
+        """One result list per query row; `ef_search` overrides the store default for this call."""
+        q = _norm(np.asarray(queries).reshape(-1, self.dim))
+        params = faiss.SearchParametersHNSW()
+        params.efSearch = max(int(ef_search or self.ef_search), k)
+        dead = None
+        if allow_ids is not None:
+            allow = np.unique(np.fromiter(allow_ids, dtype=np.int64))
+            if self.tombstones:
+                allow = allow[~np.isin(allow, np.fromiter(self.tombstones, dtype=np.int64, count=len(self.tombstones)))]
+            if allow.size == 0:
+                return [[] for _ in range(q.shape[0])]
+            if allow.size <= self.brute_force_max:
+                return self._exact_search(q, k, allow)
+            dead = faiss.IDSelectorBatch(allow)  # kept referenced for the duration of the search
+            params.sel = dead
+        elif self.tombstones:
+            dead = faiss.IDSelectorBatch(np.fromiter(sorted(self.tombstones), dtype=np.int64))
+            params.sel = faiss.IDSelectorNot(dead)  # `dead` must stay referenced during the search
+        D, I = self.index.search(q, k, params=params)
+        return [
+            [(int(i), float(s)) for i, s in zip(ids, scores) if i != -1]
+            for ids, scores in zip(I.tolist(), D.tolist())
+        ]
+
+    def _exact_search(self, q: np.ndarray, k: int, allow: np.ndarray) -> List[List[Tuple[int, float]]]:
+        try:
+            vecs = self.idmap.reconstruct_batch(allow)
+        except RuntimeError:
+            # some allowed ids are not in the index; keep only stored ones
+            allow = np.intersect1d(allow, faiss.vector_to_array(self.idmap.id_map))
+            if allow.size == 0:
+                return [[] for _ in range(q.shape[0])]
+            vecs = self.idmap.reconstruct_batch(allow)
+        scores = q @ vecs.T
+        take = min(k, allow.size)
+        order = np.argsort(-scores, axis=1, kind="stable")[:, :take]
+        return [
+            [(int(allow[j]), float(row[j])) for j in cols]
+            for row, cols in zip(scores, order)
+        ]
 
+    def search(self, query: np.ndarray, k: int, ef_search: Optional[int] = None) -> List[Tuple[int, float]]:
+        # results for the first query row; use search_many for batches
+        return self.search_many(np.asarray(query).reshape(-1, self.dim)[:1], k, ef_search=ef_search)[0]
@@ -2,6 +2,7 @@ from .memory import Memory
 from .memory_logger import MemoryLogger
 from .memory_debate import MemoryDebate, DebateResult
 from .faiss_indexer import FaissIndexer
+from .engine_memory import EngineMemory
 
-__all__ = ["Memory", "MemoryLogger", "MemoryDebate", "DebateResult", "FaissIndexer"]
+__all__ = ["Memory", "MemoryLogger", "MemoryDebate", "DebateResult", "FaissIndexer", "EngineMemory"]
 
@@ -0,0 +1,92 @@
+# engine_memory.py
+from __future__ import annotations
+
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+from ..memory.engine import MemoryEngine, utc_now_iso
+from .memory import MemoryRecord
+
+
+class EngineMemory:
+    """
+    The `Memory` API (add_memory / recall_memories / recall_memories_many / forget_*) on top of the
+    shared memory.engine.MemoryEngine, so memory_loop callers and memory/ recall use one database,
+    one index and one embedding model instead of two parallel stacks.
+
+    Record ids are the engine's `uid` column (UUID4 strings, as in Memory); `type` maps to `kind`
+    and `timestamp` to `created_at`.
+    """
+
+    def __init__(self, engine: Optional[MemoryEngine] = None, *, db_path: Optional[str] = None,
+                 index_path: Optional[str] = None, **engine_kwargs):
+        if engine is None:
+            if db_path is None or index_path is None:
+                raise ValueError("pass an engine or both db_path and index_path")
+            engine = MemoryEngine(db_path, index_path, **engine_kwargs)
+        self.engine = engine
+
+    def add_memory(self, content: str, metadata: Dict) -> MemoryRecord:
+        if not isinstance(metadata, dict):
+            raise TypeError("metadata must be a dict")
+        uid = str(uuid.uuid4())
+        mem_type = str(metadata.get("type", "observation"))
+        ts = utc_now_iso()
+        self.engine.add(content, metadata, kind=mem_type, uid=uid, created_at=ts)
+        return MemoryRecord(id=uid, content=content, timestamp=ts, type=mem_type, metadata=metadata)
+
+    def recall_memories(
+        self,
+        query_text: str,
+        k: int = 5,
+        *,
+        mem_type: Optional[Union[str, Sequence[str]]] = None,
+        since: Optional[Union[str, datetime]] = None,
+        until: Optional[Union[str, datetime]] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+    ) -> List[MemoryRecord]:
+        return self.recall_memories_many(
+            [query_text], k, mem_type=mem_type, since=since, until=until, metadata=metadata
+        )[0]
+
+    def recall_memories_many(
+        self,
+        queries: Sequence[str],
+        k: int = 5,
+        *,
+        mem_type: Optional[Union[str, Sequence[str]]] = None,
+        since: Optional[Union[str, datetime]] = None,
+        until: Optional[Union[str, datetime]] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+    ) -> List[List[MemoryRecord]]:
+        queries = list(queries)
+        if not queries:
+            return []
+        allow = self.engine.filter_ids(mem_type, since, until, metadata)
+        hits = self.engine.search(queries, k, allow_ids=allow, shards=self.engine.shards_for(mem_type, since, until))
+        rows = self.engine.get({i for row in hits for i, _ in row})
+        records = {
+            mid: MemoryRecord(
+                id=r["uid"] or str(mid), content=r["content"] or "", timestamp=r["created_at"] or "",
+                type=r["kind"] or "observation", metadata=r["meta"],
+            )
+            for mid, r in rows.items()
+        }
+        return [[records[i] for i, _ in row if i in records] for row in hits]
+
+    def max_similarity(self, text: str) -> float:
+        """Cosine similarity of `text` to its nearest stored memory (0.0 when there is none)."""
+        # a novelty probe, not a recall: it must not make the memory look popular to the hot tier
+        hits = self.engine.search([text], 1, count=False)[0]
+        return float(hits[0][1]) if hits else 0.0
+
+    def forget_memory(self, memory_id: str) -> bool:
+        return self.forget_many([memory_id]) > 0
+
+    def forget_many(self, memory_ids: Sequence[str]) -> int:
+        ids = self.engine.store.memory_ids_for_uids(dict.fromkeys(memory_ids))
+        return self.engine.remove(ids.values()) if ids else 0
+
+    def close(self) -> None:
+        self.engine.close()
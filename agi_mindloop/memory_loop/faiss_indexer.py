@@ -1,8 +1,12 @@
 # faiss_indexer.py
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Optional
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Iterable, Optional
 
 import numpy as np
 
@@ -12,14 +16,85 @@ except Exception as e:  # pragma: no cover
     faiss = None  # type: ignore
 
 
+_MANIFEST_VERSION = 1
+
+
+def _tombstone_path(path: str) -> str:
+    # sidecar of pre-manifest snapshots (a bare FAISS file at `path`)
+    return f"{path}.tombstones.npy"
+
+
+def _stat_key(path: str) -> Optional[tuple]:
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+def snapshot_generation(path: str) -> tuple:
+    """
+    Identity of the snapshot currently published at `path`. Every publish atomically replaces
+    the manifest at `path`, so it yields a new inode and therefore a new generation.
+    """
+    return (_stat_key(path),)
+
+
+def read_manifest(path: str) -> Optional[dict]:
+    """
+    The manifest published at `path`, with `index` / `tombstones` as absolute paths, or None if
+    `path` holds a bare FAISS index written before manifests existed.
+    """
+    with open(path, "rb") as f:
+        head = f.read(1)
+        if head != b"{":
+            return None
+        manifest = json.loads(head + f.read())
+    base = os.path.dirname(os.path.abspath(path))
+    for key in ("index", "tombstones"):
+        if manifest.get(key):
+            manifest[key] = os.path.join(base, manifest[key])
+    return manifest
+
+
 @dataclass
 class FaissIndexer:
     """
     Thin wrapper over FAISS IndexIDMap2 + IndexFlatL2 for add/search/remove and persistence.
+
+    Removals are recorded as tombstones and filtered out at search time with an IDSelector,
+    so deleting is O(1) instead of shifting the flat vector array. Once `compact_threshold`
+    tombstones accumulate, `maybe_compact` drops them physically on a background thread.
+
+    Searches can be restricted to an allow-list of ids. The restriction runs inside FAISS via an
+    IDSelectorBatch; allow-lists of at most `brute_force_max` ids are instead scored exactly by
+    reconstructing just those vectors, which avoids a full scan when the filter is very selective.
+
+    A snapshot is an index file and an optional tombstone file, both immutable and named by
+    generation (`<path>.g<gen>.index`, `<path>.g<gen>.tombstones.npy`), plus a small JSON
+    manifest at `path` naming them. `save_index` / `save_tombstones` write the new files first
+    and then publish with one atomic rename of the manifest, so a reader always sees an index
+    together with its own tombstones. Files of the two newest snapshots are kept (a reader may be
+    between reading the manifest and opening the files); older ones are deleted.
+
+    `load_index(path, mmap=True)` opens a snapshot read-only with FAISS mmap flags, so reader
+    processes share the page cache instead of each holding a private copy; `is_stale` tells a
+    reader when a newer snapshot exists. A bare FAISS file at `path` (written before manifests)
+    still loads, with its `.tombstones.npy` sidecar.
     """
 
     dimension: int
     _index: Optional["faiss.Index"] = None
+    compact_threshold: int = 1024
+    brute_force_max: int = 256
+    _tombstones: set = field(default_factory=set, repr=False)
+    _selector: Optional[tuple] = field(default=None, repr=False)
+    _lock: threading.RLock = field(default_factory=threading.RLock, repr=False)
+    _compactor: Optional[threading.Thread] = field(default=None, repr=False)
+    _compact_lock: threading.Lock = field(default_factory=threading.Lock, repr=False)  # one compaction at a time
+    read_only: bool = False
+    generation: Optional[tuple] = field(default=None, repr=False)
+    _published: list = field(default_factory=list, repr=False)  # files of the newest snapshots, newest first
 
     def __post_init__(self) -> None:
         if faiss is None:
@@ -31,8 +106,17 @@ class FaissIndexer:
 
     @property
     def ntotal(self) -> int:
+        """Number of physically stored vectors, including tombstoned ones."""
         return int(self._index.ntotal) if self._index is not None else 0
 
+    @property
+    def live_count(self) -> int:
+        return self.ntotal - len(self._tombstones)
+
+    @property
+    def tombstones(self) -> frozenset:
+        return frozenset(self._tombstones)
+
     @property
     def index(self):  # exposed for advanced users
         return self._index
@@ -40,36 +124,178 @@ class FaissIndexer:
     def add_vector(self, vector: np.ndarray, ids: Optional[np.ndarray] = None) -> None:
         if self._index is None:
             raise RuntimeError("index not initialized")
+        self._check_writable()
         vec = vector.astype(np.float32)
         if vec.ndim == 1:
             vec = vec.reshape(1, -1)
-        if ids is None:
-            self._index.add(vec)
-        else:
-            if ids.dtype != np.int64:
-                ids = ids.astype(np.int64)
-            self._index.add_with_ids(vec, ids)
+        with self._lock:
+            if ids is None:
+                self._index.add(vec)
+            else:
+                if ids.dtype != np.int64:
+                    ids = ids.astype(np.int64)
+                self._index.add_with_ids(vec, ids)
 
-    def search(self, query_vector: np.ndarray, k: int = 5) -> tuple[np.ndarray, np.ndarray]:
+    def search(
+        self, query_vector: np.ndarray, k: int = 5, allow_ids: Optional[np.ndarray] = None
+    ) -> tuple[np.ndarray, np.ndarray]:
         if self._index is None or self.ntotal == 0:
             return np.array([], dtype=np.int64), np.array([], dtype=np.float32)
-        q = query_vector.astype(np.float32)
-        if q.ndim == 1:
-            q = q.reshape(1, -1)
-        distances, ids = self._index.search(q, k)
+        ids, distances = self.search_many(query_vector, k=k, allow_ids=allow_ids)
         # Return flat arrays for convenience
         return ids[0], distances[0]
 
+    def search_many(
+        self, query_vectors: np.ndarray, k: int = 5, allow_ids: Optional[np.ndarray] = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Search all query rows in one FAISS call (nq > 1 lets FAISS parallelize internally).
+        If `allow_ids` is given, only those ids are eligible.
+        Returns (ids, distances) of shape (nq, k); missing neighbours are -1.
+        """
+        q = np.ascontiguousarray(query_vectors, dtype=np.float32)
+        if q.ndim == 1:
+            q = q.reshape(1, -1)
+        empty = (
+            np.full((q.shape[0], k), -1, dtype=np.int64),
+            np.full((q.shape[0], k), np.inf, dtype=np.float32),
+        )
+        if self._index is None or self.ntotal == 0 or q.shape[0] == 0:
+            return empty
+        with self._lock:
+            if allow_ids is None:
+                distances, ids = self._index.search(q, k, params=self._search_params())
+                return ids, distances
+            allow = np.asarray(allow_ids, dtype=np.int64).ravel()
+            if self._tombstones:
+                allow = allow[~np.isin(allow, np.fromiter(self._tombstones, dtype=np.int64))]
+            if allow.size == 0:
+                return empty
+            if allow.size <= self.brute_force_max:
+                return self._exact_search(q, k, allow, empty)
+            params = faiss.SearchParameters()
+            sel = faiss.IDSelectorBatch(allow)
+            params.sel = sel
+            distances, ids = self._index.search(q, k, params=params)
+            return ids, distances
+
+    def _exact_search(
+        self, q: np.ndarray, k: int, allow: np.ndarray, empty: tuple[np.ndarray, np.ndarray]
+    ) -> tuple[np.ndarray, np.ndarray]:
+        # Caller holds self._lock. Squared L2, matching IndexFlatL2.
+        allow = np.unique(allow)
+        try:
+            vecs = self._index.reconstruct_batch(allow)
+        except RuntimeError:
+            # Some ids in the allow-list are not in the index; keep only stored ones.
+            allow = np.intersect1d(allow, faiss.vector_to_array(self._index.id_map))
+            if allow.size == 0:
+                return empty
+            vecs = self._index.reconstruct_batch(allow)
+        d2 = (q * q).sum(1)[:, None] - 2.0 * (q @ vecs.T) + (vecs * vecs).sum(1)[None, :]
+        take = min(k, allow.size)
+        order = np.argsort(d2, axis=1, kind="stable")[:, :take]
+        ids, distances = empty
+        ids[:, :take] = allow[order]
+        distances[:, :take] = np.take_along_axis(d2, order, axis=1)
+        return ids, distances
+
     def save_index(self, path: str) -> None:
+        """Publish a new snapshot of the index and its tombstones."""
         if self._index is None:
             raise RuntimeError("index not initialized")
-        faiss.write_index(self._index, path)
+        self._check_writable()
+        with self._lock:
+            gen = self._next_generation()
+            index_file = f"{path}.g{gen}.index"
+            faiss.write_index(self._index, index_file)
+            self._publish(path, gen, index_file)
+
+    def save_tombstones(self, path: str) -> None:
+        """
+        Publish a snapshot that reuses the last published index file with the current tombstones
+        (cheap compared to save_index). Falls back to save_index if this indexer has not
+        published an index file at `path` yet.
+        """
+        self._check_writable()
+        with self._lock:
+            current = self._published[0] if self._published else None
+            if current is None or current["path"] != os.path.abspath(path):
+                self.save_index(path)
+                return
+            self._publish(path, self._next_generation(), current["index"])
+
+    def _next_generation(self) -> str:
+        # time-ordered and unique per publish; only names files, never compared across writers
+        return f"{time.time_ns():x}"
+
+    def _publish(self, path: str, gen: str, index_file: str) -> None:
+        # Caller holds self._lock. The files are complete before the manifest names them.
+        tomb_file = None
+        if self._tombstones:
+            tomb_file = f"{path}.g{gen}.tombstones.npy"
+            np.save(tomb_file, np.fromiter(sorted(self._tombstones), dtype=np.int64))
+        manifest = {
+            "version": _MANIFEST_VERSION,
+            "generation": gen,
+            "index": os.path.basename(index_file),
+            "tombstones": os.path.basename(tomb_file) if tomb_file else None,
+        }
+        tmp = f"{path}.manifest.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        os.replace(tmp, path)
+        self.generation = snapshot_generation(path)
+        entry = {"path": os.path.abspath(path), "index": index_file, "tombstones": tomb_file}
+        self._published = [entry] + [e for e in self._published if e["path"] == entry["path"]][:1]
+        self._collect_garbage(path)
+
+    def _collect_garbage(self, path: str) -> None:
+        keep = {os.path.abspath(f) for e in self._published for f in (e["index"], e["tombstones"]) if f}
+        directory = os.path.dirname(os.path.abspath(path))
+        prefix = os.path.basename(path) + ".g"
+        for name in os.listdir(directory):
+            full = os.path.join(directory, name)
+            if name.startswith(prefix) and (name.endswith(".index") or name.endswith(".tombstones.npy")) \
+                    and full not in keep:
+                try:
+                    os.remove(full)
+                except FileNotFoundError:
+                    pass
+        legacy = _tombstone_path(path)
+        if os.path.exists(legacy):
+            os.remove(legacy)
+
+    def is_stale(self, path: str) -> bool:
+        """True if a snapshot newer than the one this indexer was loaded from is published at `path`."""
+        return self.generation != snapshot_generation(path)
 
     @classmethod
-    def load_index(cls, path: str) -> "FaissIndexer":
+    def load_index(cls, path: str, mmap: bool = False) -> "FaissIndexer":
+        """
+        Load a snapshot. With `mmap=True` the vectors are memory-mapped read-only rather than
+        copied onto the heap, and the returned indexer refuses writes.
+        """
         if faiss is None:
             raise RuntimeError("faiss is not installed. Install faiss-cpu or faiss-gpu.")
-        index = faiss.read_index(path)
+        for attempt in range(3):
+            generation = snapshot_generation(path)
+            manifest = read_manifest(path)
+            if manifest is None:
+                index_file, tomb_file = path, _tombstone_path(path)
+                if not os.path.exists(tomb_file):
+                    tomb_file = None
+            else:
+                index_file, tomb_file = manifest["index"], manifest["tombstones"]
+            try:
+                index = faiss.read_index(index_file, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY) if mmap \
+                    else faiss.read_index(index_file)
+                tombstones = np.load(tomb_file).tolist() if tomb_file else []
+                break
+            except (RuntimeError, FileNotFoundError, OSError):
+                # the writer published twice since the manifest was read and collected these files
+                if attempt == 2 or snapshot_generation(path) == generation:
+                    raise
         # Determine dimension
         if hasattr(index, "d"):
             dim = int(index.d)
@@ -77,13 +303,99 @@ class FaissIndexer:
             # Fallback
             dim = getattr(index, "dim", None) or 0
             dim = int(dim)
-        obj = cls(dimension=dim)
+        obj = cls(dimension=dim, read_only=mmap, generation=generation)
         obj._index = index
+        obj._tombstones = {int(v) for v in tombstones}
+        if manifest is not None:
+            obj._published = [{"path": os.path.abspath(path), "index": index_file, "tombstones": tomb_file}]
         return obj
 
     def remove_vector(self, vector_id: int) -> None:
+        """Tombstone a single vector id. See `remove_many`."""
+        self.remove_many([vector_id])
+
+    def remove_many(self, vector_ids: Iterable[int]) -> int:
+        """
+        Tombstone vector ids. They are excluded from every subsequent search and physically
+        dropped by the next `compact`. Returns the number of newly tombstoned ids.
+        """
+        if self._index is None:
+            raise RuntimeError("index not initialized")
+        self._check_writable()
+        with self._lock:
+            before = len(self._tombstones)
+            self._tombstones.update(int(v) for v in vector_ids)
+            added = len(self._tombstones) - before
+            if added:
+                self._selector = None
+            return added
+
+    def compact(self, path: Optional[str] = None) -> int:
+        """
+        Physically remove all tombstoned vectors in a single remove_ids pass, then persist to
+        `path` if given. Returns the number of vectors removed.
+
+        The pass runs on a copy, outside the lock, so searches and writes go on meanwhile; the
+        lock is only held to take the copy and to swap it in. Vectors added in between are
+        appended to the copy, and ids tombstoned in between stay tombstoned.
+        """
         if self._index is None:
             raise RuntimeError("index not initialized")
-        selector = faiss.IDSelectorBatch(np.array([vector_id], dtype=np.int64))
-        self._index.remove_ids(selector)
+        self._check_writable()
+        with self._compact_lock:
+            with self._lock:
+                if not self._tombstones:
+                    return 0
+                dead = set(self._tombstones)
+                start = self.ntotal
+                fresh = faiss.clone_index(self._index)
+            removed = int(fresh.remove_ids(faiss.IDSelectorBatch(np.fromiter(sorted(dead), dtype=np.int64))))
+            with self._lock:
+                if self.ntotal > start:
+                    added = self.ntotal - start
+                    vecs = faiss.downcast_index(self._index.index).reconstruct_n(start, added)
+                    ids = faiss.vector_to_array(self._index.id_map)[start:].astype(np.int64)
+                    fresh.add_with_ids(vecs, ids)
+                self._index = fresh
+                self._tombstones -= dead
+                self._selector = None
+                if path is not None:
+                    self.save_index(path)
+            return removed
+
+    def maybe_compact(self, path: Optional[str] = None) -> bool:
+        """
+        Start a background compaction when the tombstone count reaches `compact_threshold`.
+        Returns True if a compaction thread was started.
+        """
+        with self._lock:
+            if self.read_only or len(self._tombstones) < self.compact_threshold:
+                return False
+            if self._compactor is not None and self._compactor.is_alive():
+                return False
+            self._compactor = threading.Thread(
+                target=self.compact, args=(path,), name="faiss-compactor", daemon=True
+            )
+            self._compactor.start()
+            return True
+
+    def wait_for_compaction(self, timeout: Optional[float] = None) -> None:
+        t = self._compactor
+        if t is not None:
+            t.join(timeout)
+
+    def _check_writable(self) -> None:
+        if self.read_only:
+            raise RuntimeError("index is opened read-only")
 
+    def _search_params(self):
+        # Caller holds self._lock.
+        if not self._tombstones:
+            return None
+        if self._selector is None:
+            dead = faiss.IDSelectorBatch(np.fromiter(sorted(self._tombstones), dtype=np.int64))
+            params = faiss.SearchParameters()
+            params.sel = faiss.IDSelectorNot(dead)
+            # Keep the batch selector alive: IDSelectorNot only holds a raw pointer to it.
+            self._selector = (params, dead)
+        return self._selector[0]
@@ -4,11 +4,12 @@ from __future__ import annotations
 import json
 import os
 import sqlite3
+import threading
 import time
 import uuid
 from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
 
 import numpy as np
 
@@ -17,7 +18,7 @@ try:
 except Exception:  # pragma: no cover
     SentenceTransformer = None  # type: ignore
 
-from faiss_indexer import FaissIndexer
+from .faiss_indexer import FaissIndexer
 
 
 ISO_FORMAT = "%Y-%m-%dT%H:%M:%S.%fZ"
@@ -27,6 +28,14 @@ def _utc_now_iso() -> str:
     return datetime.now(timezone.utc).strftime(ISO_FORMAT)
 
 
+def _as_iso(value: Union[str, datetime]) -> str:
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.astimezone(timezone.utc).strftime(ISO_FORMAT)
+    return str(value)
+
+
 @dataclass
 class MemoryRecord:
     id: str
@@ -36,6 +45,33 @@ class MemoryRecord:
     metadata: Dict
 
 
+class _LazyMemoryRecord(MemoryRecord):
+    """
+    MemoryRecord whose metadata JSON is decoded on first access.
+    Used by batched recall, where most callers only read `content`.
+    """
+
+    def __init__(self, id: str, content: str, timestamp: str, type: str, metadata_json: Optional[str]):
+        self.id = id
+        self.content = content
+        self.timestamp = timestamp
+        self.type = type
+        self._metadata_json = metadata_json
+        self._metadata: Optional[Dict] = None
+
+    @property
+    def metadata(self) -> Dict:
+        if self._metadata is None:
+            self._metadata = json.loads(self._metadata_json) if self._metadata_json else {}
+            self._metadata_json = None
+        return self._metadata
+
+    @metadata.setter
+    def metadata(self, value: Dict) -> None:
+        self._metadata = value
+        self._metadata_json = None
+
+
 class Memory:
     """
     Hybrid memory system combining FAISS vector search with SQLite metadata storage.
@@ -54,18 +90,36 @@ class Memory:
             vector_id INTEGER NOT NULL     -- numeric ID used in FAISS IndexIDMap
         )
 
-    The FAISS index is persisted to `index_path`.
+    The FAISS index is persisted next to `index_path`, which holds the manifest of the current snapshot.
+
+    With `read_only=True` the database is opened with mode=ro and the index is memory-mapped, so
+    many reader processes can share one snapshot. Readers reload automatically when the writer
+    publishes a newer snapshot (each publish is one atomic swap of the manifest at `index_path`).
     """
 
-    def __init__(self, db_path: str, index_path: str, model_name: str = "sentence-transformers/all-MiniLM-L6-v2"):
+    def __init__(
+        self,
+        db_path: str,
+        index_path: str,
+        model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+        compact_threshold: int = 1024,
+        read_only: bool = False,
+    ):
         self.db_path = db_path
         self.index_path = index_path
         self.model_name = model_name
+        self.compact_threshold = compact_threshold
+        self.read_only = read_only
+        self._write_lock = threading.RLock()
 
         # SQLite init
-        self.conn = sqlite3.connect(self.db_path)
-        self.conn.execute("PRAGMA journal_mode=WAL;")
-        self._init_db()
+        if read_only:
+            self.conn = sqlite3.connect(f"file:{os.path.abspath(self.db_path)}?mode=ro", uri=True)
+        else:
+            # background jobs (core_loop jobs.enabled) write from worker threads
+            self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self.conn.execute("PRAGMA journal_mode=WAL;")
+            self._init_db()
 
         # Model init (lazy)
         self._model: Optional[SentenceTransformer] = None
@@ -90,6 +144,7 @@ class Memory:
         """
         if not isinstance(metadata, dict):
             raise TypeError("metadata must be a dict")
+        self._check_writable()
 
         mem_type = str(metadata.get("type", "observation"))
 
@@ -99,43 +154,63 @@ class Memory:
         if self._dimension is None:
             self._dimension = dim
 
-        # Ensure indexer exists and matches dim
-        if self.indexer is None or self.indexer.dimension != dim:
-            # Create new indexer and save
-            self.indexer = FaissIndexer(dimension=dim)
+        # ids are read-then-assigned, so concurrent writers (background jobs) take turns
+        with self._write_lock:
+            # Ensure indexer exists and matches dim
+            if self.indexer is None or self.indexer.dimension != dim:
+                # Create new indexer and save
+                self.indexer = FaissIndexer(dimension=dim, compact_threshold=self.compact_threshold)
 
-        # Generate IDs
-        ext_id = str(uuid.uuid4())
-        vector_id = self._next_vector_id()
+            # Generate IDs
+            ext_id = str(uuid.uuid4())
+            vector_id = self._next_vector_id()
 
-        # Persist to FAISS
-        self.indexer.add_vector(vec.astype(np.float32), ids=np.array([vector_id], dtype=np.int64))
-        self.indexer.save_index(self.index_path)
-
-        # Persist to SQLite
-        ts = _utc_now_iso()
-        metadata_json = json.dumps(metadata, ensure_ascii=False, separators=(",", ":"))
-        with self.conn:
-            self.conn.execute(
-                "INSERT INTO memories(id, content, timestamp, type, metadata) VALUES(?,?,?,?,?)",
-                (ext_id, content, ts, mem_type, metadata_json),
-            )
-            self.conn.execute(
-                "INSERT INTO faiss_map(id, vector_id) VALUES(?,?)",
-                (ext_id, vector_id),
-            )
+            # Persist to FAISS
+            self.indexer.add_vector(vec.astype(np.float32), ids=np.array([vector_id], dtype=np.int64))
+            self.indexer.save_index(self.index_path)
 
-        return MemoryRecord(id=ext_id, content=content, timestamp=ts, type=mem_type, metadata=metadata)
+            # Persist to SQLite
+            ts = _utc_now_iso()
+            metadata_json = json.dumps(metadata, ensure_ascii=False, separators=(",", ":"))
+            with self.conn:
+                self.conn.execute(
+                    "INSERT INTO memories(id, content, timestamp, type, metadata) VALUES(?,?,?,?,?)",
+                    (ext_id, content, ts, mem_type, metadata_json),
+                )
+                self.conn.execute(
+                    "INSERT INTO faiss_map(id, vector_id) VALUES(?,?)",
+                    (ext_id, vector_id),
+                )
 
-    def recall_memories(self, query_text: str, k: int = 5) -> List[MemoryRecord]:
+            return MemoryRecord(id=ext_id, content=content, timestamp=ts, type=mem_type, metadata=metadata)
+
+    def recall_memories(
+        self,
+        query_text: str,
+        k: int = 5,
+        *,
+        mem_type: Optional[Union[str, Sequence[str]]] = None,
+        since: Optional[Union[str, datetime]] = None,
+        until: Optional[Union[str, datetime]] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+    ) -> List[MemoryRecord]:
         """
         Embed the query. Retrieve k nearest vectors. Fetch full rows from SQLite. Return as MemoryRecord list.
+
+        Optional filters (memory type, timestamp range, exact metadata key values) are resolved in
+        SQLite to a set of vector ids and applied inside the FAISS search, so k results are returned
+        whenever k matching memories exist.
         """
+        self._refresh_if_stale()
         if not self.indexer or self.indexer.ntotal == 0:
             return []
 
+        allow = self._filter_vector_ids(mem_type, since, until, metadata)
+        if allow is not None and allow.size == 0:
+            return []
+
         qvec = self._embed_text(query_text).astype(np.float32)
-        ids, distances = self.indexer.search(qvec, k=k)
+        ids, distances = self.indexer.search(qvec, k=k, allow_ids=allow)
         if ids.size == 0:
             return []
 
@@ -161,26 +236,111 @@ class Memory:
             results.append(MemoryRecord(id=row[0], content=row[1], timestamp=row[2], type=row[3], metadata=meta))
         return results
 
+    def recall_memories_many(
+        self,
+        queries: Sequence[str],
+        k: int = 5,
+        *,
+        mem_type: Optional[Union[str, Sequence[str]]] = None,
+        since: Optional[Union[str, datetime]] = None,
+        until: Optional[Union[str, datetime]] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+    ) -> List[List[MemoryRecord]]:
+        """
+        Batched recall: embed all queries in one pass, run a single FAISS search with nq=len(queries),
+        and fetch every referenced row with one SQL statement. Accepts the same filters as
+        `recall_memories`.
+
+        Returns one list per query, ordered by distance. Rows shared between queries are the same
+        MemoryRecord object, and their metadata JSON is decoded lazily on first access.
+        """
+        queries = list(queries)
+        if not queries:
+            return []
+        self._refresh_if_stale()
+        if not self.indexer or self.indexer.ntotal == 0:
+            return [[] for _ in queries]
+
+        allow = self._filter_vector_ids(mem_type, since, until, metadata)
+        if allow is not None and allow.size == 0:
+            return [[] for _ in queries]
+
+        qvecs = self._embed_texts(queries)
+        ids, _distances = self.indexer.search_many(qvecs, k=k, allow_ids=allow)
+
+        wanted = sorted({int(v) for v in ids.ravel().tolist() if v != -1})
+        if not wanted:
+            return [[] for _ in queries]
+
+        placeholders = ",".join(["?"] * len(wanted))
+        rows = self.conn.execute(
+            f"""
+            SELECT f.vector_id, m.id, m.content, m.timestamp, m.type, m.metadata
+            FROM faiss_map AS f JOIN memories AS m ON m.id = f.id
+            WHERE f.vector_id IN ({placeholders})
+            """,
+            wanted,
+        ).fetchall()
+        by_vid: Dict[int, MemoryRecord] = {
+            int(r[0]): _LazyMemoryRecord(id=r[1], content=r[2], timestamp=r[3], type=r[4], metadata_json=r[5])
+            for r in rows
+        }
+
+        results: List[List[MemoryRecord]] = []
+        for row_ids in ids:
+            results.append([by_vid[int(v)] for v in row_ids.tolist() if int(v) in by_vid])
+        return results
+
+    def max_similarity(self, text: str) -> float:
+        """Cosine similarity of `text` to its nearest stored memory (0.0 when the index is empty)."""
+        self._refresh_if_stale()
+        if not self.indexer or self.indexer.live_count == 0:
+            return 0.0
+        ids, distances = self.indexer.search(self._embed_text(text).astype(np.float32), k=1)
+        if ids.size == 0 or ids[0] == -1:
+            return 0.0
+        # unit vectors: squared L2 distance = 2 - 2*cosine
+        return float(1.0 - distances[0] / 2.0)
+
     def forget_memory(self, memory_id: str) -> bool:
         """
         Remove a memory from SQLite and FAISS. Returns True if something was removed.
         """
-        # Lookup vector_id
-        row = self.conn.execute("SELECT vector_id FROM faiss_map WHERE id=?", (memory_id,)).fetchone()
-        if not row:
-            return False
-        vector_id = int(row[0])
-
-        # Remove from FAISS
-        if self.indexer is not None:
-            self.indexer.remove_vector(vector_id)
-            self.indexer.save_index(self.index_path)
+        return self.forget_many([memory_id]) > 0
 
-        # Remove from SQLite
-        with self.conn:
-            self.conn.execute("DELETE FROM memories WHERE id=?", (memory_id,))
-            self.conn.execute("DELETE FROM faiss_map WHERE id=?", (memory_id,))
-        return True
+    def forget_many(self, memory_ids: Sequence[str]) -> int:
+        """
+        Remove several memories at once. FAISS vectors are tombstoned (only the small tombstone
+        sidecar is rewritten) and compacted in the background once enough accumulate.
+        Returns the number of memories removed.
+        """
+        self._check_writable()
+        with self._write_lock:
+            memory_ids = list(dict.fromkeys(memory_ids))
+            if not memory_ids:
+                return 0
+            placeholders = ",".join(["?"] * len(memory_ids))
+            rows = self.conn.execute(
+                f"SELECT id, vector_id FROM faiss_map WHERE id IN ({placeholders})",
+                memory_ids,
+            ).fetchall()
+            if not rows:
+                return 0
+            found = [(r[0],) for r in rows]
+
+            # Tombstone in FAISS
+            if self.indexer is not None:
+                self.indexer.remove_many(int(r[1]) for r in rows)
+                self.indexer.save_tombstones(self.index_path)
+
+            # Remove from SQLite
+            with self.conn:
+                self.conn.executemany("DELETE FROM memories WHERE id=?", found)
+                self.conn.executemany("DELETE FROM faiss_map WHERE id=?", found)
+
+            if self.indexer is not None:
+                self.indexer.maybe_compact(self.index_path)
+            return len(rows)
 
     # ------------------------------
     # Internals
@@ -206,11 +366,63 @@ class Memory:
                 );
                 """
             )
+            # Indexes backing filtered recall and vector-id lookups
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_memories_type_ts ON memories(type, timestamp)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_memories_ts ON memories(timestamp)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_faiss_map_vector_id ON faiss_map(vector_id)")
+
+    def _filter_vector_ids(
+        self,
+        mem_type: Optional[Union[str, Sequence[str]]],
+        since: Optional[Union[str, datetime]],
+        until: Optional[Union[str, datetime]],
+        metadata: Optional[Dict[str, Any]],
+    ) -> Optional[np.ndarray]:
+        """
+        Resolve recall filters to the matching FAISS vector ids, or None when no filter is set.
+        `since` is inclusive and `until` exclusive; metadata values are matched exactly.
+        """
+        clauses: List[str] = []
+        params: List[Any] = []
+        if mem_type is not None:
+            types = [mem_type] if isinstance(mem_type, str) else list(mem_type)
+            clauses.append(f"m.type IN ({','.join(['?'] * len(types))})")
+            params.extend(types)
+        if since is not None:
+            clauses.append("m.timestamp >= ?")
+            params.append(_as_iso(since))
+        if until is not None:
+            clauses.append("m.timestamp < ?")
+            params.append(_as_iso(until))
+        for key, value in (metadata or {}).items():
+            clauses.append("json_extract(m.metadata, ?) = ?")
+            params.append('$."' + str(key).replace('"', '""') + '"')
+            params.append(value)
+        if not clauses:
+            return None
+        rows = self.conn.execute(
+            "SELECT f.vector_id FROM memories AS m JOIN faiss_map AS f ON f.id = m.id WHERE "
+            + " AND ".join(clauses),
+            params,
+        ).fetchall()
+        return np.fromiter((int(r[0]) for r in rows), dtype=np.int64, count=len(rows))
+
+    def _check_writable(self) -> None:
+        if self.read_only:
+            raise RuntimeError("Memory was opened read-only")
+
+    def _refresh_if_stale(self) -> None:
+        """Readers pick up the newest published snapshot without restarting."""
+        if not self.read_only:
+            return
+        if self.indexer is None or self.indexer.is_stale(self.index_path):
+            self._load_or_create_indexer()
 
     def _load_or_create_indexer(self) -> None:
         if os.path.exists(self.index_path):
             try:
-                self.indexer = FaissIndexer.load_index(self.index_path)
+                self.indexer = FaissIndexer.load_index(self.index_path, mmap=self.read_only)
+                self.indexer.compact_threshold = self.compact_threshold
                 self._dimension = self.indexer.dimension
                 return
             except Exception:
@@ -234,19 +446,27 @@ class Memory:
     def _next_vector_id(self) -> int:
         row = self.conn.execute("SELECT MAX(vector_id) FROM faiss_map").fetchone()
         max_id = int(row[0]) if row and row[0] is not None else -1
+        # Tombstoned ids still occupy the index until compaction; never hand them out again.
+        if self.indexer is not None:
+            max_id = max(max_id, max(self.indexer.tombstones, default=-1))
         return max_id + 1
 
     def _embed_text(self, text: str) -> np.ndarray:
+        return self._embed_texts([text])[0]
+
+    def _embed_texts(self, texts: List[str]) -> np.ndarray:
         if self._model is None:
             if SentenceTransformer is None:
                 raise RuntimeError(
                     "sentence-transformers is not installed. Install it to use embeddings."
                 )
             self._model = SentenceTransformer(self.model_name)
-        vec = self._model.encode([text], convert_to_numpy=True, normalize_embeddings=True)[0]
-        return vec.astype(np.float32)
+        vecs = self._model.encode(list(texts), convert_to_numpy=True, normalize_embeddings=True)
+        return np.asarray(vecs, dtype=np.float32).reshape(len(texts), -1)
 
     def close(self) -> None:
+        if self.indexer is not None:
+            self.indexer.wait_for_compaction()
         if self.conn:
             self.conn.close()
         # No explicit close needed for FAISS or model
@@ -1,17 +1,30 @@
 # memory_debate.py
 from __future__ import annotations
 
+import re
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Callable, Dict, List, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 
 
 DebateTurn = Dict[str, str]  # {"role": "permissive"|"critical", "content": str}
 
+_VERDICT = re.compile(r"VERDICT\s*:\s*\**\s*(ACCEPT|REJECT)", re.IGNORECASE)
+_VERDICT_INSTRUCTION = "End your answer with a final line `VERDICT: ACCEPT` or `VERDICT: REJECT`."
+
+
+def parse_verdict(text: str) -> Optional[str]:
+    """The last `VERDICT: ACCEPT|REJECT` in a reviewer response, as 'accept'/'reject'; None if there is none."""
+    found = _VERDICT.findall(text or "")
+    return found[-1].lower() if found else None
+
 
 @dataclass
 class DebateResult:
     decision: str  # 'accept' | 'reject' | 'needs_review'
     transcript: List[DebateTurn]
+    rounds: int = 0
+    stop_reason: str = ""  # 'consensus' | 'stalemate' | 'max_rounds'
 
 
 class MemoryDebate:
@@ -20,51 +33,95 @@ class MemoryDebate:
 
     Supply two callables that take a prompt string and return a model response string.
     Example signature: Callable[[str], str]
+
+    Both reviewers end each answer with `VERDICT: ACCEPT|REJECT`. Within a round the two prompts
+    only depend on the previous round, so with `parallel=True` the two calls are issued
+    concurrently. With `early_stop=True` the debate ends as soon as both verdicts agree
+    (consensus decides), or when both sides repeat their previous verdicts (stalemate; decided
+    by the keyword heuristic like a full debate).
     """
 
-    def __init__(self, permissive_client: Callable[[str], str], critical_client: Callable[[str], str], rounds: int = 3):
+    def __init__(
+        self,
+        permissive_client: Callable[[str], str],
+        critical_client: Callable[[str], str],
+        rounds: int = 3,
+        parallel: bool = True,
+        early_stop: bool = True,
+    ):
         if rounds < 1:
             raise ValueError("rounds must be >= 1")
         self.permissive = permissive_client
         self.critical = critical_client
         self.rounds = rounds
+        self.parallel = parallel
+        self.early_stop = early_stop
 
     def validate_memory(self, candidate_content: str) -> DebateResult:
         transcript: List[DebateTurn] = []
 
         base_instruction_perm = (
             "You are the Permissive Reviewer. Argue for the utility, accuracy, and relevance of the candidate memory. "
-            "Be concrete about how it can improve future performance or decisions."
+            "Be concrete about how it can improve future performance or decisions. " + _VERDICT_INSTRUCTION
         )
         base_instruction_crit = (
             "You are the Critical Reviewer. Identify flaws, inaccuracies, privacy risks, duplication, or irrelevance in the candidate memory. "
-            "Be rigorous and skeptical."
+            "Be rigorous and skeptical. " + _VERDICT_INSTRUCTION
         )
 
-        # Round 1: Initial analyses
-        p_prompt = f"{base_instruction_perm}\n\nCandidate Memory:\n{candidate_content}"
-        c_prompt = f"{base_instruction_crit}\n\nCandidate Memory:\n{candidate_content}"
-        p_resp = self.permissive(p_prompt)
-        c_resp = self.critical(c_prompt)
-        transcript.append({"role": "permissive", "content": p_resp})
-        transcript.append({"role": "critical", "content": c_resp})
-
-        # Rebuttal rounds
-        for r in range(1, self.rounds):
-            p_rebuttal_prompt = (
-                f"{base_instruction_perm}\n\nOpponent argument to address:\n{c_resp}\n\nCandidate Memory:\n{candidate_content}"
-            )
-            c_rebuttal_prompt = (
-                f"{base_instruction_crit}\n\nOpponent argument to address:\n{p_resp}\n\nCandidate Memory:\n{candidate_content}"
-            )
-            p_resp = self.permissive(p_rebuttal_prompt)
-            c_resp = self.critical(c_rebuttal_prompt)
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="memory-debate") if self.parallel else None
+        try:
+            # Round 1: Initial analyses
+            p_prompt = f"{base_instruction_perm}\n\nCandidate Memory:\n{candidate_content}"
+            c_prompt = f"{base_instruction_crit}\n\nCandidate Memory:\n{candidate_content}"
+            p_resp, c_resp = self._round(executor, p_prompt, c_prompt)
             transcript.append({"role": "permissive", "content": p_resp})
             transcript.append({"role": "critical", "content": c_resp})
-
-        # Simple aggregation heuristic for decision
-        decision = self._decide(transcript)
-        return DebateResult(decision=decision, transcript=transcript)
+            verdicts = (parse_verdict(p_resp), parse_verdict(c_resp))
+            stop = self._converged(verdicts, None)
+            rounds = 1
+
+            # Rebuttal rounds
+            while stop is None and rounds < self.rounds:
+                p_rebuttal_prompt = (
+                    f"{base_instruction_perm}\n\nOpponent argument to address:\n{c_resp}\n\nCandidate Memory:\n{candidate_content}"
+                )
+                c_rebuttal_prompt = (
+                    f"{base_instruction_crit}\n\nOpponent argument to address:\n{p_resp}\n\nCandidate Memory:\n{candidate_content}"
+                )
+                p_resp, c_resp = self._round(executor, p_rebuttal_prompt, c_rebuttal_prompt)
+                transcript.append({"role": "permissive", "content": p_resp})
+                transcript.append({"role": "critical", "content": c_resp})
+                verdicts, previous = (parse_verdict(p_resp), parse_verdict(c_resp)), verdicts
+                stop = self._converged(verdicts, previous)
+                rounds += 1
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=False)
+
+        if stop == "consensus":
+            decision = verdicts[0]
+        else:
+            # Simple aggregation heuristic for decision
+            decision = self._decide(transcript)
+        return DebateResult(decision=decision, transcript=transcript, rounds=rounds, stop_reason=stop or "max_rounds")
+
+    def _round(self, executor: Optional[ThreadPoolExecutor], p_prompt: str, c_prompt: str) -> Tuple[str, str]:
+        if executor is None:
+            return self.permissive(p_prompt), self.critical(c_prompt)
+        p_future = executor.submit(self.permissive, p_prompt)
+        c_resp = self.critical(c_prompt)  # the calling thread serves as the second worker
+        return p_future.result(), c_resp
+
+    def _converged(self, verdicts: Tuple[Optional[str], Optional[str]],
+                   previous: Optional[Tuple[Optional[str], Optional[str]]]) -> Optional[str]:
+        if not self.early_stop or None in verdicts:
+            return None
+        if verdicts[0] == verdicts[1]:
+            return "consensus"
+        if verdicts == previous:
+            return "stalemate"
+        return None
 
     def _decide(self, transcript: List[DebateTurn]) -> str:
         """
@@ -3,7 +3,7 @@
 
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Optional, Tuple
 
 @dataclass(frozen=True)
 class Persona:
@@ -11,24 +11,32 @@ class Persona:
     system_prompt: str  # text appended before stage system prompt
 
 class PersonaRegistry:
+    """Loads personas from `<root>/<name>.md`; a file edited since it was loaded is read again."""
     def __init__(self, root: Path):
         self.root = root
-        self._cache: Dict[str, Persona] = {}
+        self._cache: Dict[str, Tuple[Optional[int], Persona]] = {}
+
+    def _mtime(self, key: str) -> Optional[int]:
+        try:
+            return (self.root / f"{key.lower()}.md").stat().st_mtime_ns
+        except OSError:
+            return None
 
     def load(self, name: str) -> Persona:
         key = name.strip()
-        if key in self._cache:
-            return self._cache[key]
         if key.lower() == "neutral":
-            p = Persona("Neutral", "")
+            return Persona("Neutral", "")
+        mtime = self._mtime(key)
+        cached = self._cache.get(key)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        path = self.root / f"{key.lower()}.md"
+        if mtime is not None:
+            p = Persona(key, path.read_text(encoding="utf-8"))
         else:
-            path = self.root / f"{key.lower()}.md"
-            if path.exists():
-                p = Persona(key, path.read_text(encoding="utf-8"))
-            else:
-                # Fallback minimal persona text to avoid crashes
-                p = Persona(key, f"You are in a {key} mood.")
-        self._cache[key] = p
+            # Fallback minimal persona text to avoid crashes
+            p = Persona(key, f"You are in a {key} mood.")
+        self._cache[key] = (mtime, p)
         return p
 
     def reload(self, name: str) -> Persona:
@@ -40,6 +40,19 @@ _DEFAULTS: dict[str, StagePrompt] = {
             "Return only one JSON object."
         ),
     ),
+    "evaluate_batch": StagePrompt(
+        system=(
+            "You evaluate several proposed actions for the current context, each on its own merits. "
+            "Respond with a strict JSON array only, one object per action in the order given, each "
+            "containing index(action number), label('ACCEPT'|'REJECT'), reason(≤30 words), "
+            "utility(0..1), and risk(0..1). Be concise and realistic."
+        ),
+        user=(
+            "Context:\n{context}\n\n"
+            "Actions:\n{actions}\n\n"
+            "Return only one JSON array with exactly {n} objects."
+        ),
+    ),
     "judge": StagePrompt(
         system=("Decide ACCEPT or REJECT for memory storage. Respond in strict JSON.\n"
                 "Fields: label('ACCEPT'|'REJECT'), reason(str, ≤30 words), "
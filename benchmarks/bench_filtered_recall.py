@@ -0,0 +1,110 @@
+"""
+Filtered recall benchmark for memory_loop.Memory.
+
+Compares, at several filter selectivities:
+  - post-filter:  recall k * overfetch neighbours, then drop non-matching rows in Python
+  - selector:     filter resolved in SQLite, applied inside FAISS via IDSelectorBatch
+  - brute-force:  filter resolved in SQLite, only the matching vectors are scored exactly
+
+Usage:
+    python benchmarks/bench_filtered_recall.py --n 200000 --dim 384 --queries 50
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from agi_mindloop.memory_loop.faiss_indexer import FaissIndexer  # noqa: E402
+from agi_mindloop.memory_loop.memory import Memory, _utc_now_iso  # noqa: E402
+
+SELECTIVITIES = [0.5, 0.1, 0.01, 0.001]
+
+
+class RandomModel:
+    def __init__(self, dim: int, seed: int = 0):
+        self.dim = dim
+        self.rng = np.random.default_rng(seed)
+
+    def encode(self, texts, convert_to_numpy=True, normalize_embeddings=True):
+        v = self.rng.standard_normal((len(texts), self.dim)).astype(np.float32)
+        return v / np.linalg.norm(v, axis=1, keepdims=True)
+
+
+def build(mem: Memory, n: int, dim: int, seed: int) -> None:
+    rng = np.random.default_rng(seed)
+    vecs = rng.standard_normal((n, dim)).astype(np.float32)
+    vecs /= np.linalg.norm(vecs, axis=1, keepdims=True)
+
+    types = np.full(n, "other", dtype=object)
+    start = 0
+    for sel in SELECTIVITIES:
+        count = max(1, int(n * sel))
+        types[start:start + count] = f"sel_{sel}"
+        start += count
+    rng.shuffle(types)
+
+    mem.indexer = FaissIndexer(dimension=dim)
+    mem.indexer.add_vector(vecs, ids=np.arange(n, dtype=np.int64))
+    ts = _utc_now_iso()
+    with mem.conn:
+        mem.conn.executemany(
+            "INSERT INTO memories(id, content, timestamp, type, metadata) VALUES(?,?,?,?,?)",
+            ((f"m{i}", f"memory {i}", ts, types[i], json.dumps({"type": types[i]})) for i in range(n)),
+        )
+        mem.conn.executemany("INSERT INTO faiss_map(id, vector_id) VALUES(?,?)", ((f"m{i}", i) for i in range(n)))
+
+
+def timed(fn, queries):
+    t0 = time.perf_counter()
+    counts = [len(fn(q)) for q in queries]
+    return (time.perf_counter() - t0) * 1000.0 / len(queries), float(np.mean(counts))
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--n", type=int, default=200_000)
+    ap.add_argument("--dim", type=int, default=384)
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--overfetch", type=int, default=5)
+    ap.add_argument("--queries", type=int, default=50)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        mem = Memory(str(Path(tmp) / "bench.db"), str(Path(tmp) / "bench.index"))
+        mem._model = RandomModel(args.dim, args.seed + 1)
+        build(mem, args.n, args.dim, args.seed)
+        queries = [f"query {i}" for i in range(args.queries)]
+        k = args.k
+
+        print(f"n={args.n} dim={args.dim} k={k} overfetch={args.overfetch} queries={args.queries}")
+        print(f"{'selectivity':>11} | {'post-filter ms':>14} {'hits':>5} | {'selector ms':>11} {'hits':>5} | "
+              f"{'brute ms':>8} {'hits':>5}")
+        for sel in SELECTIVITIES:
+            t = f"sel_{sel}"
+
+            def post_filter(q):
+                rows = mem.recall_memories(q, k=k * args.overfetch)
+                return [r for r in rows if r.type == t][:k]
+
+            mem.indexer.brute_force_max = 0
+            sel_ms, sel_hits = timed(lambda q: mem.recall_memories(q, k=k, mem_type=t), queries)
+            mem.indexer.brute_force_max = args.n
+            bf_ms, bf_hits = timed(lambda q: mem.recall_memories(q, k=k, mem_type=t), queries)
+            pf_ms, pf_hits = timed(post_filter, queries)
+            print(f"{sel:>11} | {pf_ms:>14.2f} {pf_hits:>5.1f} | {sel_ms:>11.2f} {sel_hits:>5.1f} | "
+                  f"{bf_ms:>8.2f} {bf_hits:>5.1f}")
+        mem.close()
+
+
+if __name__ == "__main__":
+    main()
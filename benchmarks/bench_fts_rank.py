@@ -0,0 +1,128 @@
+"""
+Keyword-ranking benchmark for MetaStore artifacts.
+
+Compares the previous approach (fetch up to 200 FTS matches with full content, re-score BM25
+in Python) against FTS5-side ranking (`fts_candidates` with bm25() and a top-k limit, then
+snippets for the final k only).
+
+Usage:
+    python benchmarks/bench_fts_rank.py --n 1000000 --queries 100
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from agi_mindloop.memory.meta_store import MetaStore  # noqa: E402
+
+_word = re.compile(r"[A-Za-z0-9_]+")
+
+
+def _tokenize(t: str) -> List[str]:
+    return [w.lower() for w in _word.findall(t or "")]
+
+
+def python_bm25(query: str, docs: List[Tuple[int, str]], k1: float = 1.2, b: float = 0.75) -> Dict[int, float]:
+    """The Python re-scoring hybrid_recall used before ranking moved into FTS5."""
+    q_terms = _tokenize(query)
+    if not q_terms or not docs:
+        return {}
+    toks = {doc_id: _tokenize(txt) for doc_id, txt in docs}
+    N = len(docs)
+    dl = {doc_id: len(ts) for doc_id, ts in toks.items()}
+    avgdl = (sum(dl.values()) / max(N, 1)) or 1.0
+    df: Dict[str, int] = {}
+    for ts in toks.values():
+        for t in set(ts):
+            if t in q_terms:
+                df[t] = df.get(t, 0) + 1
+    scores: Dict[int, float] = {doc_id: 0.0 for doc_id, _ in docs}
+    for t in q_terms:
+        n_qi = df.get(t, 0)
+        if n_qi == 0:
+            continue
+        idf = math.log((N - n_qi + 0.5) / (n_qi + 0.5) + 1.0)
+        for doc_id, ts in toks.items():
+            f_qi = ts.count(t)
+            denom = f_qi + k1 * (1 - b + b * (dl[doc_id] / avgdl))
+            scores[doc_id] += idf * ((f_qi * (k1 + 1)) / max(denom, 1e-9))
+    return scores
+
+
+def populate(store: MetaStore, n: int, vocab: int, words: int, seed: int) -> List[str]:
+    rng = np.random.default_rng(seed)
+    lexicon = [f"w{i}" for i in range(vocab)]
+    batch = 50_000
+    with store.conn:
+        for start in range(0, n, batch):
+            count = min(batch, n - start)
+            ranks = np.minimum(rng.zipf(1.2, size=(count, words)) - 1, vocab - 1)
+            rows = [
+                (start + i + 1, " ".join(lexicon[r] for r in ranks[i]))
+                for i in range(count)
+            ]
+            store.conn.executemany(
+                "INSERT INTO artifacts(id, cycle_id, kind, content, created_at) VALUES(?, NULL, 'bench', ?, 'now')",
+                rows,
+            )
+    return lexicon
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--n", type=int, default=1_000_000)
+    ap.add_argument("--vocab", type=int, default=50_000)
+    ap.add_argument("--words", type=int, default=40, help="words per artifact")
+    ap.add_argument("--queries", type=int, default=100)
+    ap.add_argument("--k", type=int, default=8)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(args.seed + 1)
+    with tempfile.TemporaryDirectory() as tmp:
+        store = MetaStore(str(Path(tmp) / "bench.db"))
+        t0 = time.perf_counter()
+        lexicon = populate(store, args.n, args.vocab, args.words, args.seed)
+        print(f"built {args.n} artifacts in {time.perf_counter() - t0:.1f}s")
+
+        queries = [
+            " ".join(lexicon[int(i)] for i in rng.integers(20, 2000, size=3)) for _ in range(args.queries)
+        ]
+
+        def old(q: str):
+            terms = " OR ".join(_tokenize(q))
+            with store._reader() as conn:
+                docs = conn.execute(
+                    "SELECT rowid, content FROM fts_artifacts WHERE fts_artifacts MATCH ? LIMIT 200", (terms, )
+                ).fetchall()
+            scores = python_bm25(q, docs)
+            return sorted(scores, key=scores.get, reverse=True)[: args.k]
+
+        def new(q: str):
+            ranked = store.fts_candidates(q, limit=args.k)
+            store.fts_snippets(q, [i for i, _ in ranked])
+            return [i for i, _ in ranked]
+
+        for name, fn in (("python re-score (200 docs)", old), ("fts5 bm25 + top-k", new)):
+            fn(queries[0])  # warm page cache
+            t0 = time.perf_counter()
+            for q in queries:
+                fn(q)
+            ms = (time.perf_counter() - t0) * 1000.0 / len(queries)
+            print(f"{name:>28}: {ms:8.2f} ms/query")
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Write throughput for MetaStore: one commit per call versus the write-behind group commit.
+
+Each run inserts artifacts and memories and increments recall counters the way a recall-heavy
+cycle does (several hits per stored memory), then reports rows/sec from `write_stats()` and the
+wall time including the final flush.
+
+Usage:
+    python benchmarks/bench_group_commit.py --rows 20000 --flush-ms 50 --flush-rows 256
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from agi_mindloop.memory.meta_store import MetaStore  # noqa: E402
+
+
+def workload(store: MetaStore, rows: int, dim: int, recalls: int, rng: np.random.Generator) -> None:
+    mem_ids = []
+    for i in range(rows):
+        if i % 4 == 0:
+            store.add_artifact(None, "note", f"artifact {i} text", "now")
+        elif i % 4 == 1 or not mem_ids:
+            mem_ids.append(store.add_memory(rng.standard_normal(dim).astype(np.float32), {}, 0.5, 0.1, "now", "bench"))
+        else:
+            for j in rng.integers(0, len(mem_ids), size=recalls):
+                store.inc_recall(mem_ids[int(j)])
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--rows", type=int, default=20_000)
+    ap.add_argument("--dim", type=int, default=384)
+    ap.add_argument("--recalls", type=int, default=4, help="recall increments per recall step")
+    ap.add_argument("--flush-ms", type=float, default=50.0)
+    ap.add_argument("--flush-rows", type=int, default=256)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    print(f"rows={args.rows} dim={args.dim} flush_ms={args.flush_ms} flush_rows={args.flush_rows}")
+    print(f"{'mode':>14} | {'wall s':>7} | {'rows/s':>9} | {'tx':>6} | {'rows/tx':>7}")
+    for mode in ("per-call", "write-behind"):
+        with tempfile.TemporaryDirectory() as tmp:
+            store = MetaStore(str(Path(tmp) / "bench.db"), write_behind=mode == "write-behind",
+                              flush_ms=args.flush_ms, flush_rows=args.flush_rows)
+            t0 = time.perf_counter()
+            workload(store, args.rows, args.dim, args.recalls, np.random.default_rng(args.seed))
+            store.flush()
+            wall = time.perf_counter() - t0
+            st = store.write_stats()
+            store.close()
+        print(f"{mode:>14} | {wall:>7.2f} | {st['rows_per_sec']:>9.0f} | {st['transactions']:>6} | "
+              f"{st['rows_per_transaction']:>7.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Per-experiment latency of Sandbox.run for `python3 <script>.py`: a fresh interpreter per run versus
+the pre-forked PythonWorkerPool.
+
+The experiment script imports the pool's preloaded modules and does a little work, like the
+small scripts under experiments/. Reports mean / p50 / p95 wall time for both paths and the
+pool's own saved_ms estimate.
+
+Usage:
+    python benchmarks/bench_python_pool.py --runs 50 --workers 2
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from agi_mindloop.action.experimenter import Sandbox  # noqa: E402
+from agi_mindloop.action.python_pool import DEFAULT_PRELOAD, PythonWorkerPool  # noqa: E402
+
+SCRIPT = """\
+import json, math, random, statistics
+xs = [random.random() for _ in range(10000)]
+print(json.dumps({"mean": statistics.fmean(xs), "sqrt": math.sqrt(len(xs))}))
+"""
+
+
+def timed(sandbox: Sandbox, runs: int) -> list:
+    out = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        res = sandbox.run("sh: python3 experiment.py")
+        out.append((time.perf_counter() - t0) * 1000.0)
+        if not res.get("ok"):
+            raise SystemExit(f"experiment failed: {res}")
+    return out
+
+
+def summary(name: str, ms: list) -> str:
+    q = statistics.quantiles(ms, n=20)
+    return f"{name:>8}: mean {statistics.fmean(ms):8.2f} ms  p50 {statistics.median(ms):8.2f}  p95 {q[18]:8.2f}"
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--runs", type=int, default=50)
+    ap.add_argument("--workers", type=int, default=2)
+    ap.add_argument("--max-runs", type=int, default=20, help="recycle a worker after this many runs")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as d:
+        Path(d, "experiment.py").write_text(SCRIPT)
+        cold = timed(Sandbox(allowlist=["python3"], cwd=d), args.runs)
+        with PythonWorkerPool(workers=args.workers, max_runs=args.max_runs, preload=DEFAULT_PRELOAD) as pool:
+            warm = timed(Sandbox(allowlist=["python3"], cwd=d, python_pool=pool), args.runs)
+            st = pool.stats()
+
+    print(summary("fresh", cold))
+    print(summary("pooled", warm))
+    print(f"speedup x{statistics.fmean(cold) / statistics.fmean(warm):.1f}; "
+          f"pool estimate: cold start {st['cold_start_ms']:.1f} ms, "
+          f"saved {st['scripts']['experiment.py']['mean_saved_ms']:.1f} ms/run, recycled {st['recycled']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Recall-loss report for compressed vector storage against float32.
+
+Index variants (VectorStore storage=flat|fp16|sq8) are compared with exact float32 search on
+recall@k and bytes per vector. Embedding BLOB codecs (MetaStore f32|f16|i8) are compared the same
+way: neighbours are recomputed exactly from the decoded vectors. A capacity estimate for the
+target deployment is printed at the end.
+
+Usage:
+    python benchmarks/bench_quantization.py --n 50000 --dim 1024 --queries 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import faiss
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from agi_mindloop.memory.meta_store import decode_embedding, encode_embedding  # noqa: E402
+from agi_mindloop.memory.vector_store import VectorStore, _norm  # noqa: E402
+
+
+def clustered(n: int, dim: int, clusters: int, rng: np.random.Generator) -> np.ndarray:
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    x = centers[rng.integers(0, clusters, n)] + 0.5 * rng.standard_normal((n, dim)).astype(np.float32)
+    return _norm(x)
+
+
+def recall_at_k(found: np.ndarray, truth: np.ndarray) -> float:
+    k = truth.shape[1]
+    return float(np.mean([len(set(f[:k]) & set(t)) / k for f, t in zip(found, truth)]))
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--n", type=int, default=50_000)
+    ap.add_argument("--dim", type=int, default=1024)
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--M", type=int, default=32)
+    ap.add_argument("--target", type=int, default=10_000_000, help="memories for the capacity estimate")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    data = clustered(args.n, args.dim, 256, rng)
+    queries = clustered(args.queries, args.dim, 256, rng)
+    exact = faiss.IndexFlatIP(args.dim)
+    exact.add(data)
+    _, truth = exact.search(queries, args.k)
+    ids = np.arange(args.n, dtype=np.int64)
+
+    print(f"n={args.n} dim={args.dim} k={args.k} M={args.M}")
+    print(f"{'variant':>12} | {'recall@k':>8} | {'bytes/vec':>9} | {'build s':>7} | {'GB @ target':>11}")
+    per_vec = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for storage in ("flat", "fp16", "sq8"):
+            path = os.path.join(tmp, f"{storage}.faiss")
+            vs = VectorStore(path, dim=args.dim, M=args.M, storage=storage)
+            t0 = time.perf_counter()
+            vs.train(data[: min(args.n, 20_000)])
+            vs.add(ids, data)
+            build = time.perf_counter() - t0
+            found = np.array([[i for i, _ in hits] + [-1] * (args.k - len(hits)) for hits in
+                              (vs.search(q[None, :], args.k) for q in queries)])
+            vs.save()
+            per_vec[storage] = os.path.getsize(path) / args.n
+            print(f"{'hnsw-' + storage:>12} | {recall_at_k(found, truth):>8.4f} | {per_vec[storage]:>9.0f} | "
+                  f"{build:>7.1f} | {per_vec[storage] * args.target / 1e9:>11.1f}")
+
+    blob_bytes = {}
+    for codec in ("f32", "f16", "i8"):
+        blobs = [encode_embedding(v, codec) for v in data]
+        decoded = np.stack([decode_embedding(b) for b in blobs])
+        flat = faiss.IndexFlatIP(args.dim)
+        flat.add(decoded)
+        _, found = flat.search(queries, args.k)
+        blob_bytes[codec] = float(np.mean([len(b) for b in blobs]))
+        err = float(np.abs(decoded - data).max())
+        print(f"{'blob-' + codec:>12} | {recall_at_k(found, truth):>8.4f} | {blob_bytes[codec]:>9.0f} | "
+              f"{'':>7} | {blob_bytes[codec] * args.target / 1e9:>11.1f}   max abs err {err:.2e}")
+
+    print()
+    for storage, codec in (("flat", "f32"), ("fp16", "f16"), ("sq8", "i8")):
+        total = (per_vec[storage] + blob_bytes[codec]) * args.target / 1e9
+        print(f"{args.target:,} memories with hnsw-{storage} + blob-{codec}: ~{total:.1f} GB "
+              f"(index in RAM: {per_vec[storage] * args.target / 1e9:.1f} GB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+HNSW parameter sweep for memory.VectorStore: recall@k versus queries/second.
+
+For every (M, efConstruction) pair an index is built over a synthetic clustered corpus, then
+every efSearch value is timed with one batched `search_many` call. Prints a table, and optionally
+writes CSV and a recall/QPS chart (the chart needs matplotlib).
+
+Usage:
+    python benchmarks/sweep_hnsw.py --n 100000 --dim 1024 --M 16 32 --ef-construction 40 200 \\
+        --ef-search 16 32 64 128 256 --csv sweep.csv --plot sweep.png
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import faiss
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from agi_mindloop.memory.vector_store import VectorStore, _norm  # noqa: E402
+
+
+def clustered(n: int, dim: int, clusters: int, rng: np.random.Generator) -> np.ndarray:
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    x = centers[rng.integers(0, clusters, n)] + 0.5 * rng.standard_normal((n, dim)).astype(np.float32)
+    return _norm(x)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--n", type=int, default=100_000)
+    ap.add_argument("--dim", type=int, default=1024)
+    ap.add_argument("--queries", type=int, default=1000)
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--storage", default="flat", choices=["flat", "fp16", "sq8"])
+    ap.add_argument("--M", type=int, nargs="+", default=[16, 32])
+    ap.add_argument("--ef-construction", type=int, nargs="+", default=[40, 200])
+    ap.add_argument("--ef-search", type=int, nargs="+", default=[16, 32, 64, 128, 256])
+    ap.add_argument("--csv", help="write results to this CSV file")
+    ap.add_argument("--plot", help="write a recall-vs-QPS chart to this image file")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    data = clustered(args.n, args.dim, 512, rng)
+    queries = clustered(args.queries, args.dim, 512, rng)
+    exact = faiss.IndexFlatIP(args.dim)
+    exact.add(data)
+    _, truth = exact.search(queries, args.k)
+    truth_sets = [set(t) for t in truth.tolist()]
+
+    rows = []
+    print(f"n={args.n} dim={args.dim} queries={args.queries} k={args.k} storage={args.storage}")
+    print(f"{'M':>4} {'efC':>5} {'efS':>5} | {'recall@k':>8} | {'QPS':>9} | {'build s':>7}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for M in args.M:
+            for efc in args.ef_construction:
+                vs = VectorStore(os.path.join(tmp, f"m{M}_c{efc}.faiss"), dim=args.dim, M=M,
+                                 storage=args.storage, ef_construction=efc)
+                t0 = time.perf_counter()
+                vs.train(data[: min(args.n, 20_000)])
+                vs.add(np.arange(args.n), data)
+                build = time.perf_counter() - t0
+                for efs in args.ef_search:
+                    t0 = time.perf_counter()
+                    results = vs.search_many(queries, args.k, ef_search=efs)
+                    qps = args.queries / (time.perf_counter() - t0)
+                    recall = float(np.mean([
+                        len({i for i, _ in res} & t) / args.k for res, t in zip(results, truth_sets)
+                    ]))
+                    rows.append({"M": M, "ef_construction": efc, "ef_search": efs,
+                                 "recall": recall, "qps": qps, "build_s": build})
+                    print(f"{M:>4} {efc:>5} {efs:>5} | {recall:>8.4f} | {qps:>9.0f} | {build:>7.1f}")
+
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+    if args.plot:
+        try:
+            import matplotlib
+            matplotlib.use("Agg")
+            import matplotlib.pyplot as plt
+        except ImportError:
+            print("matplotlib is not installed; skipping --plot")
+            return
+        fig, ax = plt.subplots(figsize=(7, 5))
+        for M in args.M:
+            for efc in args.ef_construction:
+                pts = [r for r in rows if r["M"] == M and r["ef_construction"] == efc]
+                ax.plot([r["recall"] for r in pts], [r["qps"] for r in pts], marker="o", label=f"M={M} efC={efc}")
+        ax.set_xlabel(f"recall@{args.k}")
+        ax.set_ylabel("queries / second")
+        ax.set_yscale("log")
+        ax.legend()
+        ax.set_title(f"HNSW sweep, n={args.n}, dim={args.dim}, {args.storage}")
+        fig.savefig(args.plot, bbox_inches="tight")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+from pathlib import Path
+import json
+import sys
+import threading
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import pytest
+
+pytest.importorskip("openai")
+
+from agi_mindloop.action.debate import decide_actions
+from agi_mindloop.llm.engine import GenOptions
+
+
+class ScriptedEngine:
+    """Answers evaluate prompts from a per-action table, after `delay` seconds."""
+
+    def __init__(self, answers, delay=0.0, delays=None, reentrant=False):
+        self.answers = answers
+        self.delay = delay
+        self.delays = delays or {}
+        self.reentrant = reentrant
+        self.calls = []
+        self.lock = threading.Lock()
+        self.in_flight = self.max_in_flight = 0
+
+    def complete(self, req, gen):
+        action = req.user.split("Action:")[1].strip()
+        with self.lock:
+            self.calls.append(action)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.delays.get(action, self.delay))
+            answer = self.answers[action]
+            return answer if isinstance(answer, str) else json.dumps(answer)
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+
+def _decide(a, b, candidates, **kw):
+    return decide_actions(
+        candidates=candidates, context="ctx", neutral_sys="A", persona_sys="B",
+        eval_sys="", eval_user="Context: {context}\nAction: {action}",
+        engine_a=a, engine_b=b, gen=GenOptions(), veto_risk=0.6, **kw,
+    )
+
+
+def _ok(u, r=0.0):
+    return {"label": "ACCEPT", "reason": "", "utility": u, "risk": r}
+
+
+def test_reentrant_engines_run_concurrently_and_best_wins_ties_to_earliest():
+    answers = {"x": _ok(0.5), "y": _ok(0.9), "z": _ok(0.9)}
+    a = ScriptedEngine(answers, delay=0.05, reentrant=True)
+    b = ScriptedEngine(answers, delay=0.05, reentrant=True)
+
+    best = _decide(a, b, ["x", "y", "z"], max_concurrency=6)
+
+    assert best.action == "y"
+    assert a.max_in_flight > 1 and b.max_in_flight > 1
+    assert sorted(a.calls) == sorted(b.calls) == ["x", "y", "z"]
+
+
+def test_other_engines_take_one_call_at_a_time_and_nothing_outlives_the_decision():
+    answers = {"x": _ok(0.5), "y": _ok(0.9), "z": _ok(0.1, r=0.9)}
+    shared = ScriptedEngine(answers, delay=0.02)  # one in-process model behind both personas
+
+    best = _decide(shared, shared, ["x", "y", "z"], max_concurrency=6)
+
+    assert best.action == "y"
+    assert shared.max_in_flight == 1
+    assert shared.in_flight == 0  # dropped candidates' running calls were joined
+
+
+def test_out_of_range_scores_are_clamped():
+    answers = {"x": _ok(0.8), "y": {"label": "ACCEPT", "reason": "", "utility": 5, "risk": -2}}
+    best = _decide(ScriptedEngine(answers, reentrant=True), ScriptedEngine(answers, reentrant=True), ["x", "y"])
+    assert best.action == "y" and best.utility_b == 1.0 and best.risk_b == 0.0
+
+
+def test_veto_skips_persona_call_and_hopeless_candidates_are_pruned():
+    a = ScriptedEngine({"safe": _ok(1.0), "risky": _ok(1.0, r=0.9), "weak": _ok(0.1)}, delays={"weak": 0.2})
+    b = ScriptedEngine({"safe": _ok(1.0), "risky": _ok(1.0), "weak": _ok(0.1)}, delay=0.1)
+    stats = {}
+
+    best = _decide(a, b, ["safe", "risky", "weak"], max_concurrency=1, stats=stats)
+
+    assert best.action == "safe"
+    assert "risky" not in b.calls  # A vetoed before B's call was started
+    assert stats["vetoed"] == 1 and stats["pruned"] == 1 and stats["skipped"] >= 1
+
+
+class BatchEngine(ScriptedEngine):
+    """Answers evaluate_batch prompts with `batch` (a JSON-able value) and single prompts from the table."""
+
+    def __init__(self, answers, batch):
+        super().__init__(answers)
+        self.batch = batch
+
+    def complete(self, req, gen):
+        if "Actions:" in req.user:
+            with self.lock:
+                self.calls.append("*batch*")
+            return "Scores:\n" + json.dumps(self.batch)
+        return super().complete(req, gen)
+
+
+def test_batch_mode_makes_one_call_per_persona_and_refills_missing_entries():
+    answers = {"x": _ok(0.5), "y": _ok(0.9), "z": _ok(0.2)}
+    a = BatchEngine(answers, [dict(_ok(0.5), index=1), dict(_ok(0.9), index=2), dict(_ok(0.2), index=3)])
+    b = BatchEngine(answers, [dict(_ok(0.5), index=1), dict(_ok(0.2), index=3)])  # y is missing
+    stats = {}
+
+    best = _decide(a, b, ["x", "y", "z"], stats=stats, batch_sys="",
+                   batch_user="Context: {context}\nActions:\n{actions}\n({n})")
+
+    assert best.action == "y"
+    assert a.calls == ["*batch*"]
+    assert b.calls == ["*batch*", "y"]  # only the missing entry is re-asked
+    assert stats["calls"] == 3 and stats["fallbacks"] == 1
+
+
+def test_parse_eval_batch_validates_length_and_labels():
+    from agi_mindloop.debate import parse_eval_batch
+
+    full = json.dumps([_ok(0.1), {"label": "maybe"}, _ok(0.3)])
+    assert [e and e["utility"] for e in parse_eval_batch(full, 3)] == [0.1, None, 0.3]
+    # a short array without indexes cannot be aligned to candidates
+    assert parse_eval_batch(json.dumps([_ok(0.1), _ok(0.2)]), 3) == [None, None, None]
+    assert parse_eval_batch("no json here", 2) == [None, None]
+
+
+def test_eval_cache_reuses_evaluations_until_prompt_changes_or_ttl():
+    from agi_mindloop.action.eval_cache import EvalCache
+
+    answers = {"x": _ok(0.5), "y": _ok(0.9)}
+    a, b = ScriptedEngine(answers), ScriptedEngine(answers)
+    cache = EvalCache(capacity=8, ttl_s=60.0)
+    stats = {}
+
+    _decide(a, b, ["x", "y"], cache=cache)
+    best = _decide(a, b, ["x ", " y"], cache=cache, stats=stats)  # whitespace is normalized away
+
+    assert best.action == " y"
+    assert len(a.calls) == 2 and len(b.calls) == 2
+    assert stats["cached"] == 4 and stats["calls"] == 0
+
+    # a new persona text is a new key
+    decide_actions(
+        candidates=["x"], context="ctx", neutral_sys="A", persona_sys="B, edited",
+        eval_sys="", eval_user="Context: {context}\nAction: {action}",
+        engine_a=a, engine_b=b, gen=GenOptions(), veto_risk=0.6, cache=cache,
+    )
+    assert len(a.calls) == 2 and len(b.calls) == 3
+
+    cache.ttl_s = 0.0
+    time.sleep(0.01)
+    _decide(a, b, ["x"], cache=cache)
+    assert len(a.calls) == 3
+    assert cache.stats()["expired"] >= 1
+
+
+def test_eval_cache_skips_answers_without_a_valid_label():
+    from agi_mindloop.action.eval_cache import EvalCache
+
+    a = ScriptedEngine({"x": _ok(0.5)})
+    b = ScriptedEngine({"x": "sorry, I cannot evaluate that"})
+    cache = EvalCache(capacity=8, ttl_s=60.0)
+
+    assert _decide(a, b, ["x"], cache=cache) is None
+    assert len(cache) == 1  # only A's verdict
+
+    b.answers["x"] = _ok(0.7)
+    best = _decide(a, b, ["x"], cache=cache)
+    assert best is not None and best.utility_b == 0.7
+    assert len(a.calls) == 1 and len(b.calls) == 2
+
+
+def test_eval_cache_evicts_least_recently_used():
+    from agi_mindloop.action.eval_cache import EvalCache
+
+    cache = EvalCache(capacity=2)
+    cache.put(("e", "p", "v", "x", "c"), _ok(0.1))
+    cache.put(("e", "p", "v", "y", "c"), _ok(0.2))
+    assert cache.get(("e", "p", "v", "x", "c")) is not None
+    cache.put(("e", "p", "v", "z", "c"), _ok(0.3))
+
+    assert cache.get(("e", "p", "v", "y", "c")) is None
+    assert cache.stats()["evicted"] == 1 and len(cache) == 2
@@ -13,3 +13,9 @@ def test_default_config_loads_packaged_resources():
     planner_prompt = loader.load("planner")
     assert "You are a planner" in planner_prompt.system
     assert "{input}" in planner_prompt.user
+
+
+def test_shipped_config_keeps_the_minhash_check_off_like_the_dataclass():
+    from agi_mindloop.config import MemoryCfg
+
+    assert load_config("config/config.yaml").memory.minhash_threshold == MemoryCfg().minhash_threshold == 0.0
@@ -0,0 +1,63 @@
+from pathlib import Path
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from agi_mindloop.core_loop import CurationPool, _memory_job_handlers
+from agi_mindloop.jobs import JobQueue, JobWorkers
+
+
+def _gate_payload(n=1):
+    return {"candidate": f"candidate {n}", "expl": f"explanation {n}", "key": f"gate:{n}"}
+
+
+def test_curate_job_recovered_after_a_restart_still_has_its_explanation(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    q = JobQueue(path)
+    handlers = _memory_job_handlers(lambda candidate: True, CurationPool(), q, lambda: None)
+    q.enqueue("memory_gate", _gate_payload(), key="gate:1")
+    job = q.claim("w", ["memory_gate"])
+    q.complete(job, handlers["memory_gate"](job.payload))
+    assert q.claim("crashed-worker", ["curate"]) is not None  # the process dies mid-curate
+    q.close()
+
+    q = JobQueue(path)
+    assert q.recover(stale_after_s=0) == 1
+    pool = CurationPool()  # the in-memory pool did not survive
+    with JobWorkers(q, _memory_job_handlers(lambda candidate: True, pool, q, lambda: None), poll_s=0.01) as workers:
+        assert workers.wait_idle(5.0)
+    assert pool.items == ["explanation 1"]
+    assert q.stats() == {"queued": 0, "running": 0, "done": 2, "dead": 0}
+
+
+def test_retried_gate_job_pools_its_explanation_once(tmp_path):
+    q = JobQueue(str(tmp_path / "jobs.sqlite3"), backoff_s=0.01)
+    pool = CurationPool()
+    gated = []
+    failures = [RuntimeError("notify failed")]
+
+    def notify():
+        if failures:
+            raise failures.pop()
+
+    def gate(candidate):
+        gated.append(candidate)
+        return True
+
+    job_id = q.enqueue("memory_gate", _gate_payload(), key="gate:1")
+    with JobWorkers(q, _memory_job_handlers(gate, pool, q, notify), poll_s=0.01) as workers:
+        deadline = time.time() + 10
+        while q.get(job_id)["status"] != "done" and time.time() < deadline:
+            workers.wait_idle(1.0)  # a job waiting out its backoff counts as idle
+        assert workers.wait_idle(5.0)
+        st = workers.stats()
+
+    assert len(gated) == 2  # the first attempt failed after enqueuing the curate job
+    assert st["retried"] == 1 and st["queue_done"] == 2
+    assert pool.items == ["explanation 1"]
+
+    handlers = _memory_job_handlers(gate, pool, q, lambda: None)
+    handlers["curate"]({"key": "gate:1", "expl": "explanation 1"})  # delivered again
+    handlers["curate"]({})  # queued before payloads carried the explanation
+    assert pool.items == ["explanation 1"]
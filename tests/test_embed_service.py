@@ -0,0 +1,73 @@
+from pathlib import Path
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+np = pytest.importorskip("numpy")
+
+from agi_mindloop.memory.embed_service import EmbeddingService
+
+
+class RecordingModel:
+    """Fake embedder: each row is [len(text), call index]; records every batch it sees."""
+
+    dim = 2
+
+    def __init__(self):
+        self.batches = []
+        self.entered = threading.Event()
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def encode(self, texts):
+        self.entered.set()
+        self.gate.wait()
+        self.batches.append([len(t) for t in texts])
+        return np.array([[len(t), len(self.batches)] for t in texts], dtype=np.float32)
+
+
+def test_concurrent_requests_are_coalesced_and_bucketed():
+    model = RecordingModel()
+    model.gate.clear()
+    svc = EmbeddingService(model, max_batch=4, max_wait_ms=50)
+    try:
+        blocker = svc.submit(["x"])  # occupies the worker until the gate opens
+        assert model.entered.wait(5)
+        futures = [svc.submit(["a" * 3, "b" * 40]), svc.submit(["c" * 5]), svc.submit(["d" * 41, "e" * 2])]
+        assert svc.stats()["queue_depth"] == 5
+        model.gate.set()
+
+        out = [f.result(timeout=5) for f in futures]
+        blocker.result(timeout=5)
+    finally:
+        model.gate.set()
+        svc.close()
+
+    assert out[0][:, 0].tolist() == [3, 40]
+    assert out[2][:, 0].tolist() == [41, 2]
+    # one call per length bucket: short and long texts never share a batch
+    assert sorted(sorted(b) for b in model.batches[1:]) == [[2, 3], [5], [40, 41]]
+    stats = svc.stats()
+    assert stats["texts"] == 6 and stats["queue_depth"] == 0
+
+
+def test_batches_respect_max_batch_and_errors_propagate():
+    model = RecordingModel()
+    svc = EmbeddingService(model, max_batch=2, max_wait_ms=1)
+    try:
+        assert svc.encode(["aa", "bb", "cc"]).shape == (3, 2)
+        assert max(len(b) for b in model.batches) == 2
+
+        model.encode = lambda texts: (_ for _ in ()).throw(ValueError("boom"))
+        with pytest.raises(ValueError):
+            svc.encode(["zz"])
+
+        # too few rows back: every caller in the batch fails instead of waiting forever
+        model.encode = lambda texts: np.zeros((len(texts) - 1, 2), dtype=np.float32)
+        with pytest.raises(ValueError, match="batch of 2"):
+            svc.submit(["aa", "bb"]).result(timeout=5)
+    finally:
+        svc.close()
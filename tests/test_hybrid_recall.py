@@ -0,0 +1,56 @@
+from pathlib import Path
+import sys
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("faiss")
+
+from agi_mindloop.memory.meta_store import MetaStore
+from agi_mindloop.memory.recall import hybrid_recall
+
+
+class FakeVectorStore:
+    def __init__(self, hits):
+        self.hits = hits
+
+    def search(self, query, k):
+        return self.hits[:k]
+
+
+def test_hybrid_recall_uses_given_store(tmp_path):
+    store = MetaStore(str(tmp_path / "meta.db"))
+    try:
+        aid = store.add_artifact(None, "note", "the quick brown fox", "now")
+        store.add_artifact(None, "note", "unrelated text", "now")
+
+        out = hybrid_recall(None, FakeVectorStore([(7, 0.9)]), np.ones(4, dtype=np.float32), "fox", k=5, store=store)
+
+        assert [(r["kind"], r["id"]) for r in out] == [("memory", 7), ("artifact", aid)]
+        assert out[1]["bm25"] == 1.0
+        assert out[1]["snippet"] == "the quick brown [fox]"
+    finally:
+        store.close()
+
+
+def test_two_stage_recall_rescores_with_stored_embeddings(tmp_path):
+    from agi_mindloop.memory.recall import two_stage_recall
+
+    store = MetaStore(str(tmp_path / "meta.db"))
+    try:
+        q = np.array([1.0, 0.0, 0.0, 0.0], dtype=np.float32)
+        close = store.add_memory(np.array([0.9, 0.1, 0.0, 0.0], np.float32).tobytes(), {}, 0.5, 0.1, "now", "test")
+        far = store.add_memory(np.array([0.0, 1.0, 0.0, 0.0], np.float32).tobytes(), {}, 0.5, 0.1, "now", "test")
+        # ANN scores disagree with the stored vectors; stage 2 must correct them.
+        vs = FakeVectorStore([(far, 0.95), (close, 0.40)])
+
+        res = two_stage_recall(None, vs, q, "nothing matches", k=2, store=store)
+
+        assert [r["id"] for r in res.items] == [close, far]
+        assert res.items[0]["cosine"] == pytest.approx(0.9 / np.linalg.norm([0.9, 0.1]), rel=1e-5)
+        assert res.items[1]["cosine"] == 0.0
+        assert set(res.timings) == {"candidates_ms", "rescore_ms", "materialize_ms", "total_ms"}
+    finally:
+        store.close()
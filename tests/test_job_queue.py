@@ -0,0 +1,129 @@
+from pathlib import Path
+import sys
+import threading
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from agi_mindloop.jobs import JobQueue, JobWorkers
+
+
+def test_enqueue_is_idempotent_per_key(tmp_path):
+    q = JobQueue(str(tmp_path / "jobs.sqlite3"))
+    a = q.enqueue("memory_gate", {"candidate": "x"}, key="gate:1")
+    b = q.enqueue("memory_gate", {"candidate": "other"}, key="gate:1")
+    c = q.enqueue("memory_gate", {"candidate": "y"})
+    d = q.enqueue("memory_gate", {"candidate": "y"})
+
+    assert a == b
+    assert c != d  # jobs without a key are never merged
+    assert q.get(a)["payload"] == {"candidate": "x"}
+    assert q.stats()["queued"] == 3
+
+
+def test_claim_complete_and_backoff_until_dead(tmp_path):
+    q = JobQueue(str(tmp_path / "jobs.sqlite3"), backoff_s=10.0, max_attempts=2)
+    job_id = q.enqueue("curate", {})
+
+    job = q.claim("w1")
+    assert job.id == job_id and job.attempts == 1
+    assert q.claim("w2") is None  # leased
+
+    before = time.time()
+    assert q.fail(job, "boom") is True
+    row = q.get(job_id)
+    assert row["status"] == "queued" and row["last_error"] == "boom"
+    assert row["run_after"] >= before + 8.0  # 10s backoff with jitter
+    assert q.claim("w1") is None  # not due yet
+
+    q.conn.execute("UPDATE jobs SET run_after=0 WHERE id=?", (job_id,))
+    job = q.claim("w1")
+    assert job.attempts == 2
+    assert q.fail(job, "boom again") is False
+    assert q.get(job_id)["status"] == "dead"
+
+    other = q.enqueue("curate", {"n": 1})
+    q.complete(q.claim("w1"), {"ok": True})
+    assert q.get(other)["status"] == "done" and q.get(other)["result"] == {"ok": True}
+
+
+def test_running_jobs_survive_a_restart(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    q = JobQueue(path)
+    job_id = q.enqueue("memory_debate", {"summary": "s"}, key="debate:s")
+    assert q.claim("crashed-worker") is not None
+    q.close()  # the process dies with the job leased
+
+    q = JobQueue(path)
+    assert q.claim("w") is None
+    assert q.recover(stale_after_s=0) == 1
+    job = q.claim("w")
+    assert job.id == job_id and job.attempts == 2 and job.payload == {"summary": "s"}
+    # the key still holds after the restart
+    assert q.enqueue("memory_debate", {"summary": "s"}, key="debate:s") == job_id
+
+
+def test_expired_lease_is_reclaimed(tmp_path):
+    q = JobQueue(str(tmp_path / "jobs.sqlite3"), lease_s=0.05)
+    q.enqueue("curate", {})
+    first = q.claim("w1")
+    time.sleep(0.1)
+    second = q.claim("w2")
+    assert second.id == first.id and second.attempts == 2
+
+
+def test_workers_run_handlers_and_retry_failures(tmp_path):
+    q = JobQueue(str(tmp_path / "jobs.sqlite3"), backoff_s=0.01, max_attempts=3)
+    seen = []
+    calls = {"flaky": 0}
+    lock = threading.Lock()
+    events = []
+
+    def ok(payload):
+        with lock:
+            seen.append(payload["n"])
+        return payload["n"] * 2
+
+    def flaky(payload):
+        calls["flaky"] += 1
+        if calls["flaky"] < 3:
+            raise RuntimeError("transient")
+        return "done"
+
+    ids = [q.enqueue("ok", {"n": i}) for i in range(5)]
+    flaky_id = q.enqueue("flaky", {})
+    orphan = q.enqueue("unknown", {})
+    workers = JobWorkers(q, {"ok": ok, "flaky": flaky}, workers=3, poll_s=0.01,
+                         on_event=lambda name, **kv: events.append(name))
+    with workers:
+        deadline = time.time() + 10
+        while q.get(flaky_id)["status"] != "done" and time.time() < deadline:
+            workers.wait_idle(1.0)
+        assert workers.wait_idle(5.0)
+
+    assert sorted(seen) == list(range(5))
+    assert [q.get(i)["result"] for i in ids] == [0, 2, 4, 6, 8]
+    assert q.get(flaky_id)["attempts"] == 3
+    assert events == ["jobs.retry", "jobs.retry"]
+    assert q.get(orphan)["status"] == "queued"  # no handler: left for whoever can run it
+    st = workers.stats()
+    assert st["completed"] == 6 and st["retried"] == 2 and st["dead"] == 0
+
+
+def test_finished_keys_expire_and_old_jobs_are_purged(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    q = JobQueue(path, retention_s=60.0)
+    first = q.enqueue("memory_gate", {"candidate": "x"}, key="gate:x")
+    q.complete(q.claim("w"))
+    assert q.enqueue("memory_gate", {"candidate": "x"}, key="gate:x") == first  # still within retention
+
+    q.conn.execute("UPDATE jobs SET updated_at=updated_at-120")
+    again = q.enqueue("memory_gate", {"candidate": "x"}, key="gate:x")
+    assert again != first and q.get(first) is None and q.get(again)["status"] == "queued"
+
+    done = q.enqueue("curate", {})
+    q.complete(q.claim("w", ["curate"]))
+    q.conn.execute("UPDATE jobs SET updated_at=updated_at-120 WHERE id=?", (done,))
+    q.close()
+    q = JobQueue(path, retention_s=60.0)  # start-up purge
+    assert q.get(done) is None and q.get(again) is not None
@@ -0,0 +1,67 @@
+from pathlib import Path
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+pytest.importorskip("numpy")
+pytest.importorskip("faiss")
+
+from agi_mindloop.memory_loop.memory_debate import MemoryDebate, parse_verdict
+
+
+class Reviewer:
+    """Answers with the scripted verdicts in turn; records each call."""
+
+    def __init__(self, verdicts, barrier=None):
+        self.verdicts = list(verdicts)
+        self.barrier = barrier
+        self.prompts = []
+
+    def __call__(self, prompt):
+        if self.barrier is not None:
+            self.barrier.wait()  # only returns once the other reviewer is in its call too
+        self.prompts.append(prompt)
+        verdict = self.verdicts[min(len(self.prompts), len(self.verdicts)) - 1]
+        return f"argument {len(self.prompts)}\nVERDICT: {verdict}" if verdict else "no verdict given"
+
+
+def test_parse_verdict_takes_the_last_marker():
+    assert parse_verdict("VERDICT: REJECT ... on reflection\n**Verdict:** accept") == "accept"
+    assert parse_verdict("verdict : Reject") == "reject"
+    assert parse_verdict("I think we should accept it") is None
+
+
+def test_consensus_in_round_one_stops_after_one_parallel_pair():
+    barrier = threading.Barrier(2, timeout=5)
+    perm, crit = Reviewer(["ACCEPT"], barrier), Reviewer(["ACCEPT"], barrier)
+    res = MemoryDebate(perm, crit, rounds=3).validate_memory("the build needs python 3.11")
+
+    assert res.decision == "accept"
+    assert (res.rounds, res.stop_reason) == (1, "consensus")
+    assert len(perm.prompts) == len(crit.prompts) == 1
+    assert "VERDICT: ACCEPT" in perm.prompts[0]
+
+
+def test_rebuttal_consensus_and_stalemate():
+    perm, crit = Reviewer(["ACCEPT", "REJECT"]), Reviewer(["REJECT"])
+    res = MemoryDebate(perm, crit, rounds=3).validate_memory("x")
+    assert (res.decision, res.rounds, res.stop_reason) == ("reject", 2, "consensus")
+    assert "argument 1" in perm.prompts[1]  # rebuttals still see the other side's previous answer
+
+    perm, crit = Reviewer(["ACCEPT"]), Reviewer(["REJECT"])
+    res = MemoryDebate(perm, crit, rounds=3).validate_memory("x")
+    assert (res.rounds, res.stop_reason) == (2, "stalemate")
+    assert len(res.transcript) == 4
+
+
+def test_full_debate_without_verdicts_or_early_stop():
+    perm, crit = Reviewer([None]), Reviewer([None])
+    res = MemoryDebate(perm, crit, rounds=3).validate_memory("x")
+    assert (res.decision, res.rounds, res.stop_reason) == ("needs_review", 3, "max_rounds")
+
+    perm, crit = Reviewer(["ACCEPT"]), Reviewer(["ACCEPT"])
+    res = MemoryDebate(perm, crit, rounds=3, parallel=False, early_stop=False).validate_memory("x")
+    assert (res.rounds, res.stop_reason, len(crit.prompts)) == (3, "max_rounds", 3)
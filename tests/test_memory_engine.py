@@ -0,0 +1,190 @@
+from pathlib import Path
+import hashlib
+import sys
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("faiss")
+
+from agi_mindloop.memory.engine import MemoryEngine
+from agi_mindloop.memory.migrate import import_memory_loop_db, reindex_from_embeddings
+from agi_mindloop.memory_loop.engine_memory import EngineMemory
+from agi_mindloop.memory_loop.memory import Memory
+
+
+class FakeEmbedder:
+    """Bag-of-words hashing embedder; counts encode() calls."""
+
+    dim = 32
+
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, texts, **_):
+        self.calls.append(list(texts))
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.lower().split():
+                out[row, int(hashlib.md5(word.encode()).hexdigest(), 16) % self.dim] += 1.0
+        return out
+
+
+def _engine(tmp_path, embedder=None):
+    return MemoryEngine(str(tmp_path / "meta.db"), str(tmp_path / "vectors.faiss"), embedder=embedder or FakeEmbedder())
+
+
+def test_engine_memory_api_and_hybrid_recall_share_one_store(tmp_path):
+    embedder = FakeEmbedder()
+    engine = _engine(tmp_path, embedder)
+    mem = EngineMemory(engine)
+    try:
+        apple = mem.add_memory("apple pie recipe", {"type": "observation", "src": "a"})
+        pear = mem.add_memory("pear tart recipe", {"type": "reflection", "src": "b"})
+
+        assert mem.recall_memories("apple pie", k=1)[0].id == apple.id
+        assert [r.id for r in mem.recall_memories("apple pie", k=5, mem_type="reflection")] == [pear.id]
+        assert [r.id for r in mem.recall_memories("recipe", k=5, metadata={"src": "a"})] == [apple.id]
+        items = engine.recall("apple pie", k=2)
+        assert items[0]["kind"] == "memory"
+        assert engine.get([items[0]["id"]])[items[0]["id"]]["uid"] == apple.id
+        # one encode per stored text and one per query, nothing embedded twice
+        assert sum(len(c) for c in embedder.calls) == 2 + 3 + 1
+
+        assert mem.forget_memory(apple.id)
+        assert [r.id for r in mem.recall_memories("apple pie", k=5)] == [pear.id]
+    finally:
+        mem.close()
+
+
+def test_migration_imports_memory_loop_db_once_and_reindexes(tmp_path):
+    old = Memory(str(tmp_path / "memory.db"), str(tmp_path / "faiss.index"))
+    old._model = FakeEmbedder()
+    originals = [old.add_memory(f"note about topic {i}", {"type": "observation", "n": i}) for i in range(5)]
+    old.close()
+
+    engine = _engine(tmp_path)
+    try:
+        assert import_memory_loop_db(engine, str(tmp_path / "memory.db"), batch_size=2) == 5
+        assert import_memory_loop_db(engine, str(tmp_path / "memory.db")) == 0
+
+        mem = EngineMemory(engine)
+        hit = mem.recall_memories("note about topic 3", k=1)[0]
+        assert hit.id == originals[3].id and hit.metadata == {"type": "observation", "n": 3}
+        assert hit.timestamp == originals[3].timestamp
+
+        (tmp_path / "vectors.faiss").unlink()
+        engine._vectors = None
+        assert reindex_from_embeddings(engine) == 5
+        assert mem.recall_memories("note about topic 3", k=1)[0].id == originals[3].id
+    finally:
+        engine.close()
+
+
+def test_hot_tier_serves_popular_memories_and_follows_recall_counts(tmp_path):
+    engine = MemoryEngine(str(tmp_path / "meta.db"), str(tmp_path / "vectors.faiss"),
+                          embedder=FakeEmbedder(), hot_capacity=2, hot_threshold=0.9)
+    try:
+        ids = engine.add_many([f"topic{i} words{i}" for i in range(20)])
+        tier = engine.tier
+        engine.store.inc_recall_many([ids[3]] * 5 + [ids[4]] * 4)
+        assert tier.rebalance() == {"promoted": 2, "evicted": 0}
+
+        assert engine.search(["topic3 words3"], k=1)[0][0][0] == ids[3]
+        assert engine.search(["topic7 words7"], k=1)[0][0][0] == ids[7]
+        stats = tier.stats()
+        assert stats["hot_hits"] == 1 and stats["queries"] == 2 and stats["hit_rate"] == 0.5
+
+        engine.store.inc_recall_many([ids[7]] * 10)
+        assert tier.rebalance() == {"promoted": 1, "evicted": 1}
+        engine.remove([ids[7]])
+        assert tier.hot_size == 1
+        assert ids[7] not in [i for i, _ in engine.search(["topic7 words7"], k=3)[0]]
+    finally:
+        engine.close()
+
+
+def test_max_similarity_probes_do_not_count_as_recalls(tmp_path):
+    engine = MemoryEngine(str(tmp_path / "meta.db"), str(tmp_path / "vectors.faiss"),
+                          embedder=FakeEmbedder(), hot_capacity=2, hot_threshold=0.0)
+    mem = EngineMemory(engine)
+    try:
+        ids = engine.add_many([f"topic{i} words{i}" for i in range(5)])
+        assert engine.tier is not None
+        assert mem.max_similarity("topic3 words3") > 0.99
+        engine.store.flush()
+        assert {i: r["recall_count"] for i, r in engine.get(ids).items()} == dict.fromkeys(ids, 0)
+
+        engine.search(["topic3 words3"], k=1)  # a real search still counts
+        engine.store.flush()
+        assert engine.get([ids[3]])[ids[3]]["recall_count"] == 1
+    finally:
+        mem.close()
+
+
+def test_recall_goes_through_the_hot_tier_which_rebalances_off_the_query_path(tmp_path):
+    engine = MemoryEngine(str(tmp_path / "meta.db"), str(tmp_path / "vectors.faiss"),
+                          embedder=FakeEmbedder(), hot_capacity=8, hot_threshold=0.0)
+    try:
+        engine.add_many([f"topic{i} words{i}" for i in range(20)])
+        engine.recall("topic3 words3", k=2)  # no hot set yet: served cold, selection starts in the background
+        engine.tier.wait_for_rebalance(5)
+        assert engine.tier.hot_size == 8
+        engine.recall("topic3 words3", k=2)
+        assert engine.tier.stats()["hot_hits"] == 1
+
+        with engine.store._reader() as conn:
+            plan = " ".join(str(r) for r in conn.execute(
+                "EXPLAIN QUERY PLAN SELECT id, embedding FROM memories WHERE embedding IS NOT NULL "
+                "ORDER BY recall_count DESC, created_at DESC, id DESC LIMIT 8"))
+        assert "idx_memories_recall" in plan
+    finally:
+        engine.close()
+
+
+def test_sharded_engine_skips_shards_outside_time_filter(tmp_path):
+    engine = MemoryEngine(str(tmp_path / "meta.db"), str(tmp_path / "shards"),
+                          embedder=FakeEmbedder(), shard_by="month")
+    try:
+        stamps = ["2025-01-10T00:00:00.000000Z", "2025-02-10T00:00:00.000000Z", "2025-03-10T00:00:00.000000Z"]
+        ids = engine.add_many(["apple pie"] * 3, created_at=stamps, uids=["a", "b", "c"])
+        mem = EngineMemory(engine)
+
+        assert engine.shards_for(since="2025-02-01T00:00:00Z") == ["2025-02", "2025-03"]
+        assert {r.id for r in mem.recall_memories("apple pie", k=5, since="2025-02-01T00:00:00Z")} == {"b", "c"}
+        assert engine.vectors.sealed == ["2025-01", "2025-02"]
+
+        assert reindex_from_embeddings(engine) == 3
+        assert sorted(engine.vectors.shards) == ["2025-01", "2025-02", "2025-03"]
+        assert {i for i, _ in engine.search(["apple pie"], k=5)[0]} == set(ids)
+    finally:
+        engine.close()
+
+
+class NoModel(FakeEmbedder):
+    """Fails if the engine needs the embedding model just to open an index."""
+
+    @property
+    def dim(self):
+        raise AssertionError("dim read from the embedder")
+
+
+def test_vector_dim_comes_from_the_index_or_the_embedder(tmp_path):
+    (tmp_path / "shards").mkdir()  # exists, but holds no shard yet: the embedder's dim applies
+    engine = MemoryEngine(str(tmp_path / "meta.db"), str(tmp_path / "shards"),
+                          embedder=FakeEmbedder(), shard_by="month")
+    engine.add_many(["apple pie"], created_at=["2025-01-10T00:00:00.000000Z"])
+    assert engine.vectors.dim == FakeEmbedder.dim
+    engine.close()
+
+    flat = MemoryEngine(str(tmp_path / "flat.db"), str(tmp_path / "flat.faiss"), embedder=FakeEmbedder())
+    flat.add_many(["apple pie"])
+    flat.close()
+
+    # existing indexes report their own dimension without loading the model
+    for path, shard_by in ((tmp_path / "shards", "month"), (tmp_path / "flat.faiss", None)):
+        reopened = MemoryEngine(str(tmp_path / "meta.db"), str(path), embedder=NoModel(), shard_by=shard_by)
+        assert reopened.vectors.dim == FakeEmbedder.dim
+        reopened.close()
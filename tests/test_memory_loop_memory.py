@@ -0,0 +1,206 @@
+from pathlib import Path
+import hashlib
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("faiss")
+
+import faiss
+
+from agi_mindloop.memory_loop.faiss_indexer import FaissIndexer, read_manifest
+from agi_mindloop.memory_loop.memory import Memory
+
+
+class FakeModel:
+    """Deterministic bag-of-words embedder standing in for SentenceTransformer."""
+
+    dim = 32
+
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, texts, convert_to_numpy=True, normalize_embeddings=True):
+        self.calls.append(list(texts))
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.lower().split():
+                h = int(hashlib.md5(word.encode()).hexdigest(), 16)
+                out[row, h % self.dim] += 1.0
+        out /= np.linalg.norm(out, axis=1, keepdims=True) + 1e-12
+        return out
+
+
+@pytest.fixture
+def memory(tmp_path):
+    mem = Memory(str(tmp_path / "memory.db"), str(tmp_path / "faiss.index"))
+    mem._model = FakeModel()
+    yield mem
+    mem.close()
+
+
+def test_recall_memories_many_matches_single_recall(memory):
+    for text in ["red apple pie", "blue ocean waves", "green forest trail", "apple orchard harvest"]:
+        memory.add_memory(text, {"type": "observation", "src": text.split()[0]})
+    memory._model.calls.clear()
+
+    queries = ["apple", "ocean waves", "forest"]
+    batched = memory.recall_memories_many(queries, k=2)
+
+    assert len(memory._model.calls) == 1  # one embedding pass for all queries
+    assert [[r.id for r in rows] for rows in batched] == [
+        [r.id for r in memory.recall_memories(q, k=2)] for q in queries
+    ]
+    assert batched[1][0].content == "blue ocean waves"
+    assert batched[1][0].metadata == {"type": "observation", "src": "blue"}
+
+
+def test_recall_memories_many_shares_duplicate_rows(memory):
+    memory.add_memory("only memory", {"type": "reflection"})
+
+    first, second = memory.recall_memories_many(["only", "memory"], k=3)
+
+    assert first[0] is second[0]
+    assert memory.recall_memories_many([], k=3) == []
+
+
+def test_forget_many_tombstones_then_compacts(tmp_path):
+    mem = Memory(str(tmp_path / "memory.db"), str(tmp_path / "faiss.index"), compact_threshold=3)
+    mem._model = FakeModel()
+    try:
+        records = [mem.add_memory(f"apple note {i}", {"type": "observation"}) for i in range(5)]
+
+        assert mem.forget_many([records[0].id, records[1].id]) == 2
+        assert mem.indexer.ntotal == 5  # tombstoned, not yet compacted
+        recalled = {r.id for r in mem.recall_memories("apple note", k=5)}
+        assert recalled == {r.id for r in records[2:]}
+
+        # Reopening keeps forgotten vectors out of search results.
+        reopened = FaissIndexer.load_index(mem.index_path)
+        ids, _ = reopened.search(mem._embed_text("apple note 0"), k=5)
+        assert not set(ids.tolist()) & {0, 1}
+
+        assert mem.forget_memory(records[2].id) is True
+        mem.indexer.wait_for_compaction()
+        assert mem.indexer.ntotal == 2
+        assert mem.indexer.tombstones == frozenset()
+        assert mem.add_memory("apple note new", {}).id in {r.id for r in mem.recall_memories("apple note new", k=1)}
+    finally:
+        mem.close()
+
+
+
+def test_snapshots_publish_index_and_tombstones_together(tmp_path):
+    path = str(tmp_path / "faiss.index")
+    vecs = np.eye(4, dtype=np.float32)
+    writer = FaissIndexer(dimension=4)
+    writer.add_vector(vecs, ids=np.arange(4, dtype=np.int64))
+    writer.save_index(path)
+    first = read_manifest(path)
+
+    writer.remove_many([0, 1])
+    writer.save_tombstones(path)  # same index file, new tombstone file, one manifest swap
+    second = read_manifest(path)
+    assert second["index"] == first["index"] and second["tombstones"]
+
+    # a reader that read the previous manifest can still open exactly that snapshot
+    assert set(FaissIndexer.load_index(path).tombstones) == {0, 1}
+    assert faiss.read_index(first["index"]).ntotal == 4
+
+    writer.compact(path)
+    third = read_manifest(path)
+    reader = FaissIndexer.load_index(path, mmap=True)
+    assert reader.ntotal == 2 and reader.tombstones == frozenset() and third["tombstones"] is None
+    # the previous snapshot keeps its files; older ones are collected
+    assert Path(second["index"]).exists() and Path(second["tombstones"]).exists()
+    assert len(list(tmp_path.glob("faiss.index.g*.index"))) == 2
+
+
+def test_compaction_builds_a_copy_outside_the_lock(monkeypatch):
+    idx = FaissIndexer(dimension=4)
+    idx.add_vector(np.eye(4, dtype=np.float32), ids=np.arange(4, dtype=np.int64))
+    idx.remove_many([0, 1])
+    real = faiss.IDSelectorBatch
+    during = []
+
+    def hooked(ids):
+        if not during:  # the compactor's remove_ids pass is about to run
+            during.append(None)
+
+            def write():
+                idx.add_vector(np.full((1, 4), 0.5, dtype=np.float32), ids=np.array([9]))
+                idx.remove_many([2])
+                during.append(idx.search(np.eye(4, dtype=np.float32)[3], k=1)[0].tolist())
+
+            t = threading.Thread(target=write)
+            t.start()
+            t.join(5)
+            assert not t.is_alive()  # writers and readers are not blocked by the pass
+        return real(ids)
+
+    monkeypatch.setattr(faiss, "IDSelectorBatch", hooked)
+    assert idx.compact() == 2
+    assert during[1] == [3]
+    # the vector added and the id tombstoned during the pass both survive the swap
+    assert idx.ntotal == 3 and idx.tombstones == frozenset({2})
+    assert idx.search(np.full(4, 0.5, dtype=np.float32), k=2)[0].tolist() == [9, 3]
+
+
+def test_bare_index_files_still_load(tmp_path):
+    path = str(tmp_path / "faiss.index")
+    legacy = faiss.IndexIDMap2(faiss.IndexFlatL2(4))
+    legacy.add_with_ids(np.eye(4, dtype=np.float32), np.arange(4, dtype=np.int64))
+    faiss.write_index(legacy, path)
+    np.save(f"{path}.tombstones.npy", np.array([3], dtype=np.int64))
+
+    loaded = FaissIndexer.load_index(path)
+    assert loaded.ntotal == 4 and loaded.tombstones == frozenset({3})
+    loaded.remove_many([2])
+    loaded.save_tombstones(path)  # first publish converts the file into a manifest
+    assert read_manifest(path) is not None and not Path(f"{path}.tombstones.npy").exists()
+    assert FaissIndexer.load_index(path).tombstones == frozenset({2, 3})
+
+
+@pytest.mark.parametrize("brute_force_max", [0, 256])
+def test_filtered_recall_returns_k_matches(memory, brute_force_max):
+    for i in range(20):
+        memory.add_memory(f"apple note {i}", {"type": "observation", "tag": "noise"})
+    wanted = [memory.add_memory(f"pear note {i}", {"type": "reflection", "tag": "keep"}) for i in range(3)]
+    memory.indexer.brute_force_max = brute_force_max
+
+    hits = memory.recall_memories("apple note", k=3, mem_type="reflection")
+    assert {r.id for r in hits} == {r.id for r in wanted}
+
+    hits = memory.recall_memories_many(["apple"], k=2, metadata={"tag": "keep"})[0]
+    assert len(hits) == 2 and all(r.metadata["tag"] == "keep" for r in hits)
+
+    assert memory.recall_memories("apple", k=3, since="2999-01-01T00:00:00.000000Z") == []
+    assert len(memory.recall_memories("apple", k=3, until="2999-01-01T00:00:00.000000Z")) == 3
+
+
+def test_read_only_reader_follows_published_snapshots(memory):
+    memory.add_memory("apple pie", {"type": "observation"})
+    reader = Memory(memory.db_path, memory.index_path, read_only=True)
+    reader._model = FakeModel()
+    try:
+        assert reader.indexer.read_only
+        assert [r.content for r in reader.recall_memories("apple", k=5)] == ["apple pie"]
+
+        memory.add_memory("ocean waves", {"type": "observation"})
+        assert {r.content for r in reader.recall_memories("ocean", k=5)} == {"apple pie", "ocean waves"}
+
+        with pytest.raises(RuntimeError):
+            reader.add_memory("nope", {})
+    finally:
+        reader.close()
+
+
+def test_max_similarity_is_cosine_to_nearest_memory(memory):
+    assert memory.max_similarity("anything") == 0.0
+    memory.add_memory("red apple pie", {"type": "observation"})
+    assert memory.max_similarity("red apple pie") == pytest.approx(1.0, abs=1e-5)
+    assert memory.max_similarity("blue ocean waves") < 0.5
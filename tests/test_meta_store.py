@@ -1,10 +1,12 @@
 from pathlib import Path
 import sys
 
+import pytest
+
 
 sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 
-from agi_mindloop.memory.meta_store import MetaStore
+from agi_mindloop.memory.meta_store import MetaStore, WriteBehindError
 
 
 def _make_store(tmp_path):
@@ -41,3 +43,157 @@ def test_get_artifacts_text_empty_input_returns_empty_dict(tmp_path):
         assert result == {}
     finally:
         store.close()
+
+
+def test_shared_store_is_reused_and_readers_see_writes(tmp_path):
+    path = str(tmp_path / "shared.db")
+    store = MetaStore.shared(path)
+    try:
+        assert MetaStore.shared(path) is store
+        artifact_id = store.add_artifact(None, "note", "shared reader text", "now")
+
+        with store._reader() as conn:
+            assert conn.execute("PRAGMA query_only").fetchone()[0] == 1
+        assert store.get_artifacts_text([artifact_id]) == {artifact_id: "shared reader text"}
+        assert [i for i, _ in store.fts_candidates("reader")] == [artifact_id]
+    finally:
+        store.close()
+    assert MetaStore.shared(path) is not store
+    MetaStore.shared(path).close()
+
+
+def test_shared_store_rejects_conflicting_options(tmp_path):
+    path = str(tmp_path / "shared.db")
+    store = MetaStore.shared(path, embedding_codec="f16")
+    try:
+        assert MetaStore.shared(path) is store  # options left out are fine
+        assert MetaStore.shared(path, embedding_codec="f16", readers=4) is store  # 4 is the default
+        with pytest.raises(ValueError, match="embedding_codec='f16'; got embedding_codec='i8'"):
+            MetaStore.shared(path, embedding_codec="i8")
+        with pytest.raises(ValueError, match="write_behind"):
+            MetaStore.shared(path, write_behind=True)
+    finally:
+        store.close()
+
+
+def test_fts_candidates_are_ranked_in_sqlite(tmp_path):
+    store, cycle_id = _make_store(tmp_path)
+    try:
+        weak = store.add_artifact(cycle_id, "note", "apple banana cherry date elder fig grape", "now")
+        strong = store.add_artifact(cycle_id, "note", "apple apple", "now")
+        store.add_artifact(cycle_id, "note", "nothing relevant", "now")
+
+        ranked = store.fts_candidates('apple "OR', limit=5)
+
+        assert [i for i, _ in ranked] == [strong, weak]
+        assert ranked[0][1] > ranked[1][1] > 0
+        assert store.fts_candidates("apple", limit=1) == ranked[:1]
+    finally:
+        store.close()
+
+
+def test_fts_candidates_match_non_ascii_terms(tmp_path):
+    store, cycle_id = _make_store(tmp_path)
+    try:
+        cafe = store.add_artifact(cycle_id, "note", "Über das Café in Zürich", "now")
+        kanji = store.add_artifact(cycle_id, "note", "東京 の 天気", "now")
+        plain = store.add_artifact(cycle_id, "note", "uber cafe zurich", "now")
+
+        # unicode61 folds case and diacritics on both sides
+        assert sorted(i for i, _ in store.fts_candidates("ÜBER Zürich")) == [cafe, plain]
+        assert [i for i, _ in store.fts_candidates("東京")] == [kanji]
+    finally:
+        store.close()
+
+
+@pytest.mark.parametrize("codec,tol", [("f32", 0.0), ("f16", 1e-3), ("i8", 1e-2)])
+def test_embedding_codecs_round_trip(tmp_path, codec, tol):
+    np = pytest.importorskip("numpy")
+    vec = np.linspace(-0.5, 0.5, 64).astype(np.float32)
+    store = MetaStore(str(tmp_path / "meta.db"), embedding_codec=codec)
+    try:
+        mid = store.add_memory(vec, {}, 0.5, 0.1, "now", "test")
+        legacy = store.add_memory(vec.tobytes(), {}, 0.5, 0.1, "now", "test")
+
+        ids, mat = store.get_memory_embeddings([mid, legacy])
+
+        assert sorted(ids.tolist()) == [mid, legacy]
+        assert np.abs(mat - vec).max() <= tol + 1e-7
+        blob = store.conn.execute("SELECT embedding FROM memories WHERE id=?", (mid,)).fetchone()[0]
+        assert len(blob) == {"f32": 256, "f16": 4 + 128, "i8": 8 + 64}[codec]
+    finally:
+        store.close()
+
+
+def test_write_behind_batches_rows_and_flushes(tmp_path):
+    store = MetaStore(str(tmp_path / "meta.db"), write_behind=True, flush_ms=10_000, flush_rows=10_000)
+    try:
+        aid = store.add_artifact(None, "note", "queued artifact text", "now")
+        mid = store.add_memory(b"\x00" * 16, {"k": 1}, 0.5, 0.1, "now", "test")
+        for _ in range(5):
+            store.inc_recall(mid)
+        assert store.get_artifacts_text([aid]) == {}
+
+        store.flush()
+
+        assert store.get_artifacts_text([aid]) == {aid: "queued artifact text"}
+        assert [i for i, _ in store.fts_candidates("queued")] == [aid]
+        assert store.conn.execute("SELECT recall_count FROM memories WHERE id=?", (mid,)).fetchone()[0] == 5
+        stats = store.write_stats()
+        assert stats["transactions"] == 1 and stats["rows"] == 3 and stats["pending"] == 0
+        assert store.add_artifact(None, "note", "after flush", "now") == aid + 1
+    finally:
+        store.close()
+    reopened = MetaStore(str(tmp_path / "meta.db"))
+    try:
+        assert reopened.get_artifacts_text([aid + 1]) == {aid + 1: "after flush"}
+    finally:
+        reopened.close()
+
+
+def test_write_behind_failure_drops_only_the_bad_row_and_is_reported(tmp_path):
+    seen = []
+    store = MetaStore(str(tmp_path / "meta.db"), write_behind=True, flush_ms=10_000, flush_rows=10_000,
+                      on_write_error=lambda kind, row_id, exc: seen.append((kind, row_id)))
+    store.add_memory(b"\x00" * 16, {}, 0.5, 0.1, "now", "test", uid="dup")
+    store.flush()
+
+    good = store.add_artifact(None, "note", "good row", "now")
+    bad = store.add_memory(b"\x00" * 16, {}, 0.5, 0.1, "now", "test", uid="dup")  # UNIQUE(uid) violation
+    also_good = store.add_memory(b"\x00" * 16, {}, 0.5, 0.1, "now", "test", uid="fresh")
+    with pytest.raises(WriteBehindError) as err:
+        store.flush()
+
+    assert [(k, i) for k, i, _ in err.value.failed] == [("memory", bad)] == seen
+    assert store.get_artifacts_text([good]) == {good: "good row"}
+    assert store.memory_ids_for_uids(["fresh"]) == {"fresh": also_good}
+    store.flush()  # reported once
+
+    store.add_memory(b"\x00" * 16, {}, 0.5, 0.1, "now", "test", uid="dup")
+    with pytest.raises(WriteBehindError):
+        store.close()  # a failure still pending at shutdown is not swallowed
+
+
+def test_fts_triggers_and_maintenance(tmp_path):
+    from agi_mindloop.memory.fts_maintenance import FtsMaintainer
+
+    store = MetaStore(str(tmp_path / "meta.db"), fts_automerge=0)
+    try:
+        ids = [store.add_artifact(None, "note", f"segment text {i}", "now") for i in range(6)]
+        store.conn.execute("UPDATE artifacts SET content = 'rewritten words' WHERE id = ?", (ids[0],))
+        store.conn.execute("DELETE FROM artifacts WHERE id = ?", (ids[1],))
+        store.conn.commit()
+
+        assert [i for i, _ in store.fts_candidates("rewritten")] == [ids[0]]
+        assert sorted(i for i, _ in store.fts_candidates("segment")) == ids[2:]
+        assert store.fts_segment_count() >= 6
+
+        maintainer = FtsMaintainer(store, optimize_segments=4)
+        sample = maintainer.run_once(force=True)
+
+        assert sample.action == "optimize" and sample.segments == 1
+        health = maintainer.health()
+        assert health["segments"] == 1 and health["optimizes"] == 1 and len(health["history"]) == 1
+        assert sorted(i for i, _ in store.fts_candidates("segment")) == ids[2:]
+    finally:
+        store.close()
@@ -0,0 +1,65 @@
+from pathlib import Path
+import json
+import sys
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+pytest.importorskip("numpy")
+pytest.importorskip("openai")
+
+from agi_mindloop.llm.engine import GenOptions
+from agi_mindloop.memory.debate_gate import should_store
+from agi_mindloop.memory.novelty import MinHasher, NoveltyGate
+
+
+class CountingJudge:
+    def __init__(self):
+        self.calls = 0
+
+    def complete(self, req, gen):
+        self.calls += 1
+        return json.dumps({"label": "ACCEPT", "reason": "", "risk": 0.1, "importance": 0.5, "uncertainty": 0.2})
+
+
+def _store(text, a, b, novelty):
+    return should_store(text, "", "", "", "{candidate}", a, b, GenOptions(), veto_risk=0.8, novelty=novelty)
+
+
+def test_index_duplicates_skip_both_judges():
+    nearest = {"seen before": 0.97, "brand new idea": 0.40}
+    gate = NoveltyGate(similarity=nearest.get, threshold=0.92)
+    a, b = CountingJudge(), CountingJudge()
+
+    assert _store("seen before", a, b, gate) is False
+    assert a.calls == b.calls == 0
+    assert _store("brand new idea", a, b, gate) is True
+    assert a.calls == b.calls == 1
+    assert gate.stats()["judge_calls_saved"] == 2
+
+
+def test_minhash_catches_repeats_not_yet_indexed():
+    gate = NoveltyGate(minhash_threshold=0.8)
+    text = "the plan lists files in the data directory and then prints the largest one found"
+
+    assert gate.check(text).novel
+    repeat = gate.check(text + " .")
+    assert not repeat.novel and repeat.minhash_similarity >= 0.8
+    assert gate.check("a completely different reflection about memory consolidation schedules").novel
+
+
+def test_failing_similarity_lets_the_judges_decide():
+    def broken(_text):
+        raise RuntimeError("index unavailable")
+
+    gate = NoveltyGate(similarity=broken)
+    assert gate.check("anything").novel and gate.stats()["errors"] == 1
+
+
+def test_minhash_estimate_tracks_jaccard():
+    h = MinHasher(num_perm=128)
+    words = [f"w{i}" for i in range(60)]
+    same = (h.signature(" ".join(words)) == h.signature(" ".join(words))).mean()
+    half = (h.signature(" ".join(words[:40])) == h.signature(" ".join(words[20:]))).mean()
+    assert same == 1.0 and 0.2 < half < 0.5  # true shingle Jaccard is 18/58 ~ 0.31
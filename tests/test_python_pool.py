@@ -0,0 +1,129 @@
+from pathlib import Path
+import sys
+import threading
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import pytest
+
+from agi_mindloop.action.experimenter import Sandbox
+from agi_mindloop.action.python_pool import PythonWorkerPool
+
+
+@pytest.fixture
+def pool():
+    p = PythonWorkerPool(workers=1, max_runs=3, preload=("json",))
+    yield p
+    p.close()
+
+
+def test_experiments_run_in_warm_workers_and_failures_recycle(tmp_path, pool):
+    (tmp_path / "pid.py").write_text("import os, sys\nprint(os.getpid(), *sys.argv[1:])\n")
+    (tmp_path / "boom.py").write_text("import sys\nsys.exit(3)\n")
+    sandbox = Sandbox(allowlist=["python3"], cwd=str(tmp_path), python_pool=pool)
+
+    first = sandbox.run("sh: python3 pid.py a b")
+    second = sandbox.run("sh: python3 pid.py")
+    assert first["ok"] and first["pooled"] and first["argv"] == ["python3", "pid.py", "a", "b"]
+    assert first["stdout"].split()[1:] == ["a", "b"]
+    assert first["stdout"].split()[0] == second["stdout"].split()[0]  # same warm worker
+
+    failed = sandbox.run("sh: python3 boom.py")
+    third = sandbox.run("sh: python3 pid.py")
+    assert failed["code"] == 3 and not failed["ok"]
+    assert third["stdout"].split()[0] != first["stdout"].split()[0]  # replaced after the failure
+
+    st = pool.stats()
+    assert st["runs"] == 4 and st["recycled"] == 1
+    assert st["scripts"]["pid.py"]["runs"] == 3
+
+
+def test_timeout_kills_the_worker_and_pool_keeps_serving(tmp_path, pool):
+    (tmp_path / "slow.py").write_text("import time\ntime.sleep(5)\n")
+    (tmp_path / "ok.py").write_text("print('fine')\n")
+    sandbox = Sandbox(allowlist=["python3"], cwd=str(tmp_path), python_pool=pool)
+
+    assert sandbox.run("sh: python3 slow.py", timeout_sec=0.3)["error"] == "timeout"
+    assert sandbox.run("sh: python3 ok.py")["stdout"] == "fine\n"
+    assert pool.stats()["timeouts"] == 1
+
+
+def _running(pid):
+    try:
+        state = Path(f"/proc/{pid}/stat").read_text().split(")")[-1].split()[0]
+    except FileNotFoundError:
+        return False
+    return state != "Z"
+
+
+def test_timeout_also_kills_processes_the_experiment_started(tmp_path, pool):
+    (tmp_path / "spawn.py").write_text(
+        "import subprocess, time\n"
+        "p = subprocess.Popen(['sleep', '30'])\n"
+        "open('child.pid', 'w').write(str(p.pid))\n"
+        "time.sleep(5)\n"
+    )
+    sandbox = Sandbox(allowlist=["python3"], cwd=str(tmp_path), python_pool=pool)
+
+    assert sandbox.run("sh: python3 spawn.py", timeout_sec=0.5)["error"] == "timeout"
+    child = int((tmp_path / "child.pid").read_text())
+    deadline = time.time() + 5
+    while _running(child) and time.time() < deadline:
+        time.sleep(0.05)
+    assert not _running(child)
+
+
+def test_long_output_keeps_the_tail(tmp_path, pool):
+    (tmp_path / "loud.py").write_text("print('x' * 100000 + 'END')\n")
+    sandbox = Sandbox(allowlist=["python3"], cwd=str(tmp_path), python_pool=pool)
+
+    res = sandbox.run("sh: python3 loud.py")
+    assert res["stdout"].endswith("xEND\n") and len(res["stdout"]) == 8000
+
+
+def test_lines_stream_while_running_and_a_timeout_keeps_partial_output(tmp_path, pool):
+    (tmp_path / "chatty.py").write_text(
+        "import sys, time\n"
+        "print('started', flush=True)\n"
+        "print('warming up', file=sys.stderr, flush=True)\n"
+        "time.sleep(5)\n"
+    )
+    sandbox = Sandbox(allowlist=["python3"], cwd=str(tmp_path), python_pool=pool)
+    seen = []
+
+    res = sandbox.run("sh: python3 chatty.py", timeout_sec=1.0,
+                      on_line=lambda stream, line: seen.append((stream, line, time.monotonic())))
+    ended = time.monotonic()
+
+    assert res["error"] == "timeout" and res["pooled"]
+    assert res["stdout"] == "started\n" and res["stderr"] == "warming up\n"
+    assert sorted(s[:2] for s in seen) == [("stderr", "warming up"), ("stdout", "started")]
+    assert all(t < ended - 0.5 for *_, t in seen)  # delivered during the run, not after it
+
+
+def test_close_wakes_callers_waiting_for_a_worker(tmp_path, pool):
+    (tmp_path / "slow.py").write_text("import time\ntime.sleep(1)\n")
+    script = str(tmp_path / "slow.py")
+    busy = threading.Thread(target=pool.run, args=(script,), kwargs={"cwd": str(tmp_path)})
+    busy.start()  # takes the only worker
+    time.sleep(0.2)
+    errors = []
+
+    def waiter():
+        try:
+            pool.run(script, cwd=str(tmp_path))
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    waiters = [threading.Thread(target=waiter) for _ in range(2)]
+    for t in waiters:
+        t.start()
+    time.sleep(0.2)
+    pool.close()
+    for t in waiters:
+        t.join(5)
+    busy.join(5)
+
+    assert not any(t.is_alive() for t in waiters) and not busy.is_alive()
+    assert errors == ["PythonWorkerPool was closed while waiting for a worker"] * 2
@@ -0,0 +1,113 @@
+from pathlib import Path
+import asyncio
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from agi_mindloop.action.experimenter import RingBuffer, Sandbox
+
+PY = Path(sys.executable).name
+
+
+def _py(code: str) -> str:
+    return f'sh: {PY} -c "{code}"'
+
+
+def test_output_is_streamed_by_line_and_capped_to_the_tail():
+    lines = []
+    sandbox = Sandbox(allowlist=[PY], output_cap=64)
+
+    res = sandbox.run(_py("import sys; print('a'); print('b', file=sys.stderr); print('x' * 10000 + 'END')"),
+                      on_line=lambda stream, line: lines.append((stream, line[-3:])))
+
+    assert res["ok"] and res["stdout"].endswith("xEND\n") and len(res["stdout"]) == 64
+    assert res["truncated"]["stdout"] == 2 + 10004 - 64
+    assert ("stdout", "a") in lines and ("stderr", "b") in lines and ("stdout", "END") in lines
+
+
+def test_timeout_kills_the_process_group():
+    sandbox = Sandbox(allowlist=[PY])
+    code = "import subprocess, sys, time; subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(30)']); time.sleep(30)"
+
+    t0 = time.perf_counter()
+    res = sandbox.run(_py(code), timeout_sec=1)
+
+    assert res["error"] == "timeout" and not res["ok"]
+    assert time.perf_counter() - t0 < 5  # the grandchild holding the pipes was killed too
+
+
+def test_run_many_respects_the_concurrency_limit():
+    sandbox = Sandbox(allowlist=[PY], max_concurrent=2)
+
+    t0 = time.perf_counter()
+    res = asyncio.run(sandbox.run_many([_py("import time; time.sleep(0.4)")] * 4))
+
+    assert all(r["ok"] for r in res)
+    assert 0.8 <= time.perf_counter() - t0 < 1.6  # two waves of two
+
+
+def test_ring_buffer_keeps_last_bytes():
+    ring = RingBuffer(4)
+    for chunk in (b"ab", b"cdef", b"g"):
+        ring.write(chunk)
+    assert ring.text() == "defg" and ring.dropped == 3 and ring.total == 7
+
+
+def test_runs_record_rusage_and_limit_hits_per_command():
+    seen = []
+    sandbox = Sandbox(allowlist=[PY], cpu_seconds=1, on_usage=lambda argv, usage: seen.append(usage))
+
+    ok = sandbox.run(_py("x = sum(range(3000000)); print('done')"))
+    spin = sandbox.run(_py("while True: pass"), timeout_sec=10)
+
+    assert ok["usage"]["user_s"] + ok["usage"]["sys_s"] > 0 and ok["usage"]["stdout_bytes"] == 5
+    assert ok["usage"]["max_rss_kb"] > 0 and not ok["usage"]["cpu_limit_hit"]
+    assert spin["usage"]["cpu_limit_hit"] and spin["usage"]["user_s"] >= 0.9
+    assert len(seen) == 2
+
+    report = sandbox.usage_report()[PY]
+    assert report["runs"] == 2 and report["cpu_limit_hits"] == 1 and report["output_bytes"] >= 5
+
+
+def test_pure_commands_are_cached_until_their_inputs_change(tmp_path):
+    target = tmp_path / "notes.txt"
+    target.write_text("one\n")
+    sandbox = Sandbox(allowlist=["cat", "ls"], cwd=str(tmp_path), pure_tools=("cat", "ls"))
+
+    first = sandbox.run("sh: cat notes.txt")
+    second = sandbox.run("sh: cat notes.txt")
+    assert first["stdout"] == second["stdout"] == "one\n"
+    assert "cached" not in first and second["cached"] is True
+
+    target.write_text("one\ntwo\n")
+    assert sandbox.run("sh: cat notes.txt")["stdout"] == "one\ntwo\n"
+
+    assert sandbox.run("sh: ls")["stdout"] == "notes.txt\n"
+    (tmp_path / "more.txt").write_text("")
+    assert sandbox.run("sh: ls")["stdout"] == "more.txt\nnotes.txt\n"
+
+    st = sandbox.cache_stats()
+    assert st["hits"] == 1 and st["misses"] == 4 and st["hit_rate"] == 0.2
+
+
+def test_recursive_runs_and_pseudo_files_are_never_cached(tmp_path):
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "a.txt").write_text("")
+    sandbox = Sandbox(allowlist=["cat", "ls"], cwd=str(tmp_path), pure_tools=("cat", "ls"))
+
+    sandbox.run("sh: ls -R")
+    (tmp_path / "sub" / "b.txt").write_text("")  # below the top level: the cwd fingerprint misses it
+    assert "b.txt" in sandbox.run("sh: ls -R")["stdout"]
+
+    for _ in range(2):
+        assert "cached" not in sandbox.run("sh: cat /proc/self/stat")
+        assert "cached" not in sandbox.run("sh: ls --recursive sub")
+    assert sandbox.cache_stats() == {"hits": 0, "misses": 0, "size": 0, "hit_rate": 0.0}
+
+
+def test_impure_commands_always_run(tmp_path):
+    sandbox = Sandbox(allowlist=["echo"], cwd=str(tmp_path))
+    sandbox.run("sh: echo hi")
+    assert "cached" not in sandbox.run("sh: echo hi")
+    assert sandbox.cache_stats()["hits"] == 0
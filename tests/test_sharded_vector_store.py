@@ -0,0 +1,63 @@
+from pathlib import Path
+import sys
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("faiss")
+
+from agi_mindloop.memory.sharded import ShardedVectorStore, partition_key
+from agi_mindloop.memory.vector_store import VectorStore
+
+
+def _corpus(n=300, dim=16, seed=0):
+    rng = np.random.default_rng(seed)
+    v = rng.standard_normal((n, dim)).astype(np.float32)
+    return v / np.linalg.norm(v, axis=1, keepdims=True)
+
+
+def test_month_shards_merge_seal_and_skip(tmp_path):
+    vecs = _corpus()
+    months = ["2025-01", "2025-02", "2025-03"]
+    keys = [partition_key("month", f"{months[i % 3]}-15T00:00:00Z") for i in range(len(vecs))]
+    sharded = ShardedVectorStore(str(tmp_path / "shards"), dim=16, M=8)
+    sharded.add(range(len(vecs)), vecs, keys)
+    sharded.save()
+    flat = VectorStore(str(tmp_path / "one.faiss"), dim=16, M=8)
+    flat.add(range(len(vecs)), vecs)
+
+    assert sharded.sealed == ["2025-01", "2025-02"]
+    merged = sharded.search_many(vecs[:4], k=5, ef_search=64)
+    single = flat.search_many(vecs[:4], k=5, ef_search=64)
+    assert [[i for i, _ in row] for row in merged] == [[i for i, _ in row] for row in single]
+
+    assert sharded.keys_for(since="2025-02-20T00:00:00Z") == ["2025-02", "2025-03"]
+    only_march = sharded.search_many(vecs[:1], k=5, keys=sharded.keys_for(since="2025-03-01T00:00:00Z"))
+    assert all(i % 3 == 2 for i, _ in only_march[0])
+
+    sharded.remove([0])  # lives in a sealed shard: tombstoned without rewriting the index
+    sharded.save()
+    sharded.close()
+    reopened = ShardedVectorStore(str(tmp_path / "shards"), dim=16, M=8)
+    assert reopened.sealed == ["2025-01", "2025-02"]
+    assert 0 not in [i for i, _ in reopened.search(vecs[0:1], k=3)]
+    reopened.add([1000], vecs[:1], ["2025-01"])  # late write reopens the shard writable
+    assert reopened.sealed == ["2025-02"]
+    assert reopened.rebuild() == len(vecs)
+    reopened.close()
+
+
+def test_undated_shard_does_not_get_the_current_month_sealed(tmp_path):
+    vecs = _corpus(n=30)
+    keys = [partition_key("month", c) for c in ["2025-02-01T00:00:00Z", "2025-03-01T00:00:00Z", None] * 10]
+    assert keys[2] == "unknown"
+    sharded = ShardedVectorStore(str(tmp_path / "shards"), dim=16, M=8)
+    sharded.add(range(len(vecs)), vecs, keys)
+    sharded.save()
+
+    assert sharded.sealed == ["2025-02"]
+    sharded.add([100, 101], vecs[:2], ["2025-03", "unknown"])  # both still take writes in place
+    assert sharded.sealed == ["2025-02"]
+    sharded.close()
@@ -0,0 +1,100 @@
+from pathlib import Path
+import sys
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("faiss")
+
+from agi_mindloop.memory.vector_store import VectorStore
+
+
+def _corpus(n=200, dim=16, seed=0):
+    rng = np.random.default_rng(seed)
+    v = rng.standard_normal((n, dim)).astype(np.float32)
+    return v / np.linalg.norm(v, axis=1, keepdims=True)
+
+
+@pytest.mark.parametrize("storage", ["flat", "fp16", "sq8"])
+def test_storage_variants_find_exact_match(tmp_path, storage):
+    vecs = _corpus()
+    vs = VectorStore(str(tmp_path / f"{storage}.faiss"), dim=16, M=8, storage=storage)
+    vs.add(range(100, 300), vecs)
+    vs.save()
+
+    reopened = VectorStore(str(tmp_path / f"{storage}.faiss"), dim=16)
+    hits = reopened.search(vecs[7:8], k=3)
+
+    assert hits[0][0] == 107
+    assert hits[0][1] == pytest.approx(1.0, abs=0.05)
+
+
+def test_unknown_storage_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        VectorStore(str(tmp_path / "x.faiss"), dim=16, storage="pq")
+
+
+def test_search_many_returns_one_list_per_query(tmp_path):
+    vecs = _corpus()
+    vs = VectorStore(str(tmp_path / "v.faiss"), dim=16, M=8, ef_construction=80)
+    vs.add(range(200), vecs)
+
+    results = vs.search_many(vecs[:5], k=4, ef_search=64)
+
+    assert [r[0][0] for r in results] == [0, 1, 2, 3, 4]
+    assert all(len(r) == 4 for r in results)
+
+
+@pytest.mark.parametrize("strategy", ["tombstone", "rebuild"])
+def test_removed_ids_never_returned(tmp_path, strategy):
+    vecs = _corpus()
+    path = str(tmp_path / "v.faiss")
+    vs = VectorStore(path, dim=16, M=8, storage="sq8", remove_strategy=strategy)
+    vs.add(range(200), vecs)
+
+    vs.remove([3, 4])
+    vs.save()
+
+    for store in (vs, VectorStore(path, dim=16)):
+        hits = store.search_many(vecs[[3, 4]], k=10)
+        assert not {i for row in hits for i, _ in row} & {3, 4}
+    reopened = VectorStore(path, dim=16)
+    assert reopened.storage == "sq8" and reopened.M == 8
+    assert reopened.rebuild() == 198
+    assert reopened.search(vecs[5:6], k=1)[0][0] == 5
+
+
+def test_readded_ids_are_no_longer_tombstoned(tmp_path):
+    vecs = _corpus()
+    path = str(tmp_path / "v.faiss")
+    vs = VectorStore(path, dim=16, M=8)
+    vs.add(range(10), vecs[:10])
+    vs.remove([3, 4])
+    vs.save()
+
+    vs.add([3], vecs[20:21])  # id 3 comes back with a new vector
+    assert vs.tombstones == set()
+    vs.save()
+
+    for store in (vs, VectorStore(path, dim=16)):
+        assert store.tombstones == set()
+        assert store.search(vecs[20:21], k=1)[0][0] == 3
+        assert 4 not in {i for i, _ in store.search(vecs[4:5], k=10)}
+        assert sorted(store.ids().tolist()) == [0, 1, 2, 3, 5, 6, 7, 8, 9]  # the old vector of 3 is gone
+
+
+def test_search_many_allow_ids(tmp_path):
+    vecs = _corpus()
+    vs = VectorStore(str(tmp_path / "allow.faiss"), dim=16, M=8)
+    vs.add(range(200), vecs)
+    vs.remove([11])
+
+    exact = vs.search_many(vecs[10:11], k=5, allow_ids=[10, 11, 12, 999])[0]
+    vs.brute_force_max = 0
+    even = vs.search_many(vecs[10:12], k=5, ef_search=64, allow_ids=range(0, 200, 2))
+
+    assert [i for i, _ in exact] == [10, 12]
+    assert [i for i, _ in even[0]][0] == 10
+    assert all(i % 2 == 0 for row in even for i, _ in row) and len(even[1]) == 5